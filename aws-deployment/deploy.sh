@@ -83,9 +83,16 @@ echo "📁 Preparing deployment files..."
 cp -r ../src ./ 2>/dev/null || true
 cp ../requirements.txt ./ 2>/dev/null || true
 
+# Hashed, resized and precompressed static assets (src/static/dist)
+echo "🖼️ Building static assets..."
+(cd .. && python -m src.assets)
+cp -r ../src/static/dist ./src/static/ 2>/dev/null || true
+
 # Set environment variables for deployment
 export SECRET_KEY=${SECRET_KEY:-$(openssl rand -base64 32)}
-export DATABASE_URL=${DATABASE_URL:-"sqlite:///tmp/app.db"}
+export DATABASE_URL=${DATABASE_URL:-"sqlite:////tmp/app.db"}
+# Lambda's /tmp SQLite is per container and empty on start: create the schema at startup
+export AUTO_INIT_DB=${AUTO_INIT_DB:-1}
 
 echo "🔐 Environment variables configured"
 
@@ -0,0 +1,204 @@
+"""
+Synthetic data generator for benchmarks
+
+Creates clients, campaigns and leads (10k to 1M rows) with bulk inserts.
+Every synthetic client can log in with BENCH_PASSWORD.
+    
+    python -m benchmarks.datagen --database-url sqlite:////tmp/bench.db --clients 20 --leads 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_providers import fake_person
+
+BENCH_PASSWORD = 'benchmark123'
+BENCH_USER_PREFIX = 'bench_client_'
+
+STATUSES = ['new', 'new', 'new', 'contacted', 'qualified', 'converted', 'lost']
+SOURCES = ['apollo', 'apollo', 'linkedin', 'manual']
+
+
+def load_app(database_url=None):
+    """Build the Flask app against the given database and create its tables"""
+    if database_url:
+        os.environ['DATABASE_URL'] = database_url
+    from src.main import create_app
+    from src.cli import init_database
+    
+    app = create_app()
+    with app.app_context():
+        init_database()
+    return app
+
+
+def create_clients(count, monthly_lead_limit=1000000):
+    """Create (or reuse) synthetic clients; returns their ids"""
+    from werkzeug.security import generate_password_hash
+    from src.models.auth import Client
+    from src.models.base import db
+    
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+    existing = {c.username: c.id for c in Client.query.filter(Client.username.like(f'{BENCH_USER_PREFIX}%'))}
+    rows = []
+    for i in range(count):
+        username = f'{BENCH_USER_PREFIX}{i}'
+        if username in existing:
+            continue
+        rows.append({
+            'username': username,
+            'email': f'{username}@bench.example.com',
+            'password_hash': password_hash,
+            'company_name': f'Bench Company {i}',
+            'contact_name': f'Bench Contact {i}',
+            'is_active': True,
+            'is_admin': False,
+            'subscription_plan': 'enterprise',
+            'monthly_lead_limit': monthly_lead_limit,
+            'leads_used_this_month': 0,
+            'total_leads_generated': 0,
+            'apollo_api_key': 'bench-apollo-key',
+            'hunter_api_key': 'bench-hunter-key',
+            'created_at': datetime.utcnow(),
+            'updated_at': datetime.utcnow()
+        })
+    if rows:
+        db.session.execute(db.insert(Client), rows)
+        db.session.commit()
+    
+    return [
+        client_id for (client_id,) in db.session.query(Client.id).filter(
+            Client.username.like(f'{BENCH_USER_PREFIX}%')
+        ).order_by(Client.id).limit(count)
+    ]
+
+
+def create_campaigns(client_ids, per_client=3):
+    """Create campaigns for each client; returns campaign ids"""
+    from src.models.campaign import LeadCampaign
+    from src.models.base import db
+    
+    rows = []
+    for client_id in client_ids:
+        for i in range(per_client):
+            rows.append({
+                'client_id': client_id,
+                'name': f'Bench campaign {client_id}-{i}',
+                'description': 'Synthetic benchmark campaign',
+                'target_titles': json.dumps(['Consultant', 'Director', 'Managing Director']),
+                'target_locations': json.dumps(['Sydney, AU', 'Melbourne, AU']),
+                'target_industries': json.dumps(['Management Consulting']),
+                'target_company_sizes': json.dumps(['small', 'medium']),
+                'leads_target': 1000000,
+                'leads_generated': 0,
+                'daily_limit': 1000000,
+                'status': 'active',
+                'created_at': datetime.utcnow(),
+                'updated_at': datetime.utcnow()
+            })
+    if rows:
+        db.session.execute(db.insert(LeadCampaign), rows)
+        db.session.commit()
+    
+    return [campaign_id for (campaign_id,) in db.session.query(LeadCampaign.id).filter(
+        LeadCampaign.client_id.in_(client_ids)
+    )]
+
+
+def lead_row(index, client_id, now):
+    person = fake_person(index, duplicate_rate=0.02)
+    org = person['organization']
+    rng = random.Random(index)
+    created = now - timedelta(minutes=rng.randrange(60 * 24 * 90))
+    return {
+        'client_id': client_id,
+        'first_name': person['first_name'],
+        'last_name': person['last_name'],
+        'email': person['email'],
+        'phone': person['phone_numbers'][0]['sanitized_number'] if person['phone_numbers'] else '',
+        'title': person['title'],
+        'company': org['name'],
+        'industry': org['industry'],
+        'city': person['city'],
+        'state': person['state'],
+        'country': person['country'],
+        'score': rng.randint(30, 100),
+        'status': rng.choice(STATUSES),
+        'source': rng.choice(SOURCES),
+        'linkedin_url': person['linkedin_url'],
+        'employees': org['estimated_num_employees'],
+        'tags': json.dumps(['auto-generated', 'benchmark']),
+        'auto_generated': True,
+        'enriched': rng.random() < 0.5,
+        'verified': person['email_status'] == 'verified',
+        'created_at': created,
+        'updated_at': created
+    }
+
+
+def create_leads(client_ids, total, chunk_size=5000):
+    """Bulk insert total leads spread across the clients"""
+    from src.models.lead import Lead
+    from src.models.base import db
+    
+    now = datetime.utcnow()
+    inserted = 0
+    started = time.perf_counter()
+    while inserted < total:
+        batch = min(chunk_size, total - inserted)
+        rows = [
+            lead_row(inserted + i, client_ids[(inserted + i) % len(client_ids)], now)
+            for i in range(batch)
+        ]
+        db.session.execute(db.insert(Lead), rows)
+        db.session.commit()
+        inserted += batch
+        if inserted % (chunk_size * 20) == 0 or inserted == total:
+            rate = inserted / (time.perf_counter() - started)
+            print(f"  {inserted}/{total} leads ({rate:.0f} rows/s)")
+    return inserted
+
+
+def generate(clients=10, campaigns_per_client=3, leads=10000, chunk_size=5000):
+    """
+    Populate the current app's database with synthetic data
+    
+    Must run inside an app context.
+    
+    Returns:
+        Dictionary with the created client and campaign ids
+    """
+    client_ids = create_clients(clients)
+    campaign_ids = create_campaigns(client_ids, campaigns_per_client)
+    if leads:
+        create_leads(client_ids, leads, chunk_size)
+    return {'client_ids': client_ids, 'campaign_ids': campaign_ids}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic benchmark data')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'))
+    parser.add_argument('--clients', type=int, default=10)
+    parser.add_argument('--campaigns-per-client', type=int, default=3)
+    parser.add_argument('--leads', type=int, default=10000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+    
+    app = load_app(args.database_url)
+    with app.app_context():
+        started = time.perf_counter()
+        created = generate(args.clients, args.campaigns_per_client, args.leads, args.chunk_size)
+        print(f"Created {len(created['client_ids'])} clients, {len(created['campaign_ids'])} campaigns "
+              f"and {args.leads} leads in {time.perf_counter() - started:.1f}s")
+        print(f"Login as {BENCH_USER_PREFIX}0 / {BENCH_PASSWORD}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,435 @@
+"""
+Local stand-ins for the Apollo, Hunter and LinkedIn APIs
+
+A threaded HTTP server returning deterministic, realistically shaped
+responses, with configurable latency, 429 injection and pagination. Point the
+services at it through the base URL environment variables:
+    
+    APOLLO_BASE_URL=http://127.0.0.1:8900/apollo/api/v1
+    HUNTER_BASE_URL=http://127.0.0.1:8900/hunter/v2
+    LINKEDIN_BASE_URL=http://127.0.0.1:8900/linkedin/v2
+
+Run standalone:
+    
+    python -m benchmarks.fake_providers --port 8900 --latency-ms 80 --rate-limit-every 50
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+FIRST_NAMES = ['Olivia', 'Jack', 'Charlotte', 'William', 'Amelia', 'Noah', 'Isla', 'Oliver', 'Mia', 'Thomas',
+               'Grace', 'James', 'Chloe', 'Lucas', 'Zoe', 'Henry', 'Ava', 'Ethan', 'Ruby', 'Leo']
+LAST_NAMES = ['Smith', 'Jones', 'Williams', 'Brown', 'Wilson', 'Taylor', 'Johnson', 'White', 'Martin', 'Anderson',
+              'Thompson', 'Nguyen', 'Thomas', 'Walker', 'Harris', 'Lee', 'Ryan', 'Robinson', 'Kelly', 'King']
+TITLES = ['Consultant', 'Senior Consultant', 'Managing Director', 'Director', 'Principal Consultant',
+          'Head of People', 'HR Manager', 'Chief Executive Officer', 'Wellness Manager', 'Operations Manager']
+SENIORITIES = ['senior', 'director', 'manager', 'c_suite', 'entry']
+INDUSTRIES = ['management consulting', 'information technology & services', 'hospital & health care',
+              'financial services', 'marketing & advertising', 'health, wellness & fitness', 'legal services']
+CITIES = [('Sydney', 'New South Wales'), ('Melbourne', 'Victoria'), ('Brisbane', 'Queensland'),
+          ('Perth', 'Western Australia'), ('Adelaide', 'South Australia')]
+COMPANY_WORDS = ['Harbour', 'Summit', 'Coastal', 'Evergreen', 'Southern', 'Bright', 'Pacific', 'Northstar',
+                 'Wattle', 'Redgum', 'Bluewater', 'Ironbark']
+COMPANY_SUFFIXES = ['Consulting', 'Advisory', 'Health', 'Digital', 'Partners', 'Group', 'Capital', 'Legal']
+
+
+def _rng(*parts):
+    """Deterministic RNG seeded from the request identity"""
+    seed = hashlib.md5('|'.join(str(p) for p in parts).encode()).hexdigest()
+    return random.Random(int(seed[:12], 16))
+
+
+def fake_company(index):
+    rng = _rng('company', index)
+    name = f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}"
+    domain = re.sub(r'[^a-z]', '', name.lower()) + f"{index % 997}.com.au"
+    return {
+        'id': str(100000 + index),
+        'name': name,
+        'website_url': f"https://{domain}",
+        'primary_domain': domain,
+        'industry': rng.choice(INDUSTRIES),
+        'estimated_num_employees': rng.choice([8, 25, 60, 150, 400, 1200, 5000]),
+        'technologies': rng.sample(['Salesforce', 'HubSpot', 'Xero', 'Slack', 'Google Workspace', 'AWS'], 2)
+    }
+
+
+def fake_person(index, duplicate_rate=0.0):
+    rng = _rng('person', index)
+    # A fraction of results repeat an earlier person to exercise deduplication
+    if duplicate_rate and index > 10 and rng.random() < duplicate_rate:
+        return fake_person(rng.randrange(index))
+    company = fake_company(index // 4)
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    city, state = rng.choice(CITIES)
+    return {
+        'id': f"p{index:08d}",
+        'first_name': first,
+        'last_name': last,
+        'name': f"{first} {last}",
+        'title': rng.choice(TITLES),
+        'seniority': rng.choice(SENIORITIES),
+        'email': f"{first.lower()}.{last.lower()}{index}@{company['primary_domain']}",
+        'email_status': rng.choice(['verified', 'verified', 'guessed', 'unavailable']),
+        'linkedin_url': f"https://www.linkedin.com/in/{first.lower()}-{last.lower()}-{index}",
+        'phone_numbers': [{'sanitized_number': f"+6140{index % 10000000:07d}"}] if rng.random() < 0.4 else [],
+        'city': city,
+        'state': state,
+        'country': 'Australia',
+        'organization': company
+    }
+
+
+class FakeProviderState:
+    """Server configuration and counters shared by request handlers"""
+    
+    def __init__(self, latency_ms=50.0, jitter_ms=10.0, rate_limit_every=0, total_people=1000,
+                 duplicate_rate=0.05, fresh_results=False):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit_every = rate_limit_every
+        self.total_people = total_people
+        self.duplicate_rate = duplicate_rate
+        # Each search returns people not seen before, so repeated campaign runs keep inserting
+        self.fresh_results = fresh_results
+        self.searches = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.by_endpoint = {}
+        self._lock = threading.Lock()
+    
+    def next_request(self, endpoint):
+        """Count a request; returns True if it should be answered with 429"""
+        with self._lock:
+            self.requests += 1
+            self.by_endpoint[endpoint] = self.by_endpoint.get(endpoint, 0) + 1
+            if self.rate_limit_every and self.requests % self.rate_limit_every == 0:
+                self.rate_limited += 1
+                return True
+        return False
+    
+    def delay(self):
+        latency = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if latency > 0:
+            time.sleep(latency / 1000)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'rate_limited': self.rate_limited,
+                'by_endpoint': dict(self.by_endpoint)
+            }
+
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    """Routes /apollo/api/v1/*, /hunter/v2/* and /linkedin/v2/*"""
+    
+    protocol_version = 'HTTP/1.1'
+    state = None  # set by FakeProviderServer
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return {}
+    
+    def _handle(self, method):
+        parsed = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        body = self._body() if method == 'POST' else {}
+        path = parsed.path.rstrip('/')
+        
+        route = re.sub(r'/\d+', '/{id}', path)
+        state = self.state
+        state.delay()
+        if state.next_request(route):
+            self._send(429, {'error': 'rate limited'})
+            return
+        
+        handler = ROUTES.get((method, route))
+        if handler is None:
+            self._send(404, {'error': f'no fake for {method} {route}'})
+            return
+        
+        status, payload = handler(state, path, query, body)
+        self._send(status, payload)
+    
+    def do_GET(self):
+        self._handle('GET')
+    
+    def do_POST(self):
+        self._handle('POST')
+
+
+def apollo_search(state, path, query, body):
+    per_page = min(int(query.get('per_page', body.get('per_page', 25))), 100)
+    page = max(int(query.get('page', body.get('page', 1))), 1)
+    start = (page - 1) * per_page
+    end = min(start + per_page, state.total_people)
+    offset = 0
+    if state.fresh_results:
+        with state._lock:
+            offset = state.searches * state.total_people
+            state.searches += 1
+    people = [fake_person(offset + i, state.duplicate_rate) for i in range(start, end)]
+    return 200, {
+        'people': people,
+        'pagination': {
+            'page': page,
+            'per_page': per_page,
+            'total_entries': state.total_people,
+            'total_pages': (state.total_people + per_page - 1) // per_page
+        }
+    }
+
+
+def apollo_match(state, path, query, body):
+    email = body.get('email') or query.get('email') or ''
+    index = int(hashlib.md5(email.encode()).hexdigest()[:6], 16)
+    person = fake_person(index)
+    if email:
+        person['email'] = email
+    return 200, {'person': person}
+
+
+def apollo_bulk_match(state, path, query, body):
+    details = body.get('details') or []
+    matches = []
+    for detail in details:
+        email = detail.get('email') or ''
+        index = int(hashlib.md5(email.encode()).hexdigest()[:6], 16)
+        person = fake_person(index)
+        if email:
+            person['email'] = email
+        matches.append(person)
+    return 200, {'matches': matches, 'status': 'success'}
+
+
+def apollo_auth_health(state, path, query, body):
+    return 200, {'is_logged_in': True}
+
+
+def hunter_verifier(state, path, query, body):
+    email = query.get('email', '')
+    rng = _rng('verify', email)
+    result = rng.choice(['deliverable', 'deliverable', 'deliverable', 'risky', 'undeliverable'])
+    return 200, {'data': {
+        'status': 'valid' if result == 'deliverable' else 'accept_all',
+        'result': result,
+        'score': rng.randint(40, 99),
+        'email': email,
+        'regexp': True,
+        'gibberish': False,
+        'disposable': False,
+        'webmail': False,
+        'mx_records': True,
+        'smtp_server': True,
+        'smtp_check': result == 'deliverable',
+        'accept_all': result == 'risky',
+        'block': False
+    }}
+
+
+def hunter_domain_search(state, path, query, body):
+    domain = query.get('domain', 'example.com.au')
+    rng = _rng('domain', domain)
+    limit = int(query.get('limit', 10))
+    emails = []
+    for i in range(min(limit, rng.randint(1, 30))):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        emails.append({
+            'value': f"{first.lower()}.{last.lower()}@{domain}",
+            'type': 'personal',
+            'confidence': rng.randint(50, 99),
+            'first_name': first,
+            'last_name': last,
+            'position': rng.choice(TITLES),
+            'seniority': rng.choice(SENIORITIES),
+            'department': 'management',
+            'linkedin': None,
+            'twitter': None,
+            'phone_number': None
+        })
+    return 200, {'data': {
+        'domain': domain,
+        'organization': domain.split('.')[0].title(),
+        'disposable': False,
+        'webmail': False,
+        'accept_all': False,
+        'pattern': '{first}.{last}',
+        'country': 'AU',
+        'state': None,
+        'emails': emails
+    }}
+
+
+def hunter_email_finder(state, path, query, body):
+    first = query.get('first_name', 'jane').lower()
+    last = query.get('last_name', 'doe').lower()
+    domain = query.get('domain', 'example.com.au')
+    return 200, {'data': {
+        'email': f"{first}.{last}@{domain}",
+        'score': 87,
+        'domain': domain,
+        'position': None,
+        'linkedin_url': None,
+        'phone_number': None,
+        'company': domain.split('.')[0].title(),
+        'sources': []
+    }}
+
+
+def hunter_account(state, path, query, body):
+    return 200, {'data': {'email': 'bench@example.com', 'plan_name': 'Fake', 'calls': {'used': state.requests}}}
+
+
+def linkedin_company(state, path, query, body):
+    company_id = int(path.rsplit('/', 1)[-1])
+    company = fake_company(company_id % 100000)
+    return 200, {
+        'id': company_id,
+        'localizedName': company['name'],
+        'websiteUrl': company['website_url'],
+        'staffCount': company['estimated_num_employees'],
+        'industries': [company['industry']],
+        'locations': [{'address': {'city': 'Sydney', 'country': 'AU'}}]
+    }
+
+
+def linkedin_company_search(state, path, query, body):
+    count = min(int(query.get('count', 10)), 50)
+    start = int(query.get('start', 0))
+    keyword = query.get('keywords', '')
+    elements = []
+    for i in range(start, start + count):
+        company = fake_company(i + len(keyword))
+        elements.append({'id': int(company['id']), 'name': company['name']})
+    return 200, {'elements': elements, 'paging': {'start': start, 'count': count, 'total': 500}}
+
+
+def linkedin_profile(state, path, query, body):
+    return 200, {'id': 'fake-member', 'localizedFirstName': 'Bench', 'localizedLastName': 'User'}
+
+
+def linkedin_people_search(state, path, query, body):
+    count = min(int(query.get('count', 10)), 50)
+    return 200, {'elements': [
+        {'id': f"member{i}", 'firstName': fake_person(i)['first_name'], 'lastName': fake_person(i)['last_name']}
+        for i in range(count)
+    ]}
+
+
+ROUTES = {
+    ('POST', '/apollo/api/v1/mixed_people/search'): apollo_search,
+    ('POST', '/apollo/api/v1/people/match'): apollo_match,
+    ('POST', '/apollo/api/v1/people/bulk_match'): apollo_bulk_match,
+    ('GET', '/apollo/api/v1/auth/health'): apollo_auth_health,
+    ('GET', '/hunter/v2/email-verifier'): hunter_verifier,
+    ('GET', '/hunter/v2/domain-search'): hunter_domain_search,
+    ('GET', '/hunter/v2/email-finder'): hunter_email_finder,
+    ('GET', '/hunter/v2/account'): hunter_account,
+    ('GET', '/linkedin/v2/companies/{id}'): linkedin_company,
+    ('GET', '/linkedin/v2/company-search'): linkedin_company_search,
+    ('GET', '/linkedin/v2/people/~'): linkedin_profile,
+    ('GET', '/linkedin/v2/people-search'): linkedin_people_search,
+}
+
+
+class FakeProviderServer:
+    """
+    Fake provider server running in a background thread
+    
+    Usage:
+        with FakeProviderServer(latency_ms=80) as server:
+            os.environ.update(server.env())
+            ...
+    """
+    
+    def __init__(self, host='127.0.0.1', port=0, **state_options):
+        self.state = FakeProviderState(**state_options)
+        handler = type('BoundFakeProviderHandler', (FakeProviderHandler,), {'state': self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+    
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def env(self):
+        """Base URL environment variables for the services"""
+        return {
+            'APOLLO_BASE_URL': f"{self.url}/apollo/api/v1",
+            'HUNTER_BASE_URL': f"{self.url}/hunter/v2",
+            'LINKEDIN_BASE_URL': f"{self.url}/linkedin/v2"
+        }
+    
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='fake-providers', daemon=True)
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Apollo/Hunter/LinkedIn API server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--rate-limit-every', type=int, default=0, help='Answer every Nth request with 429')
+    parser.add_argument('--total-people', type=int, default=1000, help='Apollo search result size')
+    parser.add_argument('--duplicate-rate', type=float, default=0.05)
+    args = parser.parse_args()
+    
+    server = FakeProviderServer(
+        host=args.host, port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        rate_limit_every=args.rate_limit_every, total_people=args.total_people,
+        duplicate_rate=args.duplicate_rate
+    )
+    print(f"Fake providers listening on {server.url}")
+    for name, value in server.env().items():
+        print(f"  export {name}={value}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.state.stats(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
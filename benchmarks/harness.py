@@ -0,0 +1,136 @@
+"""
+Timing, reporting and baseline comparison shared by the benchmark scripts
+"""
+
+import json
+import math
+import os
+import platform
+import statistics
+import time
+from datetime import datetime
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    rank = min(max(math.ceil(fraction * len(sorted_values)), 1), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, elapsed, items=None, errors=0):
+    """
+    Summarize a list of per-operation latencies (seconds)
+    
+    Args:
+        latencies: Latency of each measured operation
+        elapsed: Wall time of the whole run
+        items: Units of work done (defaults to the number of operations)
+        errors: Failed operations
+    
+    Returns:
+        Dictionary with throughput and latency percentiles in milliseconds
+    """
+    ordered = sorted(latencies)
+    items = len(ordered) if items is None else items
+    return {
+        'operations': len(ordered),
+        'items': items,
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_per_s': round(items / elapsed, 2) if elapsed > 0 else None,
+        'mean_ms': round(statistics.mean(ordered) * 1000, 2) if ordered else None,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 2) if ordered else None,
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 2) if ordered else None,
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 2) if ordered else None,
+        'max_ms': round(ordered[-1] * 1000, 2) if ordered else None
+    }
+
+
+def measure(operation, iterations, warmup=0):
+    """
+    Run operation() repeatedly and summarize latencies
+    
+    operation may return the number of items it processed (default 1).
+    """
+    for _ in range(warmup):
+        operation()
+    
+    latencies = []
+    items = 0
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        op_started = time.perf_counter()
+        try:
+            result = operation()
+            items += result if isinstance(result, int) and not isinstance(result, bool) else 1
+        except Exception as e:
+            errors += 1
+            print(f"  operation failed: {e}")
+        latencies.append(time.perf_counter() - op_started)
+    return summarize(latencies, time.perf_counter() - started, items=items, errors=errors)
+
+
+def environment_info():
+    return {
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def print_table(results):
+    """Print scenario results as an aligned table"""
+    columns = ('throughput_per_s', 'p50_ms', 'p95_ms', 'p99_ms', 'errors')
+    width = max([len(name) for name in results] + [8])
+    print(f"{'scenario'.ljust(width)}  " + '  '.join(c.rjust(16) for c in columns))
+    for name, result in results.items():
+        cells = []
+        for column in columns:
+            value = result.get(column)
+            cells.append(('-' if value is None else f"{value}").rjust(16))
+        print(f"{name.ljust(width)}  " + '  '.join(cells))
+
+
+def save_results(path, results, config=None):
+    with open(path, 'w') as f:
+        json.dump({'environment': environment_info(), 'config': config or {}, 'results': results}, f, indent=2)
+
+
+def compare_to_baseline(results, baseline_path, tolerance=0.10):
+    """
+    Compare results with a saved baseline
+    
+    A scenario regresses when its p50 grows or its throughput drops by more
+    than the tolerance.
+    
+    Returns:
+        List of regression descriptions (empty if none)
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f).get('results', {})
+    
+    regressions = []
+    print(f"\nComparison with baseline {baseline_path}:")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"  {name}: no baseline")
+            continue
+        
+        notes = []
+        for metric, higher_is_better in (('throughput_per_s', True), ('p50_ms', False), ('p99_ms', False)):
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            notes.append(f"{metric} {old} -> {new} ({change:+.1%})")
+            worse = -change if higher_is_better else change
+            if metric != 'p99_ms' and worse > tolerance:
+                regressions.append(f"{name}: {metric} {old} -> {new} ({change:+.1%})")
+        print(f"  {name}: " + '; '.join(notes))
+    
+    return regressions
@@ -0,0 +1,101 @@
+"""
+Cold-start import budget for the app factory
+
+Measures, in a fresh interpreter, how long `create_app()` takes including
+imports, lists the slowest top-level imports, and fails when the total goes
+over budget or when a module that should load lazily (provider clients,
+scheduler) is pulled in at startup.
+    
+    python -m benchmarks.import_budget --budget-ms 1500
+
+Exits with status 1 on a violation.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported by create_app(); the views import them on first use
+LAZY_MODULES = [
+    'requests',
+    'schedule',
+    'src.services.apollo_service',
+    'src.services.enrichment_service',
+    'src.services.linkedin_service',
+    'src.services.lead_automation'
+]
+
+PROBE = """
+import sys, time, json
+started = time.perf_counter()
+from src.main import create_app
+app = create_app()
+elapsed = time.perf_counter() - started
+print(json.dumps({'elapsed_ms': elapsed * 1000, 'modules': sorted(sys.modules)}))
+"""
+
+
+def parse_importtime(stderr):
+    """Cumulative microseconds of each top-level import from -X importtime output"""
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.startswith('  ') or not cumulative.strip().isdigit():
+            continue
+        totals[name.strip()] = int(cumulative)
+    return totals
+
+
+def measure_cold_start(database_url):
+    env = dict(os.environ, DATABASE_URL=database_url, PYTHONPATH=ROOT)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['imports'] = parse_importtime(result.stderr)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the app cold-start import budget')
+    parser.add_argument('--budget-ms', type=float, default=1500.0, help='Maximum create_app() time including imports')
+    parser.add_argument('--runs', type=int, default=3, help='Cold starts to measure (the best one is checked)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest top-level imports to list')
+    args = parser.parse_args()
+    
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='leadgen-import-'), 'app.db')}"
+    reports = [measure_cold_start(database_url) for _ in range(args.runs)]
+    best = min(reports, key=lambda report: report['elapsed_ms'])
+    
+    runs = ', '.join(f"{report['elapsed_ms']:.0f}" for report in reports)
+    print(f"create_app() cold start: {best['elapsed_ms']:.0f} ms (best of {args.runs}; runs: {runs})")
+    print("\nSlowest top-level imports:")
+    for name, micros in sorted(best['imports'].items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+    
+    failures = []
+    if best['elapsed_ms'] > args.budget_ms:
+        failures.append(f"cold start {best['elapsed_ms']:.0f} ms exceeds budget {args.budget_ms:.0f} ms")
+    loaded = set(best['modules'])
+    for module in LAZY_MODULES:
+        if module in loaded:
+            failures.append(f"{module} is imported at startup")
+    
+    if failures:
+        print("\nImport budget violations:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nWithin budget")
+
+
+if __name__ == '__main__':
+    main()
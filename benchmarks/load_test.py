@@ -0,0 +1,246 @@
+"""
+Load test for the authenticated dashboard API
+
+Logs in N synthetic clients through /api/auth/login, then replays a weighted
+mix of dashboard requests from concurrent workers and reports throughput,
+latency percentiles and DB query counts per endpoint.
+
+By default the app is served in-process (threaded werkzeug server) against a
+fresh SQLite database, so the test runs fully offline:
+    
+    python -m benchmarks.load_test --users 20 --concurrency 8 --duration 30
+
+Against a local Postgres:
+    
+    python -m benchmarks.load_test --database-url postgresql://localhost/leadgen_bench --leads 100000
+
+Against an already running server (its data must come from benchmarks.datagen):
+    
+    python -m benchmarks.load_test --url http://127.0.0.1:5000 --skip-datagen
+
+Query counts come from the X-Query-Count header, which the app sends when
+query budgets are enabled (always the case for the in-process server).
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import datagen
+from benchmarks.harness import percentile, environment_info
+
+# (name, weight, method, path template)
+REQUEST_MIX = (
+    ('GET /api/automation/status', 30, 'GET', '/api/automation/status'),
+    ('GET /api/automation/leads', 40, 'GET', '/api/automation/leads?page={page}&per_page=20'),
+    ('GET /api/automation/campaigns', 20, 'GET', '/api/automation/campaigns'),
+    ('PUT /api/automation/leads/<id>', 10, 'PUT', '/api/automation/leads/{lead_id}')
+)
+
+LEAD_STATUSES = ['new', 'contacted', 'qualified', 'converted', 'lost']
+
+
+class EndpointStats:
+    """Latencies, status codes and query counts for one endpoint"""
+    
+    def __init__(self):
+        self.latencies = []
+        self.statuses = defaultdict(int)
+        self.query_counts = []
+        self.errors = 0
+
+
+class LoadTestStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = defaultdict(EndpointStats)
+    
+    def record(self, name, latency, status, query_count=None, error=False):
+        with self._lock:
+            stats = self.endpoints[name]
+            stats.latencies.append(latency)
+            stats.statuses[status] += 1
+            if query_count is not None:
+                stats.query_counts.append(query_count)
+            if error:
+                stats.errors += 1
+    
+    def report(self, elapsed):
+        rows = {}
+        for name, stats in sorted(self.endpoints.items()):
+            ordered = sorted(stats.latencies)
+            queries = stats.query_counts
+            rows[name] = {
+                'requests': len(ordered),
+                'throughput_per_s': round(len(ordered) / elapsed, 2) if elapsed else None,
+                'p50_ms': round(percentile(ordered, 0.50) * 1000, 2) if ordered else None,
+                'p95_ms': round(percentile(ordered, 0.95) * 1000, 2) if ordered else None,
+                'p99_ms': round(percentile(ordered, 0.99) * 1000, 2) if ordered else None,
+                'errors': stats.errors,
+                'statuses': dict(stats.statuses),
+                'avg_queries': round(sum(queries) / len(queries), 1) if queries else None,
+                'max_queries': max(queries) if queries else None
+            }
+        return rows
+
+
+class SyntheticUser:
+    """One logged-in client with its own HTTP connection pool"""
+    
+    def __init__(self, base_url, username, password):
+        self.base_url = base_url
+        self.http = requests.Session()
+        response = self.http.post(f"{base_url}/api/auth/login", json={'username': username, 'password': password})
+        payload = response.json()
+        if not payload.get('success'):
+            raise RuntimeError(f"Login failed for {username}: {payload.get('error')}")
+        self.http.headers['Authorization'] = f"Bearer {payload['session_token']}"
+        self.http.cookies.clear()
+        
+        leads = self.http.get(f"{base_url}/api/automation/leads?per_page=100").json()
+        self.lead_ids = [lead['id'] for lead in leads.get('leads', [])]
+        self.pages = max(1, min(50, leads.get('pagination', {}).get('pages') or 1))
+    
+    def request(self, method, path_template, rng):
+        path = path_template.format(
+            page=rng.randint(1, self.pages),
+            lead_id=rng.choice(self.lead_ids) if self.lead_ids else 0
+        )
+        if method == 'PUT':
+            return self.http.put(f"{self.base_url}{path}", json={
+                'status': rng.choice(LEAD_STATUSES),
+                'notes': f"load test update {rng.random():.6f}"
+            })
+        return self.http.get(f"{self.base_url}{path}")
+
+
+def run_worker(users, stats, deadline, seed):
+    rng = random.Random(seed)
+    names = [entry[0] for entry in REQUEST_MIX]
+    weights = [entry[1] for entry in REQUEST_MIX]
+    by_name = {entry[0]: entry for entry in REQUEST_MIX}
+    
+    while time.monotonic() < deadline:
+        user = rng.choice(users)
+        name = rng.choices(names, weights)[0]
+        _, _, method, path = by_name[name]
+        if method == 'PUT' and not user.lead_ids:
+            continue
+        
+        started = time.perf_counter()
+        try:
+            response = user.request(method, path, rng)
+            latency = time.perf_counter() - started
+            query_count = response.headers.get('X-Query-Count')
+            stats.record(
+                name, latency, response.status_code,
+                int(query_count) if query_count is not None else None,
+                error=response.status_code >= 400
+            )
+        except requests.RequestException:
+            stats.record(name, time.perf_counter() - started, 'exception', error=True)
+
+
+def start_local_server(app):
+    """Serve the app from a threaded werkzeug server on a free port"""
+    from werkzeug.serving import make_server
+    
+    # Per-request access logging would dominate the measured latency
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name='load-test-server', daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def print_report(rows):
+    columns = ('requests', 'throughput_per_s', 'p50_ms', 'p95_ms', 'p99_ms', 'errors', 'avg_queries', 'max_queries')
+    width = max([len(name) for name in rows] + [8])
+    print(f"{'endpoint'.ljust(width)}  " + '  '.join(c.rjust(14) for c in columns))
+    for name, row in rows.items():
+        cells = [('-' if row[c] is None else str(row[c])).rjust(14) for c in columns]
+        print(f"{name.ljust(width)}  " + '  '.join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the authenticated dashboard API')
+    parser.add_argument('--url', help='Target an already running server instead of serving the app in-process')
+    parser.add_argument('--database-url', help='Database for the in-process app (defaults to a temp SQLite file)')
+    parser.add_argument('--users', type=int, default=10, help='Synthetic clients to log in')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent workers')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run')
+    parser.add_argument('--leads', type=int, default=20000, help='Synthetic leads to generate')
+    parser.add_argument('--skip-datagen', action='store_true')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write the report as JSON')
+    args = parser.parse_args()
+    
+    server = None
+    base_url = args.url
+    if not base_url:
+        database_url = args.database_url or (
+            f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='leadgen-load-'), 'load.db')}"
+        )
+        # Budgets are installed at import time; non-strict mode only adds the header
+        os.environ.setdefault('QUERY_BUDGET_ENABLED', 'true')
+        app = datagen.load_app(database_url)
+        if not args.skip_datagen:
+            with app.app_context():
+                print(f"Generating {args.users} clients and {args.leads} leads in {database_url}")
+                datagen.generate(args.users, 3, args.leads)
+        server, base_url = start_local_server(app)
+    
+    print(f"Logging in {args.users} synthetic clients against {base_url}")
+    users = [
+        SyntheticUser(base_url, f'{datagen.BENCH_USER_PREFIX}{i}', datagen.BENCH_PASSWORD)
+        for i in range(args.users)
+    ]
+    
+    stats = LoadTestStats()
+    deadline = time.monotonic() + args.duration
+    print(f"Running {args.concurrency} workers for {args.duration:.0f}s")
+    started = time.perf_counter()
+    workers = [
+        threading.Thread(target=run_worker, args=(users, stats, deadline, args.seed + i), daemon=True)
+        for i in range(args.concurrency)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    
+    if server is not None:
+        server.shutdown()
+    
+    rows = stats.report(elapsed)
+    total = sum(row['requests'] for row in rows.values())
+    print()
+    print_report(rows)
+    print(f"\nTotal: {total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s) "
+          f"with {args.concurrency} workers and {args.users} users")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'environment': environment_info(),
+                'config': vars(args),
+                'total_requests': total,
+                'throughput_per_s': round(total / elapsed, 2),
+                'endpoints': rows
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,364 @@
+"""
+Lead pipeline benchmarks against local provider stand-ins
+
+Runs each scenario against a fake Apollo/Hunter/LinkedIn server and a
+synthetic SQLite (or DATABASE_URL) database, reports throughput and
+p50/p95/p99 latency, and compares with a saved baseline.
+    
+    python -m benchmarks.run_benchmarks --leads 10000 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --leads 10000 --baseline benchmarks/baseline.json
+
+Exits with status 1 when a scenario regresses beyond --tolerance.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_providers import FakeProviderServer, fake_person
+from benchmarks.harness import measure, print_table, save_results, compare_to_baseline
+from benchmarks import datagen
+
+# Campaigns run at once by the concurrent_campaigns scenarios (one per client)
+CONCURRENT_CAMPAIGNS = 6
+
+SEARCH_CONFIGS = [
+    {
+        'name': 'bench_consultants',
+        'person_titles': ['Consultant', 'Senior Consultant'],
+        'person_locations': ['Sydney, AU', 'Melbourne, AU'],
+        'organization_num_employees_ranges': ['11,50', '51,200']
+    },
+    {
+        'name': 'bench_directors',
+        'person_titles': ['Director', 'Managing Director'],
+        'person_locations': ['Brisbane, AU'],
+        'person_seniorities': ['director']
+    }
+]
+
+
+def _fast_service(service):
+    """Drop client-side throttling so the fake server's latency is what gets measured"""
+    service.rate_limit_delay = 0
+    service.rate_limit_retry_delay = 0.05
+    if hasattr(service, 'page_delay'):
+        service.page_delay = 0
+    if hasattr(service, 'search_cache'):
+        service.search_cache = None  # every iteration should hit the fake server
+    return service
+
+
+class BenchmarkContext:
+    """Shared state for scenarios: app, fake server, synthetic data and a session token"""
+    
+    def __init__(self, app, server, data):
+        self.app = app
+        self.server = server
+        self.client_ids = data['client_ids']
+        self.campaign_ids = data['campaign_ids']
+        self.http = app.test_client()
+        self._token = None
+    
+    def login(self, username=None):
+        response = self.http.post('/api/auth/login', json={
+            'username': username or f'{datagen.BENCH_USER_PREFIX}0',
+            'password': datagen.BENCH_PASSWORD
+        })
+        payload = response.get_json() or {}
+        if not payload.get('success'):
+            raise RuntimeError(f"Login failed: {payload.get('error')}")
+        return payload['session_token']
+    
+    @property
+    def token(self):
+        if self._token is None:
+            self._token = self.login()
+        return self._token
+    
+    def auth_headers(self):
+        return {'Authorization': f'Bearer {self.token}'}
+
+
+def scenario_apollo_bulk_search(ctx, iterations, size):
+    from src.services.apollo_service import ApolloService
+    
+    service = _fast_service(ApolloService('bench-apollo-key'))
+    
+    def run():
+        return len(service.bulk_search_leads(SEARCH_CONFIGS, max_leads=size))
+    
+    return measure(run, iterations)
+
+
+def scenario_hunter_bulk_enrich(ctx, iterations, size):
+    from src.services.enrichment_service import EnrichmentService
+    
+    service = _fast_service(EnrichmentService('bench-hunter-key'))
+    emails = [fake_person(i)['email'] for i in range(size)]
+    
+    def run():
+        return len(service.bulk_enrich_leads(emails))
+    
+    return measure(run, iterations)
+
+
+def scenario_linkedin_company_leads(ctx, iterations, size):
+    from src.services.linkedin_service import LinkedInService, LinkedInLeadGenService
+    
+    service = _fast_service(LinkedInService('bench-linkedin-id', 'bench-linkedin-secret', 'bench-linkedin-token'))
+    leadgen = LinkedInLeadGenService(service)
+    # Overlapping keywords: the fake search returns shifted windows of the same companies
+    keywords = ['consulting', 'consultancy', 'advisory', 'strategy']
+    
+    def run():
+        return sum(1 for _ in leadgen.iter_company_leads(keywords, max_companies=size))
+    
+    return measure(run, iterations)
+
+
+def scenario_run_campaign(ctx, iterations, size):
+    from src.services.lead_automation import LeadAutomationService
+    from src.models.campaign import LeadCampaign
+    from src.models.base import db
+    
+    ctx.server.state.fresh_results = True
+    client_id = ctx.client_ids[0]
+    campaign_id = next(
+        cid for cid in ctx.campaign_ids if db.session.get(LeadCampaign, cid).client_id == client_id
+    )
+    
+    def run():
+        service = LeadAutomationService('bench-apollo-key', 'bench-hunter-key')
+        _fast_service(service.apollo_service)
+        _fast_service(service.enrichment_service)
+        campaign = db.session.get(LeadCampaign, campaign_id)
+        # Cap each run through the target (reached targets complete the campaign,
+        # so reactivate it); the daily quota would stop repeat runs
+        campaign.status = 'active'
+        campaign.daily_limit = 1000000
+        campaign.leads_target = (campaign.leads_generated or 0) + size
+        result = service.run_campaign_for_client(campaign, client_id)
+        if not result.get('success'):
+            raise RuntimeError(result.get('error'))
+        return result.get('leads_generated', 0)
+    
+    try:
+        return measure(run, iterations)
+    finally:
+        ctx.server.state.fresh_results = False
+
+
+def _concurrent_campaigns(ctx, iterations, size, single_writer):
+    """Run one campaign per client at once while a reader polls the leads list"""
+    import threading
+    from src.services.lead_automation import LeadAutomationService
+    from src.services.db_writer import db_writer
+    from src.models.campaign import LeadCampaign
+    from src.models.base import db
+    
+    ctx.server.state.fresh_results = True
+    campaign_by_client = {}
+    for campaign_id in ctx.campaign_ids:
+        campaign = db.session.get(LeadCampaign, campaign_id)
+        campaign_by_client.setdefault(campaign.client_id, campaign_id)
+    pairs = list(campaign_by_client.items())[:CONCURRENT_CAMPAIGNS]
+    headers = ctx.auth_headers()
+    
+    def run_one(client_id, campaign_id, errors):
+        with ctx.app.app_context():
+            service = LeadAutomationService('bench-apollo-key', 'bench-hunter-key')
+            _fast_service(service.apollo_service)
+            _fast_service(service.enrichment_service)
+            campaign = db.session.get(LeadCampaign, campaign_id)
+            result = service.run_campaign_for_client(campaign, client_id)
+            if not result.get('success') or not result.get('leads_generated'):
+                errors.append(result.get('error') or 'no leads saved')
+    
+    def run():
+        # Reset targets up front so campaign threads only write through the pipeline
+        for client_id, campaign_id in pairs:
+            campaign = db.session.get(LeadCampaign, campaign_id)
+            campaign.status = 'active'
+            campaign.daily_limit = 1000000
+            campaign.leads_target = (campaign.leads_generated or 0) + size
+        db.session.commit()
+        
+        errors = []
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=run_one, args=(client_id, campaign_id, errors))
+            for client_id, campaign_id in pairs
+        ]
+        
+        def poll_leads():
+            while not stop.is_set():
+                ctx.app.test_client().get('/api/automation/leads?per_page=20', headers=headers)
+        
+        reader = threading.Thread(target=poll_leads)
+        reader.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stop.set()
+        reader.join()
+        if errors:
+            raise RuntimeError(f"{len(errors)}/{len(pairs)} campaigns failed: {errors[0]}")
+        return len(pairs) * size
+    
+    previous = db_writer.enabled
+    db_writer.enabled = single_writer
+    try:
+        return measure(run, iterations)
+    finally:
+        db_writer.enabled = previous
+        ctx.server.state.fresh_results = False
+
+
+def scenario_concurrent_campaigns(ctx, iterations, size):
+    return _concurrent_campaigns(ctx, iterations, size, single_writer=True)
+
+
+def scenario_concurrent_campaigns_direct(ctx, iterations, size):
+    """Same load with every campaign thread committing on its own connection"""
+    return _concurrent_campaigns(ctx, iterations, size, single_writer=False)
+
+
+def scenario_leads_endpoint(ctx, iterations, size):
+    headers = ctx.auth_headers()
+    pages = max(1, min(50, size // 20))
+    counter = {'page': 0}
+    
+    def run():
+        counter['page'] = counter['page'] % pages + 1
+        response = ctx.http.get(f"/api/automation/leads?page={counter['page']}&per_page=20", headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"status {response.status_code}")
+        return 1
+    
+    return measure(run, iterations, warmup=3)
+
+
+def scenario_login(ctx, iterations, size):
+    usernames = [f'{datagen.BENCH_USER_PREFIX}{i}' for i in range(len(ctx.client_ids))]
+    counter = {'i': 0}
+    
+    def run():
+        counter['i'] += 1
+        ctx.login(usernames[counter['i'] % len(usernames)])
+        return 1
+    
+    return measure(run, iterations)
+
+
+def scenario_session_validation(ctx, iterations, size):
+    from src.models.auth import get_client_by_session_token
+    
+    token = ctx.token
+    
+    def run():
+        if get_client_by_session_token(token) is None:
+            raise RuntimeError('session not valid')
+        return 1
+    
+    return measure(run, iterations, warmup=3)
+
+
+SCENARIOS = {
+    # name: (function, default iterations, size)
+    'apollo_bulk_search': (scenario_apollo_bulk_search, 5, 200),
+    'hunter_bulk_enrich': (scenario_hunter_bulk_enrich, 3, 50),
+    'linkedin_company_leads': (scenario_linkedin_company_leads, 5, 50),
+    'run_campaign': (scenario_run_campaign, 5, 25),
+    'concurrent_campaigns': (scenario_concurrent_campaigns, 3, 25),
+    'concurrent_campaigns_direct': (scenario_concurrent_campaigns_direct, 3, 25),
+    'leads_endpoint': (scenario_leads_endpoint, 200, 1000),
+    'login': (scenario_login, 20, 0),
+    'session_validation': (scenario_session_validation, 500, 0)
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lead pipeline benchmarks')
+    parser.add_argument('--database-url', help='Defaults to a fresh SQLite file in a temp directory')
+    parser.add_argument('--clients', type=int, default=10)
+    parser.add_argument('--leads', type=int, default=10000, help='Synthetic leads to generate (10k-1M)')
+    parser.add_argument('--skip-datagen', action='store_true', help='Reuse data already in --database-url')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma-separated scenario names')
+    parser.add_argument('--iterations', type=int, help='Override iterations for every scenario')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Fake provider latency')
+    parser.add_argument('--jitter-ms', type=float, default=5.0)
+    parser.add_argument('--rate-limit-every', type=int, default=0, help='Inject a 429 every N provider calls')
+    parser.add_argument('--output', help='Write results JSON here')
+    parser.add_argument('--baseline', help='Compare against this results JSON')
+    parser.add_argument('--save-baseline', help='Write results as a new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Allowed regression fraction')
+    args = parser.parse_args()
+    
+    selected = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in selected if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    
+    database_url = args.database_url
+    if not database_url:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='leadgen-bench-'), 'bench.db')}"
+    
+    server = FakeProviderServer(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_limit_every=args.rate_limit_every,
+        total_people=5000
+    ).start()
+    os.environ.update(server.env())
+    
+    app = datagen.load_app(database_url)
+    results = {}
+    try:
+        with app.app_context():
+            if args.skip_datagen:
+                data = datagen.generate(args.clients, 3, 0)
+            else:
+                print(f"Generating {args.clients} clients and {args.leads} leads in {database_url}")
+                data = datagen.generate(args.clients, 3, args.leads)
+            
+            ctx = BenchmarkContext(app, server, data)
+            for name in selected:
+                function, iterations, size = SCENARIOS[name]
+                print(f"Running {name}...")
+                results[name] = function(ctx, args.iterations or iterations, size)
+    finally:
+        server.stop()
+    
+    print()
+    print_table(results)
+    print(f"\nFake provider calls: {json.dumps(server.state.stats()['by_endpoint'])}")
+    
+    config = {
+        'database_url': database_url.split('@')[-1],
+        'clients': args.clients,
+        'leads': args.leads,
+        'latency_ms': args.latency_ms,
+        'rate_limit_every': args.rate_limit_every
+    }
+    if args.output:
+        save_results(args.output, results, config)
+    if args.save_baseline:
+        save_results(args.save_baseline, results, config)
+        print(f"Saved baseline to {args.save_baseline}")
+    
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+"""
+Static asset pipeline
+
+Build step (run before deploying):
+    
+    flask --app src.main build-assets      # or: python -m src.assets
+
+writes src/static/dist/ with
+- resized logo variants (IMAGE_WIDTHS) as PNG and WebP, content-hashed
+  (name.<width>.<hash>.png); requires Pillow, otherwise the original image
+  is copied under a hashed name
+- the HTML pages with /static/ references rewritten to the hashed files
+- .gz (and .br when the brotli package is installed) next to every text file
+- manifest.json mapping source names to hashed URLs
+
+At runtime, AssetIndex scans the static folder once at startup (preferring
+dist/ when it was built) and serves from that index: no filesystem stat per
+request. Hashed files are sent with a one-year immutable Cache-Control, HTML
+with no-cache plus an ETag so revisits get a 304. Precompressed variants are
+chosen from Accept-Encoding, and WebP from Accept for images that have one.
+"""
+
+import os
+import re
+import gzip
+import json
+import shutil
+import hashlib
+import mimetypes
+import threading
+from typing import Dict, Optional
+
+from flask import Response, request, abort
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), 'static')
+DIST_DIRNAME = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Widths to render per image; DEFAULT_IMAGE_WIDTH is what the pages reference.
+# The logo is displayed at most 200px wide, so 400px covers 2x screens.
+IMAGE_WIDTHS = {
+    'livewire_logo.png': (160, 400, 800)
+}
+DEFAULT_IMAGE_WIDTH = 400
+
+PAGE_EXTENSIONS = {'.html'}
+COMPRESSIBLE_EXTENSIONS = {'.html', '.css', '.js', '.json', '.svg', '.ico', '.txt'}
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+DEFAULT_CACHE = 'public, max-age=3600'
+
+_HASHED_NAME = re.compile(r'\.[0-9a-f]{10}\.\w+$')
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def _write_hashed(dist_dir: str, stem: str, ext: str, data: bytes) -> str:
+    """Write data as <stem>.<hash><ext> in dist_dir and return the file name"""
+    name = f"{stem}.{_content_hash(data)}{ext}"
+    with open(os.path.join(dist_dir, name), 'wb') as f:
+        f.write(data)
+    return name
+
+
+def _write_compressed(path: str, data: bytes):
+    """Write .gz (and .br when available) siblings of a text file"""
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+
+
+def _build_image_variants(source_path: str, dist_dir: str, widths) -> Dict:
+    """
+    Resize an image to each width as optimized PNG and WebP
+    
+    Returns:
+        Manifest entry with the default URL and per-width variants
+    """
+    stem, ext = os.path.splitext(os.path.basename(source_path))
+    try:
+        from PIL import Image
+    except ImportError:
+        print(f"Pillow not installed; copying {os.path.basename(source_path)} without resizing")
+        with open(source_path, 'rb') as f:
+            name = _write_hashed(dist_dir, stem, ext, f.read())
+        return {'url': f"/static/{DIST_DIRNAME}/{name}", 'variants': {}}
+    
+    import io
+    
+    variants = {}
+    with Image.open(source_path) as original:
+        for width in widths:
+            width = min(width, original.width)
+            height = round(original.height * width / original.width)
+            resized = original.resize((width, height), Image.LANCZOS)
+            
+            png = io.BytesIO()
+            resized.save(png, format='PNG', optimize=True)
+            webp = io.BytesIO()
+            resized.save(webp, format='WEBP', quality=85, method=6)
+            
+            variants[width] = {
+                'png': f"/static/{DIST_DIRNAME}/{_write_hashed(dist_dir, f'{stem}.{width}', '.png', png.getvalue())}",
+                'webp': f"/static/{DIST_DIRNAME}/{_write_hashed(dist_dir, f'{stem}.{width}', '.webp', webp.getvalue())}"
+            }
+    
+    default_width = min(variants, key=lambda width: abs(width - DEFAULT_IMAGE_WIDTH))
+    return {'url': variants[default_width]['png'], 'variants': variants}
+
+
+def build_assets(static_dir: str = STATIC_DIR) -> Dict:
+    """
+    Build hashed, resized and precompressed assets into static/dist
+    
+    Args:
+        static_dir: Source static folder
+    
+    Returns:
+        The manifest that was written
+    """
+    dist_dir = os.path.join(static_dir, DIST_DIRNAME)
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    os.makedirs(dist_dir)
+    
+    manifest = {'assets': {}, 'pages': []}
+    
+    for name, widths in IMAGE_WIDTHS.items():
+        source_path = os.path.join(static_dir, name)
+        if os.path.exists(source_path):
+            manifest['assets'][name] = _build_image_variants(source_path, dist_dir, widths)
+    
+    for name in sorted(os.listdir(static_dir)):
+        source_path = os.path.join(static_dir, name)
+        ext = os.path.splitext(name)[1].lower()
+        if not os.path.isfile(source_path) or ext not in PAGE_EXTENSIONS:
+            continue
+        
+        with open(source_path, encoding='utf-8') as f:
+            html = f.read()
+        for asset_name, entry in manifest['assets'].items():
+            html = html.replace(f"/static/{asset_name}", entry['url'])
+        
+        data = html.encode('utf-8')
+        page_path = os.path.join(dist_dir, name)
+        with open(page_path, 'wb') as f:
+            f.write(data)
+        _write_compressed(page_path, data)
+        manifest['pages'].append(name)
+    
+    # Text assets referenced by fixed URLs (favicon) get compressed copies only
+    for name in sorted(os.listdir(static_dir)):
+        source_path = os.path.join(static_dir, name)
+        ext = os.path.splitext(name)[1].lower()
+        if os.path.isfile(source_path) and ext in COMPRESSIBLE_EXTENSIONS - PAGE_EXTENSIONS:
+            shutil.copyfile(source_path, os.path.join(dist_dir, name))
+            with open(source_path, 'rb') as f:
+                _write_compressed(os.path.join(dist_dir, name), f.read())
+    
+    with open(os.path.join(dist_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    
+    return manifest
+
+
+class AssetIndex:
+    """
+    In-memory index of servable static files
+    
+    Maps request paths to file metadata at startup; file contents are read on
+    first use and kept in memory.
+    """
+    
+    def __init__(self, static_dir: str = STATIC_DIR):
+        self.static_dir = static_dir
+        self.entries = {}
+        self.manifest = None
+        self._lock = threading.Lock()
+        self._cache = {}
+    
+    def load(self):
+        """Scan the static folder (and dist/, which overrides it) once"""
+        entries = {}
+        if os.path.isdir(self.static_dir):
+            for name in os.listdir(self.static_dir):
+                path = os.path.join(self.static_dir, name)
+                if os.path.isfile(path):
+                    entry = self._entry(path, name)
+                    entries[name] = entry
+                    entries[f"static/{name}"] = entry
+        
+        dist_dir = os.path.join(self.static_dir, DIST_DIRNAME)
+        manifest_path = os.path.join(dist_dir, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+            for name in os.listdir(dist_dir):
+                path = os.path.join(dist_dir, name)
+                if name == MANIFEST_NAME or name.endswith(('.gz', '.br')) or not os.path.isfile(path):
+                    continue
+                entry = self._entry(path, name)
+                entries[f"static/{DIST_DIRNAME}/{name}"] = entry
+                if name in entries or name in self.manifest.get('pages', []):
+                    # Built pages and compressed copies replace the source files
+                    entries[name] = entry
+                    entries[f"static/{name}"] = entry
+            
+            # Pair each PNG variant with its WebP sibling
+            for asset in self.manifest.get('assets', {}).values():
+                for variant in asset.get('variants', {}).values():
+                    png = entries.get(variant['png'].lstrip('/'))
+                    if png is not None and variant.get('webp'):
+                        png['webp'] = variant['webp'].lstrip('/')
+        
+        self.entries = entries
+        return self
+    
+    def _entry(self, path: str, name: str) -> Dict:
+        stat = os.stat(path)
+        ext = os.path.splitext(name)[1].lower()
+        if _HASHED_NAME.search(name):
+            cache_control = IMMUTABLE_CACHE
+        elif ext in PAGE_EXTENSIONS:
+            cache_control = REVALIDATE_CACHE
+        else:
+            cache_control = DEFAULT_CACHE
+        
+        encodings = {}
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if os.path.exists(path + suffix):
+                encodings[encoding] = path + suffix
+        
+        return {
+            'path': path,
+            'mimetype': mimetypes.guess_type(name)[0] or 'application/octet-stream',
+            'etag': f"{stat.st_size:x}-{int(stat.st_mtime * 1000):x}",
+            'cache_control': cache_control,
+            'encodings': encodings,
+            'webp': None
+        }
+    
+    def _read(self, path: str) -> bytes:
+        data = self._cache.get(path)
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+            with self._lock:
+                self._cache[path] = data
+        return data
+    
+    def get(self, path: str) -> Optional[Dict]:
+        return self.entries.get(path)
+    
+    def send(self, entry: Dict) -> Response:
+        """Response for an entry, negotiating WebP and precompressed encodings"""
+        vary = []
+        if entry['webp']:
+            vary.append('Accept')
+            if request.accept_mimetypes.quality('image/webp') > 0:
+                entry = self.entries.get(entry['webp'], entry)
+        
+        encoding = None
+        if entry['encodings']:
+            vary.append('Accept-Encoding')
+            for candidate in ('br', 'gzip'):
+                if candidate in entry['encodings'] and request.accept_encodings.quality(candidate) > 0:
+                    encoding = candidate
+                    break
+        
+        path = entry['encodings'][encoding] if encoding else entry['path']
+        response = Response(self._read(path), mimetype=entry['mimetype'])
+        response.set_etag(f"{entry['etag']}-{encoding}" if encoding else entry['etag'])
+        response.headers['Cache-Control'] = entry['cache_control']
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        for header in vary:
+            response.vary.add(header)
+        return response.make_conditional(request)
+
+
+def init_assets(app, static_dir: str = STATIC_DIR) -> AssetIndex:
+    """
+    Index the static folder and register the static/SPA routes
+    
+    Unknown paths fall back to index.html for SPA routing, except under
+    /static/ where they are a 404.
+    """
+    index = AssetIndex(static_dir).load()
+    app.extensions['asset_index'] = index
+    
+    @app.route('/static/<path:filename>', endpoint='static')
+    def static_file(filename):
+        entry = index.get(f"static/{filename}")
+        if entry is None:
+            abort(404)
+        return index.send(entry)
+    
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        """Serve static files and SPA routing"""
+        entry = index.get(path) if path else None
+        if entry is None:
+            entry = index.get('index.html')
+            if entry is None:
+                return "index.html not found", 404
+        return index.send(entry)
+    
+    return index
+
+
+if __name__ == '__main__':
+    built = build_assets()
+    print(f"✅ Built {len(built['assets'])} image assets and {len(built['pages'])} pages")
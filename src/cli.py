@@ -0,0 +1,77 @@
+"""
+Database, admin and static asset build commands
+
+Schema creation and the default admin account are explicit steps, not part
+of app construction, so cold starts never touch the database:
+    
+    flask --app src.main init-db
+    flask --app src.main create-admin --username admin --password <password>
+    flask --app src.main build-assets
+    flask --app src.main refresh-linkedin-tokens   (from one scheduled job)
+
+`python src/main.py` (local development) runs both before starting the server.
+"""
+
+import click
+
+from src.models.base import db
+
+
+def init_database():
+    """Create any missing tables (requires an app context)"""
+    # Import every model so its table is registered on the shared metadata
+    from src.models import user, lead, auth, campaign, api_call, linkedin_company
+    
+    db.create_all()
+
+
+def ensure_admin_user(username='admin', email='admin@leadai.com', password='admin123'):
+    """
+    Create the default admin if no admin exists (requires an app context)
+    
+    Returns:
+        The created Client, or None if an admin already existed
+    """
+    from src.models.auth import Client, create_admin_user
+    
+    if Client.query.filter_by(is_admin=True).first():
+        return None
+    return create_admin_user(username, email, password)
+
+
+def register_cli(app):
+    """Register the bootstrap commands on the Flask CLI"""
+    
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create database tables."""
+        init_database()
+        click.echo('✅ Database tables created')
+    
+    @app.cli.command('create-admin')
+    @click.option('--username', default='admin')
+    @click.option('--email', default='admin@leadai.com')
+    @click.option('--password', default='admin123')
+    def create_admin_command(username, email, password):
+        """Create the default admin user if no admin exists."""
+        init_database()
+        if ensure_admin_user(username, email, password):
+            click.echo(f'✅ Created admin user: {username}')
+        else:
+            click.echo('Admin user already exists')
+    
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Build hashed, resized and precompressed static assets into static/dist."""
+        from src.assets import build_assets
+        
+        manifest = build_assets()
+        click.echo(f"✅ Built {len(manifest['assets'])} image assets and {len(manifest['pages'])} pages")
+    
+    @app.cli.command('refresh-linkedin-tokens')
+    def refresh_linkedin_tokens_command():
+        """Refresh LinkedIn access tokens that expire soon."""
+        from src.services.linkedin_tokens import linkedin_token_refresher
+        
+        result = linkedin_token_refresher.refresh_due()
+        click.echo(f"✅ Refreshed {result['refreshed']} LinkedIn tokens ({result['failed']} failed)")
@@ -3,108 +3,163 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory, jsonify
-from flask_cors import CORS
+from flask import Flask, jsonify
 
-# Import all models to ensure they're registered
-from src.models.user import db as user_db
-from src.models.lead import db as lead_db
-from src.models.auth import db as auth_db, create_admin_user, Client
-from src.models.campaign import db as campaign_db
+DEFAULT_DATABASE_URL = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
 
-# Import routes
-from src.routes.user import user_bp
-from src.routes.automation import automation_bp
-from src.routes.auth import auth_bp
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-
-# Configuration
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'leadai-secret-key-change-in-production')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}")
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Enable CORS for all routes with credentials support
-CORS(app, origins="*", supports_credentials=True)
-
-# Initialize database with all models
-auth_db.init_app(app)
-user_db.init_app(app)
-lead_db.init_app(app)
-campaign_db.init_app(app)
-
-# Use auth_db as the main database instance
-db = auth_db
-
-# Register blueprints
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(automation_bp, url_prefix='/api/automation')
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-
-# Create all database tables and initialize data
-with app.app_context():
-    db.create_all()
-    
-    # Create default admin user if none exists
-    admin_exists = Client.query.filter_by(is_admin=True).first()
-    if not admin_exists:
-        create_admin_user()
-        print("✅ Created default admin user: admin / admin123")
-        print("🔗 Login at: http://localhost:5000/login")
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    """Serve static files and SPA routing"""
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-        return "Static folder not configured", 404
+def create_app(config=None):
+    """
+    Build the Flask app
+    
+    Construction only wires configuration, extensions and routes: no database
+    connection, schema creation or admin bootstrap happens here (see
+    src/cli.py), and provider services are imported by the views that use
+    them, so a cold start costs Flask, SQLAlchemy and the route modules.
+    
+    Args:
+        config: Optional dictionary of config overrides (applied before extensions)
+    
+    Returns:
+        Configured Flask app
+    """
+    from flask_cors import CORS
+    from src.models.base import init_db
+    from src.services.call_ledger import call_ledger
+    from src.services.db_writer import db_writer
+    from src.services.linkedin_tokens import linkedin_token_refresher
+    from src.middleware.instrumentation import init_instrumentation
+    from src.middleware.query_budget import init_query_budget
+    from src.middleware.read_replica import init_read_replica
+    from src.middleware.http_cache import init_http_cache
+    from src.routes.user import user_bp
+    from src.routes.automation import automation_bp
+    from src.routes.auth import auth_bp
+    from src.cli import register_cli
+    from src.assets import init_assets
+    
+    # Static files are served by src/assets.py (hashed dist/ build, cache headers)
+    app = Flask(__name__, static_folder=None)
+    
+    # Configuration
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'leadai-secret-key-change-in-production')
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URL)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if config:
+        app.config.update(config)
+    
+    # Enable CORS for all routes with credentials support
+    CORS(app, origins="*", supports_credentials=True)
+    
+    # Single engine and pool for all models (pool sizing, pre-ping, SQLite WAL)
+    init_db(app)
+    
+    # Route read-only views to REPLICA_DATABASE_URL when one is configured
+    init_read_replica(app)
+    
+    # Provider API call ledger (background batched writer)
+    call_ledger.init_app(app)
+    
+    # Single writer thread for pipeline writes (default on for SQLite, DB_SINGLE_WRITER)
+    db_writer.init_app(app)
+    
+    # Background LinkedIn token refresh, opt-in for single-process deployments (LINKEDIN_TOKEN_REFRESH)
+    linkedin_token_refresher.init_app(app)
+    
+    # Request timing, /metrics and Server-Timing (INSTRUMENTATION_ENABLED=1)
+    init_instrumentation(app)
+    
+    # Per-route query budgets and N+1 warnings (debug/testing or QUERY_BUDGET_ENABLED)
+    init_query_budget(app)
+    
+    # JSON gzip/brotli compression and ETags for polled list endpoints
+    init_http_cache(app)
+    
+    # Register blueprints
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(automation_bp, url_prefix='/api/automation')
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    
+    # flask init-db / create-admin
+    register_cli(app)
+    
+    # Opt-in for throwaway databases (e.g. SQLite in /tmp) that nobody migrates
+    if str(app.config.get('AUTO_INIT_DB', os.environ.get('AUTO_INIT_DB', ''))).lower() in ('1', 'true', 'yes'):
+        from src.cli import init_database, ensure_admin_user
+        with app.app_context():
+            init_database()
+            ensure_admin_user()
+    
+    # Static files and SPA routing from an index built once at startup
+    init_assets(app)
+    
+    register_core_routes(app)
+    
+    return app
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
 
-@app.route('/health')
-def health():
-    """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'service': 'LeadAI Automation Backend',
-        'version': '2.0.0',
-        'features': ['authentication', 'linkedin_integration', 'multi_client']
-    })
+def register_core_routes(app):
+    """Health and API status"""
+    
+    @app.route('/health')
+    def health():
+        """Health check endpoint"""
+        return jsonify({
+            'status': 'healthy',
+            'service': 'LeadAI Automation Backend',
+            'version': '2.0.0',
+            'features': ['authentication', 'linkedin_integration', 'multi_client']
+        })
+    
+    @app.route('/api/status')
+    def api_status():
+        """API status endpoint"""
+        return jsonify({
+            'success': True,
+            'service': 'LeadAI Automation API',
+            'version': '2.0.0',
+            'endpoints': {
+                'authentication': '/api/auth/*',
+                'automation': '/api/automation/*',
+                'users': '/api/users/*'
+            },
+            'features': {
+                'client_authentication': True,
+                'linkedin_integration': True,
+                'apollo_integration': True,
+                'hunter_integration': True,
+                'campaign_management': True,
+                'admin_panel': True
+            }
+        })
+
+
+_app = None
+
+
+def __getattr__(name):
+    """Build the module-level `app` on first access (src.main.app for WSGI servers)"""
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-@app.route('/api/status')
-def api_status():
-    """API status endpoint"""
-    return jsonify({
-        'success': True,
-        'service': 'LeadAI Automation API',
-        'version': '2.0.0',
-        'endpoints': {
-            'authentication': '/api/auth/*',
-            'automation': '/api/automation/*',
-            'users': '/api/users/*'
-        },
-        'features': {
-            'client_authentication': True,
-            'linkedin_integration': True,
-            'apollo_integration': True,
-            'hunter_integration': True,
-            'campaign_management': True,
-            'admin_panel': True
-        }
-    })
 
 if __name__ == '__main__':
+    from src.cli import init_database, ensure_admin_user
+    
+    app = create_app()
+    
+    # Local development: create tables and the default admin up front
+    with app.app_context():
+        init_database()
+        if ensure_admin_user():
+            print("✅ Created default admin user: admin / admin123")
+    
     print("🚀 Starting LeadAI Automation Backend...")
     print("📊 Dashboard: http://localhost:5000")
     print("🔐 Admin Login: admin / admin123")
     print("📖 API Docs: http://localhost:5000/api/status")
     app.run(host='0.0.0.0', port=5000, debug=True)
-
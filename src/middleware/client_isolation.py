@@ -11,6 +11,7 @@ from sqlalchemy import and_
 from src.models.auth import Client, get_client_by_session_token
 from src.models.lead import Lead
 from src.models.campaign import LeadCampaign
+from src.middleware.instrumentation import span
 
 
 class ClientIsolationError(Exception):
@@ -32,7 +33,8 @@ def get_current_client():
         session_token = request.cookies.get('session_token')
     
     if session_token:
-        client = get_client_by_session_token(session_token)
+        with span('auth'):
+            client = get_client_by_session_token(session_token)
         if client:
             request.current_client = client
             return client
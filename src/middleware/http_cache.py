@@ -0,0 +1,140 @@
+"""
+HTTP Compression and Conditional GET Middleware
+
+JSON responses larger than COMPRESS_MIN_SIZE bytes are compressed with
+brotli (when the brotli package is installed) or gzip, according to the
+request's Accept-Encoding. Responses that already carry a Content-Encoding
+(precompressed static files) are left alone.
+
+Polled list endpoints can skip the query and serialization when nothing
+changed. The view computes a cheap fingerprint of its data (client id, row
+count, max updated_at, filters) and calls conditional_get() before doing
+the real work:
+    
+    not_modified = conditional_get(client.id, count, last_updated, request.args)
+    if not_modified is not None:
+        return not_modified
+
+A matching If-None-Match gets an empty 304; otherwise the response is sent
+with that ETag. Row count is part of the fingerprint so deletes change it too.
+"""
+
+import os
+import gzip
+import hashlib
+from flask import request, g, make_response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this are not worth compressing
+DEFAULT_COMPRESS_MIN_SIZE = 1024
+
+# Dynamic responses: favour speed over ratio
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_MIMETYPES = {'application/json'}
+
+_config = {'min_size': DEFAULT_COMPRESS_MIN_SIZE}
+
+
+def _env_flag(name, default='true'):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+
+def data_etag(*parts) -> str:
+    """Stable ETag value for a tuple of fingerprint parts"""
+    key = []
+    for part in parts:
+        if hasattr(part, 'items'):
+            part = sorted(part.items(multi=True) if hasattr(part, 'getlist') else part.items())
+        key.append(repr(part))
+    return hashlib.sha1('|'.join(key).encode('utf-8')).hexdigest()[:20]
+
+
+def conditional_get(*parts):
+    """
+    Check If-None-Match against the fingerprint of the data a view would return
+    
+    Args:
+        parts: Values that change whenever the response would (client id,
+            row count, max updated_at, request args)
+    
+    Returns:
+        A 304 response if the client's copy is current, otherwise None (the
+        ETag is attached to the view's response after it runs)
+    """
+    etag = data_etag(*parts)
+    g._data_etag = etag
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+        _set_validators(response, etag)
+        return response
+    return None
+
+
+def _set_validators(response, etag):
+    # Weak: the same data is sent identity, gzip or br encoded
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Authorization')
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted.quality('br') > 0:
+        return 'br'
+    if accepted.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+
+def compress_response(response):
+    """Compress a JSON response in place if the client accepts it"""
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < _config['min_size']:
+        return response
+    
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+    
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(data, compresslevel=GZIP_LEVEL)
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_http_cache(app):
+    """
+    Register JSON compression and ETag handling
+    
+    Compression is on unless HTTP_COMPRESSION is false; COMPRESS_MIN_SIZE sets
+    the size threshold (config or environment).
+    """
+    _config['min_size'] = int(app.config.get(
+        'COMPRESS_MIN_SIZE', os.environ.get('COMPRESS_MIN_SIZE', DEFAULT_COMPRESS_MIN_SIZE)
+    ))
+    compression = app.config.get('HTTP_COMPRESSION', _env_flag('HTTP_COMPRESSION'))
+    
+    @app.after_request
+    def http_cache_headers(response):
+        etag = g.get('_data_etag')
+        if etag and response.status_code == 200:
+            _set_validators(response, etag)
+        if compression:
+            compress_response(response)
+        return response
@@ -0,0 +1,285 @@
+"""
+Request Instrumentation Middleware
+
+Records where request time goes: per-request spans for ORM queries (via
+SQLAlchemy engine events), outbound provider calls (via the call ledger),
+client authentication and to_dict serialization. Aggregates are exposed as
+Prometheus text on /metrics, and each response can carry a Server-Timing
+header. /metrics requires METRICS_TOKEN as a bearer token or an admin
+session; without a token configured it is only open in debug mode.
+
+Enabled with INSTRUMENTATION_ENABLED=1. When disabled, init_instrumentation()
+installs no hooks and span() returns a shared no-op context manager.
+"""
+
+import os
+import hmac
+import time
+import threading
+from collections import defaultdict
+from flask import request, g, has_request_context, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.services.call_ledger import call_ledger
+
+# Histogram buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    'http_requests_total': ('counter', 'HTTP requests handled'),
+    'http_request_duration_seconds': ('histogram', 'HTTP request wall time'),
+    'db_queries_total': ('counter', 'SQL statements executed'),
+    'db_query_duration_seconds': ('histogram', 'SQL statement execution time'),
+    'provider_requests_total': ('counter', 'Outbound provider API requests'),
+    'provider_request_duration_seconds': ('histogram', 'Outbound provider API request time'),
+    'span_duration_seconds': ('histogram', 'Instrumented span time (auth, serialize)')
+}
+
+_enabled = False
+
+
+def _env_flag(name, default='false'):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms rendered in Prometheus text format"""
+    
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._histograms = {}
+    
+    def inc(self, name, labels=(), value=1):
+        with self._lock:
+            self._counters[(name, labels)] += value
+    
+    def observe(self, name, labels, value):
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += value
+            histogram[2] += 1
+    
+    @staticmethod
+    def _format_labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ''
+        escaped = ('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in pairs)
+        return '{' + ','.join(escaped) + '}'
+    
+    def render(self):
+        """Render all metrics in Prometheus text exposition format"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(h[0]), h[1], h[2]) for key, h in self._histograms.items()}
+        
+        lines = []
+        for name, (metric_type, help_text) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            if metric_type == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{self._format_labels(labels)} {value:g}')
+            else:
+                for (metric, labels), (bucket_counts, total, count) in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, bucket_count in zip(self.buckets, bucket_counts):
+                        lines.append(f'{name}_bucket{self._format_labels(labels, [("le", f"{bound:g}")])} {bucket_count}')
+                    lines.append(f'{name}_bucket{self._format_labels(labels, [("le", "+Inf")])} {count}')
+                    lines.append(f'{name}_sum{self._format_labels(labels)} {total:.6f}')
+                    lines.append(f'{name}_count{self._format_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+
+class RequestTimings:
+    """Span totals for the current request"""
+    
+    __slots__ = ('started', 'durations', 'counts')
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+    
+    def add(self, name, seconds):
+        self.durations[name] += seconds
+        self.counts[name] += 1
+    
+    def server_timing(self, total):
+        """Format spans as a Server-Timing header value"""
+        parts = []
+        for name, seconds in self.durations.items():
+            parts.append(f'{name};dur={seconds * 1000:.1f};desc="{self.counts[name]}x"')
+        parts.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(parts)
+
+
+def _current_timings():
+    # Provider calls from pipeline worker threads have no request context and
+    # only feed the global metrics
+    if has_request_context():
+        return g.get('_request_timings')
+    return None
+
+
+class _NullSpan:
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'started')
+    
+    def __init__(self, name):
+        self.name = name
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        metrics.observe('span_duration_seconds', (('span', self.name),), elapsed)
+        timings = _current_timings()
+        if timings is not None:
+            timings.add(self.name, elapsed)
+        return False
+
+
+def span(name):
+    """
+    Time a block as a named span of the current request
+    
+    Usage:
+        with span('serialize'):
+            payload = [lead.to_dict() for lead in leads]
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('_query_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    metrics.inc('db_queries_total')
+    metrics.observe('db_query_duration_seconds', (), elapsed)
+    timings = _current_timings()
+    if timings is not None:
+        timings.add('db', elapsed)
+
+
+def _on_provider_call(provider, endpoint, status_code, latency_ms):
+    seconds = (latency_ms or 0.0) / 1000
+    status = str(status_code) if status_code is not None else 'error'
+    metrics.inc('provider_requests_total', (('provider', provider), ('status', status)))
+    metrics.observe('provider_request_duration_seconds', (('provider', provider), ('endpoint', endpoint)), seconds)
+    timings = _current_timings()
+    if timings is not None:
+        timings.add(provider, seconds)
+
+
+def _after_request(response):
+    timings = g.get('_request_timings')
+    if timings is None:
+        return response
+    
+    total = time.perf_counter() - timings.started
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    metrics.inc('http_requests_total', (
+        ('method', request.method), ('endpoint', endpoint), ('status', str(response.status_code))
+    ))
+    metrics.observe('http_request_duration_seconds', (('endpoint', endpoint),), total)
+    
+    if g.get('_server_timing_enabled'):
+        response.headers['Server-Timing'] = timings.server_timing(total)
+    return response
+
+
+def _metrics_authorized(app, metrics_token):
+    """True for the metrics token, an admin session, or anyone in debug mode without a token"""
+    from src.middleware.client_isolation import get_current_client
+    
+    if metrics_token:
+        if hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {metrics_token}'):
+            return True
+    elif app.debug:
+        return True
+    
+    client = get_current_client()
+    return client is not None and client.is_admin
+
+
+def init_instrumentation(app):
+    """
+    Install request instrumentation on a Flask app if enabled
+    
+    Config (or environment):
+        INSTRUMENTATION_ENABLED: turn instrumentation on
+        INSTRUMENTATION_SERVER_TIMING: emit Server-Timing headers (default on)
+        METRICS_TOKEN: bearer token for /metrics scrapers (admins can always
+            read it; without a token it is open only in debug mode)
+    
+    Returns:
+        True if instrumentation was installed
+    """
+    global _enabled
+    
+    enabled = app.config.get('INSTRUMENTATION_ENABLED', _env_flag('INSTRUMENTATION_ENABLED'))
+    if not enabled:
+        return False
+    
+    server_timing = app.config.get(
+        'INSTRUMENTATION_SERVER_TIMING', _env_flag('INSTRUMENTATION_SERVER_TIMING', 'true')
+    )
+    metrics_token = app.config.get('METRICS_TOKEN', os.environ.get('METRICS_TOKEN'))
+    
+    if not _enabled:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        call_ledger.add_listener(_on_provider_call)
+        _enabled = True
+    
+    @app.before_request
+    def start_request_timings():
+        g._request_timings = RequestTimings()
+        g._server_timing_enabled = server_timing
+    
+    app.after_request(_after_request)
+    
+    @app.route('/metrics')
+    def prometheus_metrics():
+        """Prometheus text metrics"""
+        if not _metrics_authorized(app, metrics_token):
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+    
+    print("📈 Request instrumentation enabled (/metrics)")
+    return True
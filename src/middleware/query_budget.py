@@ -0,0 +1,192 @@
+"""
+ORM Query Budget Middleware
+
+Development/test-mode query counting. Every request gets a query budget
+(ROUTE_QUERY_BUDGETS, falling back to DEFAULT_QUERY_BUDGET) and identical
+statements repeated within one request are flagged as likely N+1 lazy loads.
+In testing mode (or with QUERY_BUDGET_STRICT) violations raise instead of
+being logged, so a regression fails the request.
+
+assert_max_queries(n) gives the same check around any block of code:
+    
+    with assert_max_queries(3):
+        client.get('/api/automation/leads', headers=auth_headers)
+"""
+
+import os
+import re
+import threading
+from contextlib import contextmanager
+from collections import Counter
+from flask import request, g
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Queries allowed per request unless the endpoint is listed below
+DEFAULT_QUERY_BUDGET = 10
+
+# Per-endpoint budgets (blueprint.function). None disables the budget for
+# batch endpoints whose query count scales with the work requested.
+ROUTE_QUERY_BUDGETS = {
+    'automation.get_automation_status': 12,
+    'automation.get_leads': 6,
+    'automation.get_campaigns': 5,
+    'automation.generate_leads': None,
+    'automation.linkedin_search': None,
+    'automation.enrich_linkedin_leads': None,
+    'automation.get_duplicate_leads': None,
+    'automation.merge_duplicate_leads': None,
+    'automation.rescore_leads': None,
+    'automation.run_campaign': None,
+    'auth.get_all_clients': 6,
+    'auth.get_api_usage': None
+}
+
+# An identical statement executed this many times in one request is flagged
+REPEATED_STATEMENT_THRESHOLD = 5
+
+_WHITESPACE = re.compile(r'\s+')
+
+_local = threading.local()
+_listening = False
+_listen_lock = threading.Lock()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block or request runs more queries than its budget"""
+    pass
+
+
+class QueryCounter:
+    """Statements executed on the current thread while the counter is active"""
+    
+    def __init__(self):
+        self.statements = []
+    
+    @property
+    def count(self):
+        return len(self.statements)
+    
+    def repeated(self, threshold=REPEATED_STATEMENT_THRESHOLD):
+        """Statements executed at least threshold times, most frequent first"""
+        counts = Counter(self.statements)
+        return [(statement, n) for statement, n in counts.most_common() if n >= threshold]
+    
+    def report(self, limit=5):
+        """Short summary of the most executed statements"""
+        lines = [f"{self.count} queries"]
+        for statement, n in Counter(self.statements).most_common(limit):
+            lines.append(f"  {n}x {statement[:200]}")
+        return '\n'.join(lines)
+
+
+def _on_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counters = getattr(_local, 'counters', None)
+    if counters:
+        statement = _WHITESPACE.sub(' ', statement).strip()
+        for counter in counters:
+            counter.statements.append(statement)
+
+
+def _ensure_listening():
+    global _listening
+    if _listening:
+        return
+    with _listen_lock:
+        if not _listening:
+            event.listen(Engine, 'before_cursor_execute', _on_cursor_execute)
+            _listening = True
+
+
+def _push_counter():
+    _ensure_listening()
+    counter = QueryCounter()
+    if not hasattr(_local, 'counters'):
+        _local.counters = []
+    _local.counters.append(counter)
+    return counter
+
+
+def _pop_counter(counter):
+    counters = getattr(_local, 'counters', [])
+    if counter in counters:
+        counters.remove(counter)
+
+
+@contextmanager
+def count_queries():
+    """Count statements executed on this thread inside the block"""
+    counter = _push_counter()
+    try:
+        yield counter
+    finally:
+        _pop_counter(counter)
+
+
+@contextmanager
+def assert_max_queries(n):
+    """
+    Fail if the block executes more than n statements
+    
+    Args:
+        n: Maximum number of statements allowed
+    
+    Raises:
+        QueryBudgetExceeded: With the most executed statements in the message
+    """
+    with count_queries() as counter:
+        yield counter
+    if counter.count > n:
+        raise QueryBudgetExceeded(f"Expected at most {n} queries, got {counter.report()}")
+
+
+def init_query_budget(app):
+    """
+    Check per-request query budgets in development and testing
+    
+    Enabled when app.debug (FLASK_DEBUG) or app.testing is set, or with
+    QUERY_BUDGET_ENABLED in the config or environment.
+    Adds an X-Query-Count header to every response while enabled.
+    
+    Returns:
+        True if the checks were installed
+    """
+    enabled = app.config.get(
+        'QUERY_BUDGET_ENABLED',
+        app.debug or app.testing or os.environ.get('QUERY_BUDGET_ENABLED', '').lower() in ('1', 'true', 'yes')
+    )
+    if not enabled:
+        return False
+    
+    strict = app.config.get('QUERY_BUDGET_STRICT', app.testing)
+    
+    @app.before_request
+    def start_query_count():
+        g._query_counter = _push_counter()
+    
+    @app.after_request
+    def check_query_budget(response):
+        counter = g.pop('_query_counter', None)
+        if counter is None:
+            return response
+        _pop_counter(counter)
+        
+        endpoint = request.endpoint or 'unmatched'
+        response.headers['X-Query-Count'] = str(counter.count)
+        
+        problems = []
+        budget = ROUTE_QUERY_BUDGETS.get(endpoint, DEFAULT_QUERY_BUDGET)
+        if budget is not None and counter.count > budget:
+            problems.append(f"{endpoint} ran {counter.count} queries (budget {budget})")
+        for statement, n in counter.repeated():
+            problems.append(f"{endpoint} possible N+1: {n}x {statement[:200]}")
+        
+        if problems:
+            if strict:
+                raise QueryBudgetExceeded('\n'.join(problems + [counter.report()]))
+            for problem in problems:
+                print(f"⚠️  Query budget: {problem}")
+        
+        return response
+    
+    return True
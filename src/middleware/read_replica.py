@@ -0,0 +1,141 @@
+"""
+Read Replica Routing Middleware
+
+Views decorated with @read_replica send their SELECTs to the replica engine
+(REPLICA_DATABASE_URL); authentication, writes and every other view stay on
+the primary. Decorate below the auth decorators so the session lookup and its
+last_activity write run against the primary:
+    
+    @automation_bp.route('/leads', methods=['GET'])
+    @require_client_isolation
+    @read_replica
+    def get_leads():
+        ...
+
+Read-your-writes: after a client's own write (any successful POST/PUT/PATCH/
+DELETE, or a flush inside a request), that client's reads stay on the primary
+for REPLICA_STICKY_SECONDS so replication lag never hides the change. A flush
+in the middle of a replica-routed view also moves the rest of that request
+back to the primary. The time of the last write travels with the client in a
+cookie signed with the app's SECRET_KEY, so stickiness holds whichever
+process serves the next request.
+"""
+
+import os
+import math
+from functools import wraps
+from itertools import chain
+from flask import request, g, current_app, has_request_context
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+from sqlalchemy import event
+
+from src.models.base import RoutingSession, REPLICA_BIND_KEY
+
+# Seconds a client's reads stay on the primary after it writes
+DEFAULT_STICKY_SECONDS = 5.0
+
+# Writes to these tables are bookkeeping, not data the client reads back
+STICKY_IGNORED_TABLES = {'client_sessions', 'api_call_logs', 'linkedin_companies', 'linkedin_company_names'}
+
+WRITE_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+
+# Signed cookie holding the client that last wrote (timestamped by the signer)
+STICKY_COOKIE = 'db_last_write'
+
+_config = {'enabled': False, 'sticky_seconds': DEFAULT_STICKY_SECONDS}
+
+
+def _current_client_id():
+    client_id = g.get('current_client_id')
+    if client_id is None and getattr(request, 'current_client', None) is not None:
+        client_id = request.current_client.id
+    return client_id
+
+
+def _sticky_serializer():
+    return URLSafeTimedSerializer(current_app.secret_key, salt='read-replica-sticky')
+
+
+def note_client_write(response, client_id):
+    """Keep this client's reads on the primary for the sticky window"""
+    if client_id is None:
+        return
+    response.set_cookie(
+        STICKY_COOKIE, _sticky_serializer().dumps(client_id),
+        max_age=math.ceil(_config['sticky_seconds']),
+        httponly=True, secure=request.is_secure, samesite='Lax'
+    )
+
+
+def recently_wrote(client_id) -> bool:
+    """True if the request carries this client's write from within the sticky window"""
+    if client_id is None:
+        return False
+    token = request.cookies.get(STICKY_COOKIE)
+    if not token:
+        return False
+    try:
+        # Expired and tampered cookies both raise BadSignature
+        written_by = _sticky_serializer().loads(token, max_age=_config['sticky_seconds'])
+    except BadSignature:
+        return False
+    return written_by == client_id
+
+
+def read_replica(f):
+    """Decorator routing a read-only view's SELECTs to the read replica"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not _config['enabled'] or recently_wrote(_current_client_id()):
+            return f(*args, **kwargs)
+        
+        g._replica_reads = True
+        g._replica_routed = True
+        try:
+            return f(*args, **kwargs)
+        finally:
+            g._replica_reads = False
+    
+    return decorated_function
+
+
+def _after_flush(session, flush_context):
+    """A write inside a request pins the rest of it (and the client) to the primary"""
+    if not has_request_context():
+        return
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if getattr(obj, '__tablename__', None) not in STICKY_IGNORED_TABLES:
+            g._replica_reads = False
+            g._wrote_data = True
+            return
+
+
+def init_read_replica(app):
+    """
+    Enable replica routing when a replica bind is configured
+    
+    Must run after init_db. Reads REPLICA_STICKY_SECONDS from the config or
+    environment.
+    
+    Returns:
+        True if routing was enabled
+    """
+    if REPLICA_BIND_KEY not in app.config.get('SQLALCHEMY_BINDS', {}):
+        return False
+    
+    _config['enabled'] = True
+    _config['sticky_seconds'] = float(app.config.get(
+        'REPLICA_STICKY_SECONDS', os.environ.get('REPLICA_STICKY_SECONDS', DEFAULT_STICKY_SECONDS)
+    ))
+    event.listen(RoutingSession, 'after_flush', _after_flush)
+    
+    @app.after_request
+    def record_client_writes(response):
+        wrote = g.get('_wrote_data') or (request.method in WRITE_METHODS and response.status_code < 400)
+        if wrote:
+            note_client_write(response, _current_client_id())
+        if g.get('_replica_routed'):
+            response.headers['X-DB-Route'] = 'replica' if not g.get('_wrote_data') else 'primary'
+        return response
+    
+    return True
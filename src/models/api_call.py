@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from src.models.base import db
+
+class ApiCallLog(db.Model):
+    """Append-only ledger of provider API calls (written by CallLedger)"""
+    __tablename__ = 'api_call_logs'
+    __table_args__ = (
+        db.Index('ix_api_call_logs_provider_endpoint_created', 'provider', 'endpoint', 'created_at'),
+        db.Index('ix_api_call_logs_campaign_created', 'campaign_id', 'created_at'),
+        db.Index('ix_api_call_logs_client_created', 'client_id', 'created_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Call Details
+    provider = db.Column(db.String(20), nullable=False)  # apollo, hunter, linkedin
+    endpoint = db.Column(db.String(200), nullable=False)  # numeric path segments collapsed to {id}
+    method = db.Column(db.String(10), default='GET')
+    status_code = db.Column(db.Integer)  # None when the request raised
+    latency_ms = db.Column(db.Float)
+    credits = db.Column(db.Float, default=1.0)
+    error = db.Column(db.String(500))
+    
+    # Attribution
+    client_id = db.Column(db.Integer)
+    campaign_id = db.Column(db.Integer)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ApiCallLog {self.provider} {self.endpoint} {self.status_code}>'
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'provider': self.provider,
+            'endpoint': self.endpoint,
+            'method': self.method,
+            'status_code': self.status_code,
+            'latency_ms': self.latency_ms,
+            'credits': self.credits,
+            'error': self.error,
+            'client_id': self.client_id,
+            'campaign_id': self.campaign_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
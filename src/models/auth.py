@@ -1,11 +1,9 @@
-from flask_sqlalchemy import SQLAlchemy
+from src.models.base import db
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
 import secrets
 import json
 
-db = SQLAlchemy()
-
 class Client(db.Model):
     """Client model for admin-controlled user accounts"""
     __tablename__ = 'clients'
@@ -42,6 +40,9 @@ class Client(db.Model):
     linkedin_client_id = db.Column(db.String(200))
     linkedin_client_secret = db.Column(db.String(500))
     
+    # Lead Scoring
+    scoring_weights = db.Column(db.Text)  # JSON overrides of DEFAULT_SCORING_WEIGHTS
+    
     # Usage Tracking
     last_login = db.Column(db.DateTime)
     last_lead_generation = db.Column(db.DateTime)
@@ -122,12 +123,14 @@ class Client(db.Model):
         
         return True, "OK"
     
-    def increment_lead_usage(self, count=1):
+    def increment_lead_usage(self, count=1, commit=True):
         """Increment lead usage counter"""
         self.leads_used_this_month += count
         self.total_leads_generated += count
         self.last_lead_generation = datetime.utcnow()
-        db.session.commit()
+        if commit:
+            db.session.commit()
+    
     
     def reset_monthly_usage(self):
         """Reset monthly usage counter (called by admin or cron job)"""
@@ -250,6 +253,8 @@ class LinkedInIntegration(db.Model):
     daily_api_calls = db.Column(db.Integer, default=0)
     monthly_api_calls = db.Column(db.Integer, default=0)
     last_api_call = db.Column(db.DateTime)
+    usage_day = db.Column(db.Date)  # day daily_api_calls counts (rolled over on use)
+    usage_month = db.Column(db.String(7))  # YYYY-MM monthly_api_calls counts
     
     # Rate Limiting
     calls_per_day_limit = db.Column(db.Integer, default=100)
@@ -306,8 +311,20 @@ class LinkedInIntegration(db.Model):
         
         return True
     
+    def roll_over_usage(self):
+        """Start new daily/monthly counts once usage_day / usage_month have passed"""
+        now = datetime.utcnow()
+        if self.usage_day != now.date():
+            self.daily_api_calls = 0
+            self.usage_day = now.date()
+        if self.usage_month != now.strftime('%Y-%m'):
+            self.monthly_api_calls = 0
+            self.usage_month = now.strftime('%Y-%m')
+    
     def can_make_api_call(self):
         """Check if client can make LinkedIn API calls"""
+        self.roll_over_usage()
+        
         if not self.is_active or not self.is_token_valid():
             return False, "LinkedIn integration not active or token invalid"
         
@@ -319,10 +336,11 @@ class LinkedInIntegration(db.Model):
         
         return True, "OK"
     
-    def increment_api_usage(self):
+    def increment_api_usage(self, count=1):
         """Increment API usage counters"""
-        self.daily_api_calls += 1
-        self.monthly_api_calls += 1
+        self.roll_over_usage()
+        self.daily_api_calls = (self.daily_api_calls or 0) + count
+        self.monthly_api_calls = (self.monthly_api_calls or 0) + count
         self.last_api_call = datetime.utcnow()
         db.session.commit()
     
@@ -356,6 +374,11 @@ class AdminSettings(db.Model):
     hunter_rate_limit_per_second = db.Column(db.Float, default=1.0)
     linkedin_rate_limit_per_day = db.Column(db.Integer, default=100)
     
+    # API Costs (per call, used for campaign cost metrics)
+    apollo_cost_per_call = db.Column(db.Float, default=0.0)
+    hunter_cost_per_call = db.Column(db.Float, default=0.0)
+    linkedin_cost_per_call = db.Column(db.Float, default=0.0)
+    
     # Security Settings
     require_strong_passwords = db.Column(db.Boolean, default=True)
     max_login_attempts = db.Column(db.Integer, default=5)
@@ -391,6 +414,9 @@ class AdminSettings(db.Model):
             'apollo_rate_limit_per_second': self.apollo_rate_limit_per_second,
             'hunter_rate_limit_per_second': self.hunter_rate_limit_per_second,
             'linkedin_rate_limit_per_day': self.linkedin_rate_limit_per_day,
+            'apollo_cost_per_call': self.apollo_cost_per_call,
+            'hunter_cost_per_call': self.hunter_cost_per_call,
+            'linkedin_cost_per_call': self.linkedin_cost_per_call,
             'require_strong_passwords': self.require_strong_passwords,
             'max_login_attempts': self.max_login_attempts,
             'lockout_duration_minutes': self.lockout_duration_minutes,
@@ -410,6 +436,14 @@ class AdminSettings(db.Model):
             db.session.add(settings)
             db.session.commit()
         return settings
+    
+    def get_api_costs(self):
+        """Per-call API costs by provider"""
+        return {
+            'apollo': self.apollo_cost_per_call or 0.0,
+            'hunter': self.hunter_cost_per_call or 0.0,
+            'linkedin': self.linkedin_cost_per_call or 0.0
+        }
 
 
 # Utility functions for authentication
@@ -451,9 +485,15 @@ def authenticate_client(username, password):
     return client, "Success"
 
 
+# Minimum interval between last_activity writes for the same session
+SESSION_ACTIVITY_WRITE_INTERVAL = timedelta(minutes=1)
+
 def get_client_by_session_token(session_token):
     """Get client by session token"""
-    session = ClientSession.query.filter_by(
+    # Load the client in the same query instead of a lazy load afterwards
+    session = ClientSession.query.options(
+        db.joinedload(ClientSession.client)
+    ).filter_by(
         session_token=session_token,
         is_active=True
     ).first()
@@ -461,9 +501,11 @@ def get_client_by_session_token(session_token):
     if not session or not session.is_valid():
         return None
     
-    # Update last activity
-    session.last_activity = datetime.utcnow()
-    db.session.commit()
+    # Update last activity, at most once per interval
+    now = datetime.utcnow()
+    if not session.last_activity or now - session.last_activity >= SESSION_ACTIVITY_WRITE_INTERVAL:
+        session.last_activity = now
+        db.session.commit()
     
     return session.client
 
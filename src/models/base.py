@@ -0,0 +1,149 @@
+"""
+Shared SQLAlchemy instance and engine configuration
+
+Every model module imports db from here so the app has one metadata registry
+and one engine (one connection pool) per database.
+
+With REPLICA_DATABASE_URL set, a second engine is bound as 'replica' and
+SELECTs issued while replica reads are switched on (see
+src/middleware/read_replica.py) go to it. Everything else uses the primary.
+"""
+
+import os
+
+from flask import g, has_request_context
+from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+REPLICA_BIND_KEY = 'replica'
+
+
+def replica_reads_active():
+    """True while the current request has opted in to replica reads"""
+    return has_request_context() and g.get('_replica_reads', False)
+
+
+class RoutingSession(Session):
+    """Session that routes plain SELECTs to the read replica when requested"""
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and getattr(clause, 'is_select', False)
+                and not self._flushing and replica_reads_active()):
+            replica = self._db.engines.get(REPLICA_BIND_KEY)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# Pool sizing (ignored for in-memory SQLite, which uses a single shared connection)
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_OVERFLOW = 20
+DEFAULT_POOL_TIMEOUT = 30
+DEFAULT_POOL_RECYCLE = 1800  # seconds; stays under typical server/proxy idle timeouts
+
+# How long a SQLite writer waits for the write lock before 'database is locked'
+DEFAULT_SQLITE_BUSY_TIMEOUT_MS = 5000
+
+
+def normalize_database_url(url):
+    """Accept the legacy postgres:// scheme used by some hosting providers"""
+    if url and url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def engine_options_for(database_url):
+    """
+    Engine options tuned for the database backend
+    
+    Args:
+        database_url: SQLAlchemy database URL
+    
+    Returns:
+        Dictionary for SQLALCHEMY_ENGINE_OPTIONS
+    """
+    url = make_url(database_url)
+    options = {'pool_pre_ping': True}
+    
+    if url.get_backend_name() == 'sqlite':
+        options['connect_args'] = {'check_same_thread': False}
+        if url.database in (None, '', ':memory:'):
+            # Flask-SQLAlchemy pins in-memory databases to a StaticPool
+            return options
+        options.update({
+            'pool_size': _env_int('DB_POOL_SIZE', DEFAULT_POOL_SIZE),
+            'max_overflow': _env_int('DB_MAX_OVERFLOW', DEFAULT_MAX_OVERFLOW),
+            'pool_timeout': _env_int('DB_POOL_TIMEOUT', DEFAULT_POOL_TIMEOUT)
+        })
+        return options
+    
+    options.update({
+        'pool_size': _env_int('DB_POOL_SIZE', DEFAULT_POOL_SIZE),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', DEFAULT_MAX_OVERFLOW),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', DEFAULT_POOL_TIMEOUT),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', DEFAULT_POOL_RECYCLE),
+        # Reuse the most recently returned connection so idle ones can be recycled
+        'pool_use_lifo': True
+    })
+    if url.get_backend_name() == 'postgresql':
+        options['connect_args'] = {
+            'connect_timeout': _env_int('DB_CONNECT_TIMEOUT', 10),
+            'application_name': os.environ.get('DB_APPLICATION_NAME', 'leadai')
+        }
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL lets readers run alongside the writer; NORMAL is durable under WAL.
+    busy_timeout makes a second writer wait for the lock instead of failing.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f"PRAGMA busy_timeout={_env_int('SQLITE_BUSY_TIMEOUT_MS', DEFAULT_SQLITE_BUSY_TIMEOUT_MS)}")
+    finally:
+        cursor.close()
+
+
+def init_db(app):
+    """
+    Configure the engine and bind the shared db to the app
+    
+    Engine options already present in SQLALCHEMY_ENGINE_OPTIONS win over the
+    defaults from engine_options_for.
+    """
+    database_url = normalize_database_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    
+    options = engine_options_for(database_url)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    
+    replica_url = normalize_database_url(
+        app.config.get('REPLICA_DATABASE_URL', os.environ.get('REPLICA_DATABASE_URL'))
+    )
+    if replica_url:
+        binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+        binds[REPLICA_BIND_KEY] = dict(engine_options_for(replica_url), url=replica_url)
+    
+    db.init_app(app)
+    
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _set_sqlite_pragmas)
+    
+    return db
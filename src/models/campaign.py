@@ -1,9 +1,7 @@
-from flask_sqlalchemy import SQLAlchemy
+from src.models.base import db
 from datetime import datetime
 import json
 
-db = SQLAlchemy()
-
 class LeadCampaign(db.Model):
     """Campaign model for organizing lead generation efforts per client"""
     __tablename__ = 'lead_campaigns'
@@ -46,8 +44,11 @@ class LeadCampaign(db.Model):
     last_run = db.Column(db.DateTime)
     next_run = db.Column(db.DateTime)
     
-    # Performance Metrics
+    # Performance Metrics (maintained incrementally by record_generation)
     total_api_calls = db.Column(db.Integer, default=0)
+    apollo_api_calls = db.Column(db.Integer, default=0)
+    hunter_api_calls = db.Column(db.Integer, default=0)
+    linkedin_api_calls = db.Column(db.Integer, default=0)
     total_cost = db.Column(db.Float, default=0.0)
     average_lead_score = db.Column(db.Float, default=0.0)
     
@@ -84,7 +85,13 @@ class LeadCampaign(db.Model):
             'last_run': self.last_run.isoformat() if self.last_run else None,
             'next_run': self.next_run.isoformat() if self.next_run else None,
             'total_api_calls': self.total_api_calls,
+            'api_calls_by_provider': {
+                'apollo': self.apollo_api_calls or 0,
+                'hunter': self.hunter_api_calls or 0,
+                'linkedin': self.linkedin_api_calls or 0
+            },
             'total_cost': self.total_cost,
+            'cost_per_lead': self.cost_per_lead(),
             'average_lead_score': self.average_lead_score,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
@@ -92,7 +99,7 @@ class LeadCampaign(db.Model):
         }
     
     def update_progress(self):
-        """Update campaign progress percentage"""
+        """Update campaign progress percentage (caller commits)"""
         if self.leads_target > 0:
             self.progress_percentage = (self.leads_generated / self.leads_target) * 100
         else:
@@ -102,8 +109,43 @@ class LeadCampaign(db.Model):
         if self.leads_generated >= self.leads_target and self.status == 'active':
             self.status = 'completed'
             self.completed_at = datetime.utcnow()
+    
+    def record_generation(self, lead_scores, api_calls=None, cost=0.0):
+        """
+        Fold one generation batch into the running campaign metrics
         
-        db.session.commit()
+        Does not commit, so the metrics land in the same transaction as the
+        lead inserts they describe.
+        
+        Args:
+            lead_scores: Scores of the leads saved in this batch
+            api_calls: Dictionary of provider -> API calls made for this batch
+            cost: Cost of those API calls
+        """
+        lead_scores = list(lead_scores)
+        previous_count = self.leads_generated or 0
+        new_count = previous_count + len(lead_scores)
+        
+        if new_count > 0:
+            score_sum = (self.average_lead_score or 0.0) * previous_count + sum(lead_scores)
+            self.average_lead_score = score_sum / new_count
+        self.leads_generated = new_count
+        
+        for provider, calls in (api_calls or {}).items():
+            column = f"{provider}_api_calls"
+            if hasattr(self, column):
+                setattr(self, column, (getattr(self, column) or 0) + calls)
+            self.total_api_calls = (self.total_api_calls or 0) + calls
+        
+        self.total_cost = (self.total_cost or 0.0) + cost
+        self.last_run = datetime.utcnow()
+        self.update_progress()
+    
+    def cost_per_lead(self):
+        """Average API cost per generated lead"""
+        if not self.leads_generated:
+            return 0.0
+        return round((self.total_cost or 0.0) / self.leads_generated, 4)
     
     def can_run(self):
         """Check if campaign can run"""
@@ -0,0 +1,128 @@
+import json
+from datetime import datetime
+
+from src.models.base import db
+
+# Cache scope for entries shared by every client (company data is public)
+SHARED_SCOPE = 0
+
+class LinkedInCompany(db.Model):
+    """Cached LinkedIn company details (written by LinkedInCompanyCache)"""
+    __tablename__ = 'linkedin_companies'
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'company_id', name='uq_linkedin_companies_scope_company'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.Integer, nullable=False, default=SHARED_SCOPE)  # 0 shared, else client id
+    company_id = db.Column(db.String(50), nullable=False)
+    name = db.Column(db.String(200))
+    details = db.Column(db.Text)  # JSON from companies/{id}
+    
+    # Timestamps
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<LinkedInCompany {self.company_id} {self.name}>'
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'scope': self.scope,
+            'company_id': self.company_id,
+            'name': self.name,
+            'details': json.loads(self.details) if self.details else None,
+            'fetched_at': self.fetched_at.isoformat() if self.fetched_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
+
+
+class LinkedInCompanyName(db.Model):
+    """Normalized company name -> LinkedIn company id; company_id None caches a miss"""
+    __tablename__ = 'linkedin_company_names'
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'normalized_name', name='uq_linkedin_company_names_scope_name'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.Integer, nullable=False, default=SHARED_SCOPE)
+    normalized_name = db.Column(db.String(200), nullable=False)
+    company_id = db.Column(db.String(50))  # None: searched and not found
+    
+    # Timestamps
+    resolved_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<LinkedInCompanyName {self.normalized_name} -> {self.company_id}>'
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'scope': self.scope,
+            'normalized_name': self.normalized_name,
+            'company_id': self.company_id,
+            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
+
+
+class LinkedInEnrichmentJob(db.Model):
+    """Checkpointed batch LinkedIn enrichment of a client's existing leads"""
+    __tablename__ = 'linkedin_enrichment_jobs'
+    __table_args__ = (
+        db.Index('ix_linkedin_enrichment_jobs_client_status', 'client_id', 'status'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    client_id = db.Column(db.Integer, db.ForeignKey('clients.id'), nullable=False)
+    
+    # Status: pending (not yet claimed by a run), running (updated_at is the
+    # run's heartbeat), paused (budget exhausted or run limit), completed, failed
+    status = db.Column(db.String(20), default='pending')
+    pause_reason = db.Column(db.String(200))
+    last_error = db.Column(db.String(500))
+    failed_runs = db.Column(db.Integer, default=0)  # consecutive runs that ended failed
+    
+    # Snapshot and checkpoint: leads up to max_lead_id, companies in
+    # normalized-name order, everything up to last_company is done
+    max_lead_id = db.Column(db.Integer, nullable=False, default=0)
+    last_company = db.Column(db.String(200))
+    
+    # Progress
+    companies_total = db.Column(db.Integer, default=0)
+    companies_done = db.Column(db.Integer, default=0)
+    companies_matched = db.Column(db.Integer, default=0)
+    leads_updated = db.Column(db.Integer, default=0)
+    api_calls = db.Column(db.Integer, default=0)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<LinkedInEnrichmentJob {self.id} client={self.client_id} {self.status}>'
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'client_id': self.client_id,
+            'status': self.status,
+            'pause_reason': self.pause_reason,
+            'last_error': self.last_error,
+            'failed_runs': self.failed_runs,
+            'companies_total': self.companies_total,
+            'companies_done': self.companies_done,
+            'companies_matched': self.companies_matched,
+            'leads_updated': self.leads_updated,
+            'api_calls': self.api_calls,
+            'progress_percentage': (self.companies_done / self.companies_total * 100) if self.companies_total else 100.0,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
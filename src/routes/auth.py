@@ -12,9 +12,9 @@ from src.models.auth import (
     Client, ClientSession, LinkedInIntegration, AdminSettings,
     authenticate_client, get_client_by_session_token, create_admin_user, db
 )
-from src.services.linkedin_service import (
-    LinkedInService, create_linkedin_oauth_url, exchange_linkedin_code
-)
+from src.services.call_ledger import call_ledger, cost_rollup, latency_percentiles
+from src.middleware.instrumentation import span
+from src.middleware.read_replica import read_replica
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -37,7 +37,8 @@ def require_auth(f):
                 'code': 'AUTH_REQUIRED'
             }), 401
         
-        client = get_client_by_session_token(session_token)
+        with span('auth'):
+            client = get_client_by_session_token(session_token)
         if not client:
             return jsonify({
                 'success': False,
@@ -320,6 +321,7 @@ def update_api_keys():
 @require_auth
 def get_linkedin_auth_url():
     """Get LinkedIn OAuth authorization URL"""
+    from src.services.linkedin_service import create_linkedin_oauth_url
     
     try:
         client = request.current_client
@@ -357,6 +359,7 @@ def get_linkedin_auth_url():
 @auth_bp.route('/linkedin/callback', methods=['GET'])
 def linkedin_callback():
     """Handle LinkedIn OAuth callback"""
+    from src.services.linkedin_service import exchange_linkedin_code
     
     try:
         code = request.args.get('code')
@@ -512,6 +515,7 @@ def disconnect_linkedin():
 @auth_bp.route('/admin/clients', methods=['GET'])
 @require_auth
 @require_admin
+@read_replica
 def get_all_clients():
     """Get all clients (admin only)"""
     
@@ -525,9 +529,12 @@ def get_all_clients():
             error_out=False
         )
         
+        with span('serialize'):
+            client_dicts = [client.to_dict() for client in clients.items]
+        
         return jsonify({
             'success': True,
-            'clients': [client.to_dict() for client in clients.items],
+            'clients': client_dicts,
             'pagination': {
                 'page': page,
                 'per_page': per_page,
@@ -773,6 +780,41 @@ def update_admin_settings():
             'error': str(e)
         }), 500
 
+@auth_bp.route('/admin/api-usage', methods=['GET'])
+@require_auth
+@require_admin
+def get_api_usage():
+    """Get provider API cost per lead and latency percentiles from the call ledger"""
+    
+    try:
+        days = request.args.get('days', 7, type=int)
+        group_by = request.args.get('group_by', 'campaign')
+        if group_by not in ('campaign', 'client'):
+            return jsonify({
+                'success': False,
+                'error': "group_by must be 'campaign' or 'client'"
+            }), 400
+        
+        since = datetime.utcnow() - timedelta(days=days)
+        client_id = request.args.get('client_id', type=int)
+        
+        # Include calls still waiting in the ledger queue
+        call_ledger.flush()
+        
+        return jsonify({
+            'success': True,
+            'since': since.isoformat(),
+            'costs': cost_rollup(group_by=group_by, since=since, client_id=client_id),
+            'latency': latency_percentiles(since=since, provider=request.args.get('provider')),
+            'dropped_records': call_ledger.dropped
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @auth_bp.route('/admin/init', methods=['POST'])
 def initialize_admin():
     """Initialize admin user (only works if no admin exists)"""
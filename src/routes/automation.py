@@ -10,10 +10,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from src.models.lead import Lead, db
 from src.models.campaign import LeadCampaign
 from src.models.auth import Client
-from src.services.apollo_service import ApolloService
-from src.services.enrichment_service import EnrichmentService
-from src.services.lead_automation import LeadAutomationService
-from src.services.linkedin_service import LinkedInService, LinkedInLeadGenService
+from src.middleware.instrumentation import span
+from src.middleware.read_replica import read_replica
+from src.middleware.http_cache import conditional_get
 from src.middleware.client_isolation import (
     require_client_isolation, ClientFilteredQuery, 
     validate_client_access_to_lead, validate_client_access_to_campaign,
@@ -28,8 +27,11 @@ automation_bp.register_error_handler(ClientIsolationError, handle_client_isolati
 
 @automation_bp.route('/status', methods=['GET'])
 @require_client_isolation
+@read_replica
 def get_automation_status():
     """Get automation status for current client only"""
+    from src.services.circuit_breaker import circuit_breakers
+    
     try:
         client = request.current_client
         
@@ -43,6 +45,13 @@ def get_automation_status():
             'linkedin_configured': bool(client.linkedin_access_token)
         }
         
+        # Provider circuit breakers (provider-wide and for this client's keys)
+        circuit_status = {
+            'apollo': circuit_breakers.status('apollo', client.apollo_api_key),
+            'hunter': circuit_breakers.status('hunter', client.hunter_api_key),
+            'linkedin': circuit_breakers.status('linkedin', client.linkedin_access_token)
+        }
+        
         # Get recent activity for this client only
         recent_leads = ClientFilteredQuery.get_client_leads().order_by(
             Lead.created_at.desc()
@@ -52,14 +61,19 @@ def get_automation_status():
             LeadCampaign.updated_at.desc()
         ).limit(3).all()
         
+        with span('serialize'):
+            recent_leads = [lead.to_dict() for lead in recent_leads]
+            recent_campaigns = [campaign.to_dict() for campaign in recent_campaigns]
+        
         return jsonify({
             'success': True,
             'client_id': client.id,
             'client_username': client.username,
             'statistics': stats,
             'api_status': api_status,
-            'recent_leads': [lead.to_dict() for lead in recent_leads],
-            'recent_campaigns': [campaign.to_dict() for campaign in recent_campaigns],
+            'circuit_breakers': circuit_status,
+            'recent_leads': recent_leads,
+            'recent_campaigns': recent_campaigns,
             'service_status': 'online'
         })
         
@@ -71,6 +85,7 @@ def get_automation_status():
 
 @automation_bp.route('/leads', methods=['GET'])
 @require_client_isolation
+@read_replica
 def get_leads():
     """Get leads for current client only"""
     try:
@@ -94,6 +109,12 @@ def get_leads():
         if min_score:
             query = query.filter(Lead.score >= min_score)
         
+        # Unchanged since the client's last poll: 304 without loading the page
+        count, last_updated = query.with_entities(db.func.count(Lead.id), db.func.max(Lead.updated_at)).one()
+        not_modified = conditional_get(request.current_client.id, count, last_updated, request.args)
+        if not_modified is not None:
+            return not_modified
+        
         # Order by creation date (newest first)
         query = query.order_by(Lead.created_at.desc())
         
@@ -104,9 +125,12 @@ def get_leads():
             error_out=False
         )
         
+        with span('serialize'):
+            lead_dicts = [lead.to_dict() for lead in leads.items]
+        
         return jsonify({
             'success': True,
-            'leads': [lead.to_dict() for lead in leads.items],
+            'leads': lead_dicts,
             'pagination': {
                 'page': page,
                 'per_page': per_page,
@@ -221,19 +245,102 @@ def delete_lead(lead_id):
             'error': str(e)
         }), 500
 
+@automation_bp.route('/leads/duplicates', methods=['GET'])
+@require_client_isolation
+def get_duplicate_leads():
+    """Get merge suggestions for current client's leads"""
+    from src.services.dedupe_service import LeadDedupeService
+    
+    try:
+        client = request.current_client
+        
+        dedupe_service = LeadDedupeService()
+        suggestions = dedupe_service.find_duplicates(client.id)
+        
+        return jsonify({
+            'success': True,
+            'suggestions': suggestions,
+            'total': len(suggestions)
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@automation_bp.route('/leads/duplicates/merge', methods=['POST'])
+@require_client_isolation
+def merge_duplicate_leads():
+    """Merge duplicate leads for current client (one suggestion, or all with auto=true)"""
+    from src.services.dedupe_service import LeadDedupeService
+    
+    try:
+        client = request.current_client
+        data = request.get_json() or {}
+        
+        dedupe_service = LeadDedupeService()
+        
+        if data.get('auto'):
+            results = dedupe_service.auto_merge_client(client.id)
+            return jsonify({
+                'success': True,
+                'results': results
+            })
+        
+        if not data.get('primary_id') or not data.get('duplicate_ids'):
+            return jsonify({
+                'success': False,
+                'error': 'primary_id and duplicate_ids are required'
+            }), 400
+        
+        removed = dedupe_service.apply_suggestion({
+            'primary_id': data['primary_id'],
+            'duplicate_ids': data['duplicate_ids'],
+            'kind': data.get('kind', 'duplicate')
+        }, client.id)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'results': {
+                'suggestions_applied': 1 if removed else 0,
+                'leads_removed': removed
+            }
+        })
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @automation_bp.route('/campaigns', methods=['GET'])
 @require_client_isolation
+@read_replica
 def get_campaigns():
     """Get campaigns for current client only"""
     try:
+        # Unchanged since the client's last poll: 304 without loading campaigns
+        count, last_updated = ClientFilteredQuery.get_client_campaigns().with_entities(
+            db.func.count(LeadCampaign.id), db.func.max(LeadCampaign.updated_at)
+        ).one()
+        not_modified = conditional_get(request.current_client.id, count, last_updated)
+        if not_modified is not None:
+            return not_modified
+        
         # Get campaigns with client isolation
         campaigns = ClientFilteredQuery.get_client_campaigns().order_by(
             LeadCampaign.created_at.desc()
         ).all()
         
+        with span('serialize'):
+            campaign_dicts = [campaign.to_dict() for campaign in campaigns]
+        
         return jsonify({
             'success': True,
-            'campaigns': [campaign.to_dict() for campaign in campaigns]
+            'campaigns': campaign_dicts
         })
         
     except Exception as e:
@@ -319,6 +426,8 @@ def get_campaign(campaign_id):
 @require_client_isolation
 def run_campaign(campaign_id):
     """Run specific campaign (only if owned by current client)"""
+    from src.services.lead_automation import LeadAutomationService
+    
     try:
         client = request.current_client
         campaign = validate_client_access_to_campaign(campaign_id)
@@ -364,6 +473,9 @@ def run_campaign(campaign_id):
 @require_client_isolation
 def generate_leads():
     """Generate leads for current client using their API keys"""
+    from src.services.apollo_service import ApolloService
+    from src.services.enrichment_service import EnrichmentService
+    
     try:
         client = request.current_client
         data = request.get_json()
@@ -386,7 +498,10 @@ def generate_leads():
         
         # Initialize services with client's API keys
         apollo_service = ApolloService(client.apollo_api_key)
+        apollo_service.attribution = {'client_id': client.id}
         enrichment_service = EnrichmentService(client.hunter_api_key) if client.hunter_api_key else None
+        if enrichment_service:
+            enrichment_service.attribution = {'client_id': client.id}
         
         # Generate leads with client isolation
         search_config = data.get('search_config', {
@@ -396,18 +511,10 @@ def generate_leads():
             'organization_num_employees_ranges': ['11,50', '51,200']
         })
         
-        # Search for leads
-        apollo_results = apollo_service.search_people(search_config, count=lead_count)
-        
-        if not apollo_results or not apollo_results.get('people'):
-            return jsonify({
-                'success': False,
-                'error': 'No leads found with current search criteria'
-            }), 404
-        
         generated_leads = []
         
-        for person in apollo_results['people'][:lead_count]:
+        # Search for leads (streamed: each page is processed while the next is fetched)
+        for person in apollo_service.iter_people(search_config, lead_count):
             # Create lead data with client isolation
             lead_data = {
                 'first_name': person.get('first_name', ''),
@@ -432,13 +539,19 @@ def generate_leads():
                     lead_data['verified'] = True
             
             # Calculate lead score
-            lead_data['score'] = calculate_lead_score(lead_data)
+            lead_data['score'] = calculate_lead_score(lead_data, client)
             
             # Create lead with client isolation
             lead = create_lead_for_client(lead_data, client.id)
             db.session.add(lead)
             generated_leads.append(lead)
         
+        if not generated_leads:
+            return jsonify({
+                'success': False,
+                'error': 'No leads found with current search criteria'
+            }), 404
+        
         # Update client usage
         client.increment_lead_usage(len(generated_leads))
         
@@ -462,6 +575,11 @@ def generate_leads():
 @require_client_isolation
 def linkedin_search():
     """Search LinkedIn using client's LinkedIn API credentials"""
+    from src.services.linkedin_service import LinkedInService, LinkedInLeadGenService
+    from src.services.dedupe_service import LeadDedupeService, merge_lead_fields
+    from src.services.linkedin_cache import LinkedInCompanyCache
+    from src.services.api_budget import LinkedInCallBudget
+    
     try:
         client = request.current_client
         data = request.get_json()
@@ -482,32 +600,62 @@ def linkedin_search():
                 'error': message
             }), 400
         
+        # Per-token daily/monthly LinkedIn quota, when an integration is configured
+        budget = LinkedInCallBudget.for_client(client.id)
+        if budget is not None and budget.remaining('high') < 1:
+            return jsonify({
+                'success': False,
+                'error': 'LinkedIn daily API limit reached'
+            }), 400
+        
         # Initialize LinkedIn service with client's credentials
         linkedin_service = LinkedInService(
             client_id=client.linkedin_client_id,
             client_secret=client.linkedin_client_secret,
-            access_token=client.linkedin_access_token
+            access_token=client.linkedin_access_token,
+            token_expires_at=client.linkedin_token_expires
         )
+        linkedin_service.attribution = {'client_id': client.id}
+        linkedin_service.budget = budget
         
-        # Validate token
-        if not linkedin_service.validate_token():
+        # Validate token (skipped, not failed, when the quota is kept for lead calls)
+        if not linkedin_service.validate_token() and not linkedin_service.budget_exhausted:
             return jsonify({
                 'success': False,
                 'error': 'LinkedIn token expired. Please reconnect your LinkedIn account.'
             }), 400
         
         # Initialize lead generation service
-        leadgen_service = LinkedInLeadGenService(linkedin_service)
+        leadgen_service = LinkedInLeadGenService(linkedin_service, company_cache=LinkedInCompanyCache(client.id))
         
         # Generate leads from LinkedIn with client isolation
         search_keywords = data.get('keywords', ['consulting', 'corporate wellness'])
         location = data.get('location', 'Australia')
         
-        linkedin_leads = leadgen_service.generate_leads_from_companies(
-            company_keywords=search_keywords,
-            location=location,
-            max_companies=lead_count
-        )
+        # Company details are fetched concurrently and mapped as they arrive
+        linkedin_leads = [
+            LinkedInLeadGenService.company_lead_to_lead_fields(company_lead)
+            for company_lead in leadgen_service.iter_company_leads(
+                company_keywords=search_keywords,
+                location=location,
+                max_companies=lead_count
+            )
+        ]
+        
+        # Merge companies the client already has instead of inserting duplicates
+        merged_count = 0
+        if data.get('auto_merge', True):
+            dedupe_service = LeadDedupeService()
+            merge_result = dedupe_service.build_index(client.id).auto_merge(linkedin_leads)
+            linkedin_leads = merge_result['new']
+            
+            for lead_data, matched_ids in merge_result['merged']:
+                existing_ids = [i for i in matched_ids if isinstance(i, int)]
+                if not existing_ids:
+                    continue
+                for existing in Lead.query.filter(Lead.id.in_(existing_ids), Lead.client_id == client.id):
+                    merge_lead_fields(existing, lead_data)
+                merged_count += 1
         
         generated_leads = []
         
@@ -518,13 +666,19 @@ def linkedin_search():
             lead_data['auto_generated'] = True
             
             # Calculate score
-            lead_data['score'] = calculate_lead_score(lead_data)
+            lead_data['score'] = calculate_lead_score(lead_data, client)
             
             # Create lead with client isolation
             lead = create_lead_for_client(lead_data, client.id)
             db.session.add(lead)
             generated_leads.append(lead)
         
+        if not generated_leads:
+            return jsonify({
+                'success': False,
+                'error': 'No leads found with current search criteria'
+            }), 404
+        
         # Update client usage
         client.increment_lead_usage(len(generated_leads))
         
@@ -533,6 +687,7 @@ def linkedin_search():
         return jsonify({
             'success': True,
             'leads_generated': len(generated_leads),
+            'leads_merged': merged_count,
             'leads': [lead.to_dict() for lead in generated_leads],
             'remaining_quota': client.monthly_lead_limit - client.leads_used_this_month
         })
@@ -544,113 +699,178 @@ def linkedin_search():
             'error': str(e)
         }), 500
 
-@automation_bp.route('/test-apis', methods=['POST'])
+@automation_bp.route('/linkedin/enrich', methods=['POST'])
 @require_client_isolation
-def test_apis():
-    """Test API connections for current client"""
+def enrich_linkedin_leads():
+    """Queue batch LinkedIn enrichment of current client's leads (poll GET for progress)"""
+    from src.services.linkedin_enrichment import LinkedInBatchEnricher, enrichment_worker
+    
     try:
         client = request.current_client
-        results = {}
-        
-        # Test Apollo API with client's key
-        if client.apollo_api_key:
-            apollo_service = ApolloService(client.apollo_api_key)
-            apollo_test = apollo_service.test_connection()
-            results['apollo'] = {
-                'configured': True,
-                'working': apollo_test,
-                'message': 'Connected successfully' if apollo_test else 'Connection failed'
-            }
-        else:
-            results['apollo'] = {
-                'configured': False,
-                'working': False,
-                'message': 'API key not configured'
-            }
+        data = request.get_json(silent=True) or {}
         
-        # Test Hunter API with client's key
-        if client.hunter_api_key:
-            enrichment_service = EnrichmentService(client.hunter_api_key)
-            hunter_test = enrichment_service.test_connection()
-            results['hunter'] = {
-                'configured': True,
-                'working': hunter_test,
-                'message': 'Connected successfully' if hunter_test else 'Connection failed'
-            }
-        else:
-            results['hunter'] = {
-                'configured': False,
-                'working': False,
-                'message': 'API key not configured'
-            }
+        if not client.linkedin_access_token:
+            return jsonify({
+                'success': False,
+                'error': 'LinkedIn not connected. Please connect your LinkedIn account first.'
+            }), 400
         
-        # Test LinkedIn API with client's token
-        if client.linkedin_access_token:
-            linkedin_service = LinkedInService(
-                client_id=client.linkedin_client_id or '',
-                client_secret=client.linkedin_client_secret or '',
-                access_token=client.linkedin_access_token
-            )
-            linkedin_test = linkedin_service.validate_token()
-            results['linkedin'] = {
-                'configured': True,
-                'working': linkedin_test,
-                'message': 'Connected successfully' if linkedin_test else 'Token expired or invalid'
-            }
-        else:
-            results['linkedin'] = {
-                'configured': False,
-                'working': False,
-                'message': 'LinkedIn not connected'
-            }
+        # The client's active job or a new pending one; it runs in the
+        # background (the daily job resumes it if this process stops)
+        job = LinkedInBatchEnricher(client).start_job()
+        enrichment_worker.submit(job.id, max_companies=data.get('max_companies'))
         
         return jsonify({
             'success': True,
-            'api_tests': results
-        })
+            'job_id': job.id,
+            'job': job.to_dict()
+        }), 202
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@automation_bp.route('/linkedin/enrich', methods=['GET'])
+@require_client_isolation
+def get_linkedin_enrichment():
+    """Get current client's latest batch LinkedIn enrichment job"""
+    from src.models.linkedin_company import LinkedInEnrichmentJob
+    
+    try:
+        client = request.current_client
+        job = LinkedInEnrichmentJob.query.filter_by(client_id=client.id).order_by(
+            LinkedInEnrichmentJob.id.desc()
+        ).first()
         
+        return jsonify({
+            'success': True,
+            'job': job.to_dict() if job else None
+        })
+    
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-def calculate_lead_score(lead_data):
-    """Calculate lead score based on various factors"""
-    score = 50  # Base score
+@automation_bp.route('/scoring/weights', methods=['GET'])
+@require_client_isolation
+def get_scoring_weights():
+    """Get lead scoring weights for current client"""
+    from src.services.lead_scoring import LeadScoringEngine, DEFAULT_SCORING_WEIGHTS
     
-    # Company size scoring
-    company_size = lead_data.get('company_size', '')
-    if '1000+' in company_size or 'Large' in company_size:
-        score += 20
-    elif '200-1000' in company_size or 'Medium' in company_size:
-        score += 15
-    elif '50-200' in company_size:
-        score += 10
+    try:
+        client = request.current_client
+        
+        return jsonify({
+            'success': True,
+            'weights': LeadScoringEngine.for_client(client).weights,
+            'defaults': DEFAULT_SCORING_WEIGHTS
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@automation_bp.route('/scoring/weights', methods=['PUT'])
+@require_client_isolation
+def update_scoring_weights():
+    """Update lead scoring weights for current client and rescore their leads"""
+    from src.services.lead_scoring import LeadScoringEngine, DEFAULT_SCORING_WEIGHTS, rescore_client_leads
     
-    # Title/seniority scoring
-    title = lead_data.get('title', '').lower()
-    if any(word in title for word in ['ceo', 'cto', 'cfo', 'president']):
-        score += 25
-    elif any(word in title for word in ['director', 'vp', 'vice president']):
-        score += 20
-    elif any(word in title for word in ['manager', 'head']):
-        score += 15
-    elif any(word in title for word in ['senior', 'lead']):
-        score += 10
+    try:
+        client = request.current_client
+        data = request.get_json() or {}
+        
+        weights = data.get('weights')
+        if not isinstance(weights, dict):
+            return jsonify({
+                'success': False,
+                'error': 'weights object is required'
+            }), 400
+        
+        unknown = [key for key in weights if key not in DEFAULT_SCORING_WEIGHTS]
+        if unknown:
+            return jsonify({
+                'success': False,
+                'error': f"Unknown scoring weights: {', '.join(unknown)}"
+            }), 400
+        
+        client.scoring_weights = json.dumps(weights)
+        client.updated_at = datetime.utcnow()
+        db.session.commit()
+        
+        results = None
+        if data.get('rescore', True):
+            results = rescore_client_leads(client.id, LeadScoringEngine.for_client(client))
+        
+        return jsonify({
+            'success': True,
+            'weights': LeadScoringEngine.for_client(client).weights,
+            'rescore': results
+        })
     
-    # Industry relevance
-    industry = lead_data.get('industry', '').lower()
-    if any(word in industry for word in ['consulting', 'professional services', 'wellness']):
-        score += 15
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@automation_bp.route('/scoring/rescore', methods=['POST'])
+@require_client_isolation
+def rescore_leads():
+    """Recompute scores of all current client's leads"""
+    from src.services.lead_scoring import LeadScoringEngine, rescore_client_leads
     
-    # Email verification
-    if lead_data.get('verified'):
-        score += 10
+    try:
+        client = request.current_client
+        
+        results = rescore_client_leads(client.id, LeadScoringEngine.for_client(client))
+        
+        return jsonify({
+            'success': True,
+            'results': results
+        })
     
-    # LinkedIn profile
-    if lead_data.get('linkedin_url'):
-        score += 5
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@automation_bp.route('/test-apis', methods=['POST'])
+@require_client_isolation
+def test_apis():
+    """Test the client's provider credentials (concurrent probes, cached briefly; ?refresh=1 re-checks)"""
+    from src.services.health_check import health_check
     
-    return min(score, 100)  # Cap at 100
+    try:
+        client = request.current_client
+        refresh = request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+        report = health_check.check(client, refresh=refresh)
+        
+        return jsonify({
+            'success': True,
+            'api_tests': report['api_tests'],
+            'checked_at': report['checked_at'],
+            'cached': report['cached']
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
 
+def calculate_lead_score(lead_data, client=None):
+    """Calculate lead score with the client's scoring weights"""
+    from src.services.lead_scoring import LeadScoringEngine
+    
+    return LeadScoringEngine.for_client(client).score(lead_data)
@@ -0,0 +1,121 @@
+import os
+import sys
+from datetime import datetime
+from typing import Dict, Optional
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from sqlalchemy import case, select, update
+
+from src.models.base import db
+from src.models.auth import LinkedInIntegration
+
+# Share of the daily limit a priority must leave unspent. Low-value calls
+# (token checks, profile reads) stop first, then searches, so the last part
+# of the budget goes to calls that turn directly into leads.
+PRIORITY_RESERVE = {
+    'high': 0.0,
+    'normal': 0.1,
+    'low': 0.3
+}
+
+
+class LinkedInCallBudget:
+    """
+    Request admission against a LinkedIn integration's daily/monthly quotas
+    
+    admit() reserves calls with one conditional UPDATE, so concurrent workers
+    and processes can never overspend: the row is only updated (and the call
+    admitted) if the quota allows it. Day and month rollover happen inside the
+    same statement by comparing usage_day / usage_month with today, so no
+    reset job is needed.
+    
+    Statements run on their own connection (not the request session), which
+    makes admit() safe from worker threads and keeps it out of the caller's
+    transaction. Build the budget inside an app context.
+    """
+    
+    def __init__(self, integration_id: int, engine=None):
+        self.integration_id = integration_id
+        self.engine = engine or db.engine
+        self.admitted = 0
+        self.rejected = 0
+    
+    @classmethod
+    def for_client(cls, client_id: int) -> Optional['LinkedInCallBudget']:
+        """Budget for the client's LinkedIn integration, or None if it has none"""
+        integration_id = db.session.query(LinkedInIntegration.id).filter_by(client_id=client_id).scalar()
+        return cls(integration_id) if integration_id else None
+    
+    @staticmethod
+    def _periods(now: datetime):
+        return now.date(), now.strftime('%Y-%m')
+    
+    @staticmethod
+    def _current_usage(today, month):
+        table = LinkedInIntegration.__table__
+        daily = case((table.c.usage_day == today, table.c.daily_api_calls), else_=0)
+        monthly = case((table.c.usage_month == month, table.c.monthly_api_calls), else_=0)
+        return daily, monthly
+    
+    def admit(self, priority: str = 'normal', calls: int = 1) -> bool:
+        """
+        Reserve calls if the quota (minus the priority's reserve) allows
+        
+        Args:
+            priority: 'high', 'normal' or 'low'
+            calls: Number of calls to reserve
+        
+        Returns:
+            True if the calls were reserved and may be made
+        """
+        now = datetime.utcnow()
+        today, month = self._periods(now)
+        daily, monthly = self._current_usage(today, month)
+        table = LinkedInIntegration.__table__
+        reserve = PRIORITY_RESERVE.get(priority, PRIORITY_RESERVE['normal'])
+        
+        statement = update(table).where(
+            table.c.id == self.integration_id,
+            table.c.is_active.is_(True),
+            daily + calls <= table.c.calls_per_day_limit * (1 - reserve),
+            monthly + calls <= table.c.calls_per_month_limit
+        ).values(
+            daily_api_calls=daily + calls,
+            monthly_api_calls=monthly + calls,
+            usage_day=today,
+            usage_month=month,
+            last_api_call=now
+        )
+        
+        with self.engine.begin() as connection:
+            admitted = connection.execute(statement).rowcount == 1
+        
+        if admitted:
+            self.admitted += calls
+        else:
+            self.rejected += calls
+        return admitted
+    
+    def remaining(self, priority: str = 'high') -> int:
+        """Calls a priority could still make today (also capped by the monthly quota)"""
+        now = datetime.utcnow()
+        today, month = self._periods(now)
+        daily, monthly = self._current_usage(today, month)
+        table = LinkedInIntegration.__table__
+        
+        with self.engine.connect() as connection:
+            row = connection.execute(
+                select(table.c.calls_per_day_limit, table.c.calls_per_month_limit, daily, monthly, table.c.is_active)
+                .where(table.c.id == self.integration_id)
+            ).first()
+        
+        if row is None or not row[4]:
+            return 0
+        day_limit, month_limit, used_today, used_month = row[0] or 0, row[1] or 0, row[2] or 0, row[3] or 0
+        reserve = PRIORITY_RESERVE.get(priority, PRIORITY_RESERVE['normal'])
+        return max(0, min(int(day_limit * (1 - reserve)) - used_today, month_limit - used_month))
+    
+    def stats(self) -> Dict:
+        return {'admitted': self.admitted, 'rejected': self.rejected}
@@ -0,0 +1,86 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class ApolloSearchCache:
+    """
+    Short-lived cache of Apollo people search results
+    
+    Entries are keyed by a canonical form of the search (filters with sorted,
+    de-duplicated values, plus page and per_page), so the same search built
+    in a different order hits the same entry, and scoped by a digest of the
+    API key, so one Apollo account never sees another's results. Results are
+    kept for ttl seconds (APOLLO_SEARCH_CACHE_SECONDS, 0 disables the cache)
+    and at most max_entries are held, least recently used first out.
+    """
+    
+    def __init__(self, ttl: float = None, max_entries: int = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv('APOLLO_SEARCH_CACHE_SECONDS', 900))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv('APOLLO_SEARCH_CACHE_SIZE', 256))
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+    
+    @staticmethod
+    def canonical_filters(filters: Dict) -> Dict:
+        """Filters with empty values dropped and list values sorted and de-duplicated"""
+        canonical = {}
+        for name, value in filters.items():
+            if not value:
+                continue
+            canonical[name] = sorted(set(value)) if isinstance(value, (list, tuple, set)) else value
+        return canonical
+    
+    @staticmethod
+    def key(api_key: str, filters: Dict, page: int, per_page: int) -> str:
+        search = json.dumps({'filters': filters, 'page': page, 'per_page': per_page}, sort_keys=True)
+        scope = hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()
+        return scope + ':' + hashlib.sha256(search.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached result (a fresh copy the caller may modify), or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() >= entry[0]:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            payload = entry[1]
+        return json.loads(payload)
+    
+    def set(self, key: str, result: Dict):
+        if not self.enabled:
+            return
+        payload = json.dumps(result)
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# Shared by every ApolloService in the process
+search_cache = ApolloSearchCache()
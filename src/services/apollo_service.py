@@ -1,55 +1,135 @@
+import os
 import requests
 import time
+import threading
 import json
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+from src.services.call_ledger import call_ledger
+from src.services.circuit_breaker import circuit_breakers
+from src.services.apollo_cache import search_cache
+
+# Most people Apollo's people/bulk_match accepts per request
+BULK_MATCH_SIZE = 10
+
+# Statuses meaning the bulk endpoint isn't available (plan or deployment).
+# A 403 may also mean the key is out of credits; the first single match
+# then tells the two apart
+BULK_UNAVAILABLE_STATUSES = (403, 404, 405)
+
+# Statuses meaning the key itself was refused (revoked, out of credits),
+# so matching stops
+MATCH_REFUSED_STATUSES = (401, 403)
+
 class ApolloService:
     """Service for interacting with Apollo.io API for automated lead generation"""
     
     def __init__(self, api_key: str):
         self.api_key = api_key
-        self.base_url = "https://api.apollo.io/api/v1"
+        self.base_url = os.getenv('APOLLO_BASE_URL', "https://api.apollo.io/api/v1")
         self.headers = {
             'Content-Type': 'application/json',
             'Cache-Control': 'no-cache',
             'X-Api-Key': api_key
         }
         self.rate_limit_delay = 1  # seconds between requests
+        self.rate_limit_retry_delay = 60  # seconds to wait after a 429
+        self.page_delay = 2  # seconds between search result pages
         self.last_request_time = 0
+        self._next_request_time = 0
+        self._throttle_lock = threading.Lock()
+        self.api_calls = 0  # HTTP calls made, read by the campaign pipeline
+        self._calls_lock = threading.Lock()
+        self.attribution = {}  # client_id / campaign_id recorded with each call in the ledger
+        self.timeout = None  # seconds per HTTP request (None waits indefinitely)
+        self._local = threading.local()  # per-thread status of the latest response
+        self.bulk_match_available = True  # cleared when people/bulk_match doesn't exist for this key
+        self.match_error = None  # why the latest bulk_match_people stopped early (key refused)
+        self.search_cache = search_cache  # shared short-lived search results (None to bypass)
+    
+    def _circuit(self):
+        """Provider and per-key circuit breakers for this service's calls"""
+        return circuit_breakers.for_call('apollo', self.api_key)
+    
+    def _record_call(self, method: str, endpoint: str, status_code: Optional[int], started: float,
+                     error: str = None, credits: float = None):
+        """Append an HTTP call to the provider call ledger"""
+        call_ledger.record(
+            'apollo', endpoint, method=method, status_code=status_code,
+            latency_ms=(time.time() - started) * 1000, credits=credits, error=error, **self.attribution
+        )
+        self._circuit().record(status_code)
+    
+    @property
+    def last_status_code(self) -> Optional[int]:
+        """Status of this thread's latest response (None if none arrived)"""
+        return getattr(self._local, 'status_code', None)
+    
+    def _throttle(self):
+        """
+        Wait for this request's start slot
+        
+        Slots are reserved under a lock, rate_limit_delay apart, so a page
+        prefetch on another thread keeps to the same rate as the caller.
+        """
+        with self._throttle_lock:
+            now = time.time()
+            slot = max(now, self._next_request_time)
+            self._next_request_time = slot + self.rate_limit_delay
+        if slot > now:
+            time.sleep(slot - now)
     
     def _make_request(self, method: str, endpoint: str, params: Dict = None, data: Dict = None) -> Optional[Dict]:
         """Make rate-limited request to Apollo API"""
+        self._local.status_code = None
+        
+        # Fail fast while the provider (or this key) is failing
+        if not self._circuit().allow():
+            print(f"Apollo circuit open, failing fast: {endpoint}")
+            return None
+        
         # Rate limiting
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.rate_limit_delay:
-            time.sleep(self.rate_limit_delay - time_since_last)
+        self._throttle()
         
         url = f"{self.base_url}/{endpoint}"
+        started = time.time()
         
         try:
             if method.upper() == 'GET':
-                response = requests.get(url, headers=self.headers, params=params)
+                response = requests.get(url, headers=self.headers, params=params, timeout=self.timeout)
             elif method.upper() == 'POST':
-                response = requests.post(url, headers=self.headers, params=params, json=data)
+                response = requests.post(url, headers=self.headers, params=params, json=data, timeout=self.timeout)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
             self.last_request_time = time.time()
+            self._local.status_code = response.status_code
+            with self._calls_lock:
+                self.api_calls += 1
             
             if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 429:
+                result = response.json()
+                # Bulk matches are billed per person matched, not per request
+                credits = None
+                if endpoint == 'people/bulk_match':
+                    credits = float(sum(1 for match in (result or {}).get('matches') or [] if match))
+                self._record_call(method, endpoint, response.status_code, started, credits=credits)
+                return result
+            
+            self._record_call(method, endpoint, response.status_code, started)
+            if response.status_code == 429:
                 # Rate limit exceeded, wait and retry
-                print("Rate limit exceeded, waiting 60 seconds...")
-                time.sleep(60)
+                print(f"Rate limit exceeded, waiting {self.rate_limit_retry_delay} seconds...")
+                time.sleep(self.rate_limit_retry_delay)
                 return self._make_request(method, endpoint, params, data)
             else:
                 print(f"Apollo API error: {response.status_code} - {response.text}")
                 return None
                 
         except Exception as e:
+            self._record_call(method, endpoint, None, started, error=str(e))
             print(f"Error making Apollo API request: {e}")
             return None
     
@@ -79,37 +159,40 @@ class ApolloService:
             Dictionary containing search results
         """
         
+        per_page = min(per_page, 100)
+        filters = {
+            'person_titles': person_titles,
+            'person_locations': person_locations,
+            'organization_locations': organization_locations,
+            'organization_industries': organization_industries,
+            'organization_num_employees_ranges': organization_num_employees_ranges,
+            'person_seniorities': person_seniorities
+        }
+        
+        # Identical searches (in any filter order) within the cache TTL are
+        # served locally without spending an Apollo call
+        cache_key = None
+        if self.search_cache is not None and self.search_cache.enabled:
+            filters = self.search_cache.canonical_filters(filters)
+            cache_key = self.search_cache.key(self.api_key, filters, page, per_page)
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         params = {
-            'per_page': min(per_page, 100),
+            'per_page': per_page,
             'page': page
         }
         
         # Add filters if provided
-        if person_titles:
-            for i, title in enumerate(person_titles):
-                params[f'person_titles[{i}]'] = title
-        
-        if person_locations:
-            for i, location in enumerate(person_locations):
-                params[f'person_locations[{i}]'] = location
-        
-        if organization_locations:
-            for i, location in enumerate(organization_locations):
-                params[f'organization_locations[{i}]'] = location
-        
-        if organization_industries:
-            for i, industry in enumerate(organization_industries):
-                params[f'organization_industries[{i}]'] = industry
-        
-        if organization_num_employees_ranges:
-            for i, range_val in enumerate(organization_num_employees_ranges):
-                params[f'organization_num_employees_ranges[{i}]'] = range_val
-        
-        if person_seniorities:
-            for i, seniority in enumerate(person_seniorities):
-                params[f'person_seniorities[{i}]'] = seniority
-        
-        return self._make_request('POST', 'mixed_people/search', params=params)
+        for name, values in filters.items():
+            for i, value in enumerate(values or []):
+                params[f'{name}[{i}]'] = value
+        
+        result = self._make_request('POST', 'mixed_people/search', params=params)
+        if cache_key is not None and result is not None and 'people' in result:
+            self.search_cache.set(cache_key, result)
+        return result
     
     def enrich_person(self, email: str = None, first_name: str = None, 
                      last_name: str = None, organization_name: str = None) -> Optional[Dict]:
@@ -138,6 +221,100 @@ class ApolloService:
         
         return self._make_request('POST', 'people/match', data=data)
     
+    @staticmethod
+    def _match_details(person: Dict) -> Dict:
+        """people/match parameters identifying a person (Apollo id when known)"""
+        organization = person.get('organization') or {}
+        details = {
+            'id': person.get('id'),
+            'first_name': person.get('first_name'),
+            'last_name': person.get('last_name'),
+            'organization_name': person.get('organization_name') or organization.get('name') or person.get('company'),
+            'domain': organization.get('primary_domain'),
+            'linkedin_url': person.get('linkedin_url')
+        }
+        email = person.get('email')
+        if email and not email.startswith('email_not_unlocked'):
+            details['email'] = email
+        return {key: value for key, value in details.items() if value}
+    
+    def bulk_match_people(self, people: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Match (enrich) many people with as few calls as possible
+        
+        People are sent to people/bulk_match in groups of BULK_MATCH_SIZE. A
+        group that fails (error, timeout, or a response that doesn't line up
+        with the request) is split in half and retried, down to single
+        people/match calls, so one bad record or a transient error costs a few
+        extra calls rather than the whole group. If the bulk endpoint is not
+        available for this key (403/404/405), every person falls back to
+        people/match. If the key is refused (a 401, or a 403 from people/match:
+        revoked or out of credits), matching stops and match_error says why.
+        
+        Args:
+            people: Apollo search results or lead-like dictionaries (id,
+                    first_name, last_name, organization_name, email, ...)
+        
+        Returns:
+            Matched person per input person, in order (None when not matched)
+        """
+        
+        self.match_error = None
+        matches = [None] * len(people)
+        # People with nothing to match on are skipped rather than sent
+        indexed = [(i, self._match_details(person)) for i, person in enumerate(people)]
+        indexed = [(i, details) for i, details in indexed if details]
+        
+        for start in range(0, len(indexed), BULK_MATCH_SIZE):
+            if self.match_error:
+                break
+            chunk = indexed[start:start + BULK_MATCH_SIZE]
+            for (i, _), match in zip(chunk, self._match_chunk([details for _, details in chunk])):
+                matches[i] = match
+        return matches
+    
+    def _match_chunk(self, details: List[Dict]) -> List[Optional[Dict]]:
+        """Match one group, splitting it on failure"""
+        if not details:
+            return []
+        if len(details) == 1 or not self.bulk_match_available:
+            return [self._match_single(detail) for detail in details]
+        
+        result = self._make_request('POST', 'people/bulk_match', data={'details': details})
+        matches = (result or {}).get('matches')
+        if isinstance(matches, list) and len(matches) == len(details):
+            return [match or None for match in matches]
+        
+        if result is None and self.last_status_code in BULK_UNAVAILABLE_STATUSES:
+            print("Apollo bulk match unavailable, falling back to single matches")
+            self.bulk_match_available = False
+            return [self._match_single(detail) for detail in details]
+        
+        if result is None and self._match_refused():
+            return [None] * len(details)
+        
+        middle = len(details) // 2
+        return self._match_chunk(details[:middle]) + self._match_chunk(details[middle:])
+    
+    def _match_single(self, details: Dict) -> Optional[Dict]:
+        if self.match_error:
+            return None
+        result = self._make_request('POST', 'people/match', data=details)
+        if result is None:
+            self._match_refused()
+        return (result or {}).get('person') or None
+    
+    def _match_refused(self) -> bool:
+        """Set match_error if the latest match call was refused for the key"""
+        if self.last_status_code not in MATCH_REFUSED_STATUSES:
+            return False
+        self.match_error = (
+            f"Apollo refused people matching ({self.last_status_code}): "
+            "API key invalid or out of credits"
+        )
+        print(self.match_error)
+        return True
+    
     def search_australian_consultants(self, 
                                     industries: List[str] = None,
                                     cities: List[str] = None,
@@ -208,71 +385,101 @@ class ApolloService:
             per_page=per_page
         )
     
-    def bulk_search_leads(self, search_configs: List[Dict], max_leads: int = 1000) -> List[Dict]:
+    def iter_people(self, config: Dict, max_leads: int = 100, per_page: int = 25) -> Iterator[Dict]:
         """
-        Perform bulk lead searches with multiple configurations
+        Yield people for one search configuration, page by page
+        
+        Pages are fetched lazily with one page of prefetch: while the caller
+        works through page N, page N+1 is fetched on a background thread, so
+        persistence and enrichment overlap the next search call and at most
+        two pages are held at a time. Stops at max_leads, an empty page or the
+        last page; closing the generator early abandons the prefetch.
         
         Args:
-            search_configs: List of search configuration dictionaries
-            max_leads: Maximum number of leads to collect
+            config: Search configuration dictionary (see get_default_australian_search_configs)
+            max_leads: Maximum number of people to yield
+            per_page: Page size (the same for every page, so pages line up)
         
-        Returns:
-            List of lead dictionaries
+        Yields:
+            Person dictionaries tagged with search_config and search_timestamp
         """
         
-        all_leads = []
-        leads_collected = 0
+        if max_leads <= 0:
+            return
         
-        for config in search_configs:
-            if leads_collected >= max_leads:
-                break
-            
-            page = 1
-            while leads_collected < max_leads:
-                remaining_leads = max_leads - leads_collected
-                per_page = min(25, remaining_leads)
-                
-                print(f"Searching with config: {config.get('name', 'Unnamed')} - Page {page}")
-                
-                result = self.search_people(
-                    person_titles=config.get('person_titles'),
-                    person_locations=config.get('person_locations'),
-                    organization_locations=config.get('organization_locations'),
-                    organization_industries=config.get('organization_industries'),
-                    organization_num_employees_ranges=config.get('organization_num_employees_ranges'),
-                    person_seniorities=config.get('person_seniorities'),
-                    per_page=per_page,
-                    page=page
-                )
+        name = config.get('name', 'Unnamed')
+        per_page = min(per_page, max_leads, 100)
+        
+        def fetch(page: int) -> Optional[Dict]:
+            if page > 1:
+                # Rate limiting between pages
+                time.sleep(self.page_delay)
+            print(f"Searching with config: {name} - Page {page}")
+            return self.search_people(
+                person_titles=config.get('person_titles'),
+                person_locations=config.get('person_locations'),
+                organization_locations=config.get('organization_locations'),
+                organization_industries=config.get('organization_industries'),
+                organization_num_employees_ranges=config.get('organization_num_employees_ranges'),
+                person_seniorities=config.get('person_seniorities'),
+                per_page=per_page,
+                page=page
+            )
+        
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='apollo-prefetch')
+        page = 1
+        future = executor.submit(fetch, page)
+        collected = 0
+        try:
+            while future is not None:
+                result = future.result()
+                future = None
                 
                 if not result or 'people' not in result:
-                    print(f"No results for config: {config.get('name', 'Unnamed')}")
+                    print(f"No results for config: {name}")
                     break
                 
-                people = result['people']
+                people = result['people'][:max_leads - collected]
                 if not people:
-                    print(f"No more results for config: {config.get('name', 'Unnamed')}")
+                    print(f"No more results for config: {name}")
                     break
                 
-                # Add source information to each lead
-                for person in people:
-                    person['search_config'] = config.get('name', 'Unknown')
-                    person['search_timestamp'] = datetime.utcnow().isoformat()
-                
-                all_leads.extend(people)
-                leads_collected += len(people)
-                
-                print(f"Collected {len(people)} leads. Total: {leads_collected}")
-                
-                # Check if we have more pages
+                collected += len(people)
                 pagination = result.get('pagination', {})
-                if page >= pagination.get('total_pages', 1):
-                    break
+                if collected < max_leads and page < pagination.get('total_pages', 1):
+                    page += 1
+                    future = executor.submit(fetch, page)
                 
-                page += 1
+                timestamp = datetime.utcnow().isoformat()
+                for person in people:
+                    # Add source information to each lead
+                    person['search_config'] = config.get('name', 'Unknown')
+                    person['search_timestamp'] = timestamp
+                    yield person
                 
-                # Rate limiting between pages
-                time.sleep(2)
+                print(f"Collected {len(people)} leads. Total: {collected}")
+        finally:
+            if future is not None:
+                future.cancel()
+            executor.shutdown(wait=False)
+    
+    def bulk_search_leads(self, search_configs: List[Dict], max_leads: int = 1000) -> List[Dict]:
+        """
+        Perform bulk lead searches with multiple configurations
+        
+        Args:
+            search_configs: List of search configuration dictionaries
+            max_leads: Maximum number of leads to collect
+        
+        Returns:
+            List of lead dictionaries (use iter_people to stream instead)
+        """
+        
+        all_leads = []
+        for config in search_configs:
+            if len(all_leads) >= max_leads:
+                break
+            all_leads.extend(self.iter_people(config, max_leads - len(all_leads)))
         
         print(f"Bulk search completed. Total leads collected: {len(all_leads)}")
         return all_leads
@@ -328,6 +535,17 @@ class ApolloService:
             }
         ]
     
+    def test_connection(self) -> bool:
+        """
+        Cheap health probe: checks the API key without running a search
+        
+        Returns:
+            True if Apollo accepts the API key, False otherwise
+        """
+        
+        result = self._make_request('GET', 'auth/health')
+        return bool(result and result.get('is_logged_in'))
+    
     def validate_api_key(self) -> bool:
         """
         Validate the Apollo API key
@@ -336,14 +554,8 @@ class ApolloService:
             True if API key is valid, False otherwise
         """
         
-        # Try a simple search to validate the API key
-        result = self.search_people(
-            person_titles=['CEO'],
-            person_locations=['Sydney, AU'],
-            per_page=1
-        )
-        
-        return result is not None and 'people' in result
+        # auth/health checks the key without running (and paying for) a search
+        return self.test_connection()
 
 
 # Example usage and testing functions
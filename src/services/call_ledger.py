@@ -0,0 +1,298 @@
+import os
+import sys
+import re
+import math
+import time
+import queue
+import atexit
+import threading
+from itertools import groupby
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.models.api_call import ApiCallLog, db
+
+# Credits consumed per call where a provider charges differently from one per call
+ENDPOINT_CREDITS = {
+    ('hunter', 'email-verifier'): 0.5,
+    ('hunter', 'account'): 0.0,
+    ('apollo', 'auth/health'): 0.0,
+    # Billed per person matched; ApolloService records the count with each call
+    ('apollo', 'people/bulk_match'): 0.0
+}
+
+_NUMERIC_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+def normalize_endpoint(endpoint: str) -> str:
+    """Collapse numeric path segments so 'companies/123' rolls up as 'companies/{id}'"""
+    endpoint = (endpoint or '').strip('/')
+    return _NUMERIC_SEGMENT.sub('/{id}', '/' + endpoint)[1:]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    rank = min(max(math.ceil(fraction * len(sorted_values)), 1), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+class CallLedger:
+    """
+    Asynchronous, append-only ledger of provider API calls
+    
+    record() only enqueues a row, so the HTTP path never waits on the database.
+    A background thread drains the queue and writes rows with one multi-row
+    INSERT per batch. When the queue is full, rows are dropped and counted
+    rather than blocking the caller.
+    """
+    
+    def __init__(self, batch_size: int = 200, flush_interval: float = 2.0, max_queue: int = 10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.app = None
+        self.dropped = 0
+        self._listeners = []
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+    
+    def init_app(self, app):
+        """Bind the ledger to a Flask app; the writer thread starts on first record"""
+        self.app = app
+        self.batch_size = app.config.get('CALL_LEDGER_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('CALL_LEDGER_FLUSH_INTERVAL', self.flush_interval)
+        atexit.register(self.flush)
+    
+    def add_listener(self, listener):
+        """Call listener(provider, endpoint, status_code, latency_ms) for every recorded call"""
+        self._listeners.append(listener)
+    
+    def record(self, provider: str, endpoint: str, method: str = 'GET', status_code: int = None,
+               latency_ms: float = None, client_id: int = None, campaign_id: int = None,
+               credits: float = None, error: str = None):
+        """
+        Enqueue one API call for the ledger
+        
+        Args:
+            provider: Provider name (apollo, hunter, linkedin)
+            endpoint: Endpoint path relative to the provider base URL
+            method: HTTP method
+            status_code: HTTP status, or None if the request raised
+            latency_ms: Wall time of the HTTP request in milliseconds
+            client_id: Client the call is attributed to
+            campaign_id: Campaign the call is attributed to
+            credits: Credits consumed (defaults from ENDPOINT_CREDITS, else 1)
+            error: Error message for failed requests
+        """
+        endpoint = normalize_endpoint(endpoint)
+        for listener in self._listeners:
+            listener(provider, endpoint, status_code, latency_ms)
+        
+        if self.app is None:
+            return
+        
+        if credits is None:
+            credits = ENDPOINT_CREDITS.get((provider, endpoint), 1.0)
+        # Rate-limited and failed requests are not billed
+        if status_code is None or status_code == 429 or status_code >= 500:
+            credits = 0.0
+        
+        row = {
+            'provider': provider,
+            'endpoint': endpoint,
+            'method': method.upper(),
+            'status_code': status_code,
+            'latency_ms': latency_ms,
+            'credits': credits,
+            'error': error[:500] if error else None,
+            'client_id': client_id,
+            'campaign_id': campaign_id,
+            'created_at': datetime.utcnow()
+        }
+        
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            return
+        
+        self._ensure_thread()
+    
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='call-ledger', daemon=True)
+                self._thread.start()
+    
+    def _drain(self, first_timeout: float) -> List[Dict]:
+        """Take up to one batch of rows, waiting at most first_timeout for the first"""
+        rows = []
+        try:
+            rows.append(self._queue.get(timeout=first_timeout))
+        except queue.Empty:
+            return rows
+        
+        deadline = time.monotonic() + self.flush_interval
+        while len(rows) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                rows.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return rows
+    
+    def _run(self):
+        while True:
+            rows = self._drain(first_timeout=60)
+            if rows:
+                with self._flush_lock:
+                    self._write(rows)
+    
+    def _write(self, rows: List[Dict]):
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as connection:
+                    connection.execute(ApiCallLog.__table__.insert(), rows)
+        except Exception as e:
+            print(f"Error writing API call ledger batch ({len(rows)} rows): {e}")
+    
+    def flush(self):
+        """Synchronously write everything queued so far (used at shutdown and in scripts)"""
+        if self.app is None:
+            return
+        with self._flush_lock:
+            while True:
+                rows = []
+                while len(rows) < self.batch_size:
+                    try:
+                        rows.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not rows:
+                    break
+                self._write(rows)
+
+
+# Shared ledger used by the provider services
+call_ledger = CallLedger()
+
+
+def _provider_prices() -> Dict[str, float]:
+    from src.models.auth import AdminSettings
+    return AdminSettings.get_settings().get_api_costs()
+
+
+def cost_rollup(group_by: str = 'campaign', since: datetime = None, client_id: int = None) -> List[Dict]:
+    """
+    Aggregate ledger credits into cost and cost per lead
+    
+    Leads are counted over the same window as the calls: by Lead.campaign_id
+    (set by the campaign pipeline) or Lead.client_id.
+    
+    Args:
+        group_by: 'campaign' or 'client'
+        since: Only count calls and leads from this time on
+        client_id: Restrict to one client
+    
+    Returns:
+        List of rollup rows sorted by cost, highest first
+    """
+    from src.models.lead import Lead
+    
+    key_column = ApiCallLog.campaign_id if group_by == 'campaign' else ApiCallLog.client_id
+    query = db.session.query(
+        key_column,
+        ApiCallLog.provider,
+        db.func.count(ApiCallLog.id),
+        db.func.coalesce(db.func.sum(ApiCallLog.credits), 0.0)
+    ).filter(key_column.isnot(None))
+    if since is not None:
+        query = query.filter(ApiCallLog.created_at >= since)
+    if client_id is not None:
+        query = query.filter(ApiCallLog.client_id == client_id)
+    
+    prices = _provider_prices()
+    rollup = {}
+    for key, provider, calls, credits in query.group_by(key_column, ApiCallLog.provider):
+        row = rollup.setdefault(key, {'id': key, 'calls': 0, 'credits': 0.0, 'cost': 0.0, 'by_provider': {}})
+        cost = credits * prices.get(provider, 0.0)
+        row['calls'] += calls
+        row['credits'] += credits
+        row['cost'] += cost
+        row['by_provider'][provider] = {'calls': calls, 'credits': credits, 'cost': round(cost, 4)}
+    
+    if rollup:
+        lead_column = Lead.campaign_id if group_by == 'campaign' else Lead.client_id
+        lead_query = db.session.query(lead_column, db.func.count(Lead.id)).filter(
+            lead_column.in_(list(rollup))
+        )
+        if since is not None:
+            lead_query = lead_query.filter(Lead.created_at >= since)
+        leads = dict(lead_query.group_by(lead_column))
+    else:
+        leads = {}
+    
+    rows = []
+    for key, row in rollup.items():
+        row['leads'] = leads.get(key) or 0
+        row['cost'] = round(row['cost'], 4)
+        row['cost_per_lead'] = round(row['cost'] / row['leads'], 4) if row['leads'] else None
+        rows.append(row)
+    
+    rows.sort(key=lambda r: r['cost'], reverse=True)
+    return rows
+
+
+def latency_percentiles(since: datetime = None, provider: str = None) -> List[Dict]:
+    """
+    p50/p95 latency and error rate per provider endpoint
+    
+    Streams latencies in sorted order and computes nearest-rank percentiles one
+    endpoint at a time, so memory is bounded by the busiest endpoint.
+    
+    Args:
+        since: Only include calls from this time on (defaults to the last 7 days)
+        provider: Restrict to one provider
+    
+    Returns:
+        List of per-endpoint statistics
+    """
+    if since is None:
+        since = datetime.utcnow() - timedelta(days=7)
+    
+    query = db.session.query(
+        ApiCallLog.provider, ApiCallLog.endpoint, ApiCallLog.latency_ms, ApiCallLog.status_code
+    ).filter(ApiCallLog.created_at >= since, ApiCallLog.latency_ms.isnot(None))
+    if provider:
+        query = query.filter(ApiCallLog.provider == provider)
+    query = query.order_by(ApiCallLog.provider, ApiCallLog.endpoint, ApiCallLog.latency_ms)
+    
+    results = []
+    for (call_provider, endpoint), rows in groupby(query.yield_per(5000), key=lambda r: (r[0], r[1])):
+        latencies = []
+        errors = 0
+        for _, _, latency, status in rows:
+            latencies.append(latency)
+            if status is None or status >= 400:
+                errors += 1
+        results.append({
+            'provider': call_provider,
+            'endpoint': endpoint,
+            'calls': len(latencies),
+            'p50_ms': round(percentile(latencies, 0.50), 1),
+            'p95_ms': round(percentile(latencies, 0.95), 1),
+            'max_ms': round(latencies[-1], 1),
+            'error_rate': round(errors / len(latencies), 4)
+        })
+    
+    return results
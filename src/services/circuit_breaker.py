@@ -0,0 +1,239 @@
+import os
+import time
+import hashlib
+import threading
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def _env_flag(name, default='true'):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+
+def classify_failure(status_code: Optional[int]) -> Tuple[bool, bool]:
+    """
+    Which breakers a call outcome counts against
+    
+    Returns:
+        (provider failure, key failure). No response or a 5xx is an outage
+        and counts against both; 401/403/429 are problems with one key
+        (revoked, out of credits, throttled) and only count against the key.
+        Other statuses mean the provider answered, so count as successes.
+    """
+    if status_code is None or status_code >= 500:
+        return True, True
+    if status_code in (401, 403, 429):
+        return False, True
+    return False, False
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker over a sliding time window
+    
+    Closed: calls pass and outcomes are recorded. Once at least min_calls
+    outcomes in the last window_seconds have a failure rate of failure_rate
+    or more, the breaker opens and calls fail fast for open_seconds. It then
+    goes half-open and lets one trial call through: success closes it,
+    failure opens it for another open_seconds.
+    """
+    
+    def __init__(self, name: str, failure_rate: float = 0.5, min_calls: int = 5,
+                 window_seconds: float = 60.0, open_seconds: float = 30.0):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.opened_at = None
+        self.trial_started = None
+        self.rejected = 0
+        self.times_opened = 0
+        self._outcomes = deque()  # (timestamp, failed)
+        self._lock = threading.Lock()
+    
+    def _prune(self, now: float):
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+    
+    def _open(self, now: float):
+        if self.state != OPEN:
+            self.times_opened += 1
+        self.state = OPEN
+        self.opened_at = now
+        self.trial_started = None
+        self._outcomes.clear()
+    
+    def allow(self) -> bool:
+        """True if a call may be made now"""
+        now = time.time()
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and now - self.opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            # Half-open: one trial at a time (a trial that never reported back
+            # is given up on after open_seconds)
+            if self.trial_started is not None and now - self.trial_started < self.open_seconds:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self.trial_started = now
+            return True
+    
+    def release(self):
+        """Give back an allowed call that was never made (frees a half-open trial)"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.trial_started = None
+    
+    def record(self, failed: bool):
+        """Record the outcome of an allowed call"""
+        now = time.time()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if failed:
+                    self._open(now)
+                else:
+                    self.state = CLOSED
+                    self.opened_at = None
+                    self.trial_started = None
+                    self._outcomes.clear()
+                return
+            if self.state == OPEN:
+                # A call admitted before the breaker opened
+                return
+            
+            self._outcomes.append((now, failed))
+            self._prune(now)
+            if len(self._outcomes) >= self.min_calls:
+                failures = sum(1 for _, outcome in self._outcomes if outcome)
+                if failures / len(self._outcomes) >= self.failure_rate:
+                    self._open(now)
+    
+    def snapshot(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            failures = sum(1 for _, outcome in self._outcomes if outcome)
+            state = self.state
+            if state == OPEN and now - self.opened_at >= self.open_seconds:
+                state = HALF_OPEN  # next call is the trial
+            return {
+                'state': state,
+                'recent_calls': len(self._outcomes),
+                'recent_failures': failures,
+                'retry_in_seconds': round(max(0.0, self.open_seconds - (now - self.opened_at)), 1)
+                if self.state == OPEN else None,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected
+            }
+
+
+class ProviderCircuit:
+    """The provider-wide and per-key breakers guarding one service's calls"""
+    
+    def __init__(self, provider_breaker: CircuitBreaker, key_breaker: Optional[CircuitBreaker]):
+        self.provider_breaker = provider_breaker
+        self.key_breaker = key_breaker
+    
+    def allow(self) -> bool:
+        # Key first: a key that fails fast shouldn't take the provider's
+        # half-open trial, which would then never be recorded
+        if self.key_breaker is not None and not self.key_breaker.allow():
+            return False
+        if not self.provider_breaker.allow():
+            if self.key_breaker is not None:
+                self.key_breaker.release()
+            return False
+        return True
+    
+    def record(self, status_code: Optional[int]):
+        """Record an HTTP status (None when the request raised or timed out)"""
+        provider_failed, key_failed = classify_failure(status_code)
+        self.provider_breaker.record(provider_failed)
+        if self.key_breaker is not None:
+            self.key_breaker.record(key_failed)
+
+
+class _AlwaysClosed:
+    """Stand-in when circuit breakers are disabled"""
+    
+    def allow(self) -> bool:
+        return True
+    
+    def record(self, status_code: Optional[int]):
+        pass
+
+
+class CircuitBreakerRegistry:
+    """
+    Process-wide circuit breakers for provider APIs
+    
+    One breaker per provider catches outages (timeouts, 5xx) across every
+    client; one per provider and API key catches a single bad key (401/403,
+    429) without failing fast for everyone else. Keys are identified by a
+    digest, never stored. Settings come from CIRCUIT_* environment variables;
+    CIRCUIT_BREAKERS=false disables them.
+    """
+    
+    def __init__(self):
+        self.enabled = _env_flag('CIRCUIT_BREAKERS')
+        self.settings = {
+            'failure_rate': float(os.getenv('CIRCUIT_FAILURE_RATE', 0.5)),
+            'min_calls': int(os.getenv('CIRCUIT_MIN_CALLS', 5)),
+            'window_seconds': float(os.getenv('CIRCUIT_WINDOW_SECONDS', 60)),
+            'open_seconds': float(os.getenv('CIRCUIT_OPEN_SECONDS', 30))
+        }
+        self._breakers = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key_id(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+    
+    def _breaker(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(name, **self.settings)
+            return breaker
+    
+    def for_call(self, provider: str, api_key: str = None):
+        """
+        Breakers guarding calls to a provider with one API key
+        
+        Returns:
+            A ProviderCircuit with allow() / record(status_code)
+        """
+        if not self.enabled:
+            return _AlwaysClosed()
+        key_breaker = self._breaker(f"{provider}:{self._key_id(api_key)}") if api_key else None
+        return ProviderCircuit(self._breaker(provider), key_breaker)
+    
+    def status(self, provider: str, api_key: str = None) -> Dict:
+        """State of the provider breaker and (if given) the key's breaker"""
+        if not self.enabled:
+            return {'state': CLOSED, 'enabled': False}
+        provider_state = self._breaker(provider).snapshot()
+        status = {'state': provider_state['state'], 'provider': provider_state}
+        if api_key:
+            key_state = self._breaker(f"{provider}:{self._key_id(api_key)}").snapshot()
+            status['key'] = key_state
+            if provider_state['state'] == CLOSED:
+                status['state'] = key_state['state']
+        return status
+    
+    def reset(self):
+        with self._lock:
+            self._breakers.clear()
+
+
+# Shared by every provider service in the process
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,185 @@
+import os
+import sys
+import time
+import queue
+import atexit
+import threading
+from concurrent.futures import Future
+from typing import List, Callable
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.models.base import db
+
+
+class _WriteJob:
+    def __init__(self, function: Callable, args: tuple, kwargs: dict):
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+    
+    def __call__(self, session):
+        return self.function(session, *self.args, **self.kwargs)
+
+
+class DbWriter:
+    """
+    Single writer thread for the lead pipeline
+    
+    SQLite allows one writer at a time; concurrent commits from campaign
+    threads wait on each other and fail with 'database is locked' once the
+    busy timeout runs out. With the writer enabled, write jobs are queued and
+    applied by one thread, several jobs per transaction. Readers are never
+    blocked (WAL), and only the writer thread contends for the write lock.
+    
+    A job is a function taking the session plus its own arguments. Jobs only
+    see the writer's session, so pass ids and plain rows, not ORM objects
+    loaded by the caller. If a batch fails to commit, its jobs are retried
+    one transaction each so a bad job only fails its own caller.
+    
+    Disabled (jobs run inline on the caller's session) unless DB_SINGLE_WRITER
+    is set, which it is by default for SQLite databases.
+    """
+    
+    def __init__(self, batch_size: int = 50, batch_window: float = 0.02, max_queue: int = 1000):
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.app = None
+        self.enabled = False
+        self.batches = 0
+        self.jobs = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def init_app(self, app):
+        """Bind the writer to a Flask app; the writer thread starts on first submit"""
+        self.app = app
+        self.batch_size = app.config.get('DB_WRITER_BATCH_SIZE', self.batch_size)
+        self.batch_window = app.config.get('DB_WRITER_BATCH_WINDOW', self.batch_window)
+        
+        enabled = app.config.get('DB_SINGLE_WRITER', os.environ.get('DB_SINGLE_WRITER'))
+        if enabled is None:
+            enabled = app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite')
+        elif isinstance(enabled, str):
+            enabled = enabled.lower() in ('1', 'true', 'yes')
+        self.enabled = bool(enabled)
+        atexit.register(self.stop)
+    
+    def submit(self, function: Callable, *args, **kwargs) -> Future:
+        """
+        Queue a write job
+        
+        Args:
+            function: Called as function(session, *args, **kwargs) on the writer thread
+        
+        Returns:
+            Future resolved with the job's return value once its transaction commits
+        """
+        job = _WriteJob(function, args, kwargs)
+        self._queue.put(job)
+        self._ensure_thread()
+        return job.future
+    
+    def run(self, function: Callable, *args, timeout: float = 60.0, **kwargs):
+        """
+        Apply a write job and wait for it to commit
+        
+        With the writer enabled, the caller's own transaction is committed first
+        so it holds no lock while waiting on the writer thread. Disabled, the job
+        runs inline and commits the caller's session.
+        
+        Returns:
+            The job's return value
+        """
+        if not self.enabled or self.app is None:
+            try:
+                result = function(db.session, *args, **kwargs)
+                db.session.commit()
+                return result
+            except Exception:
+                db.session.rollback()
+                raise
+        
+        db.session.commit()
+        return self.submit(function, *args, **kwargs).result(timeout=timeout)
+    
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+                self._thread.start()
+    
+    def _drain(self, first_timeout: float) -> List[_WriteJob]:
+        """Take up to one batch of jobs, waiting briefly for more after the first"""
+        jobs = []
+        try:
+            jobs.append(self._queue.get(timeout=first_timeout))
+        except queue.Empty:
+            return jobs
+        
+        deadline = time.monotonic() + self.batch_window
+        while len(jobs) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                jobs.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return jobs
+    
+    def _run(self):
+        while True:
+            jobs = self._drain(first_timeout=60)
+            stopping = any(job is _STOP for job in jobs)
+            jobs = [job for job in jobs if job is not _STOP]
+            if jobs:
+                self._apply(jobs)
+            if stopping:
+                return
+    
+    def _apply(self, jobs: List[_WriteJob]):
+        try:
+            results = self._commit(jobs)
+        except Exception as e:
+            if len(jobs) == 1:
+                jobs[0].future.set_exception(e)
+                return
+            # Isolate the failing job: one transaction per job
+            for job in jobs:
+                self._apply([job])
+            return
+        
+        self.batches += 1
+        self.jobs += len(jobs)
+        for job, result in zip(jobs, results):
+            job.future.set_result(result)
+    
+    def _commit(self, jobs: List[_WriteJob]) -> list:
+        """Run jobs in one transaction on the writer's session"""
+        with self.app.app_context():
+            try:
+                results = [job(db.session) for job in jobs]
+                db.session.commit()
+                return results
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                db.session.remove()
+    
+    def stop(self, timeout: float = 5.0):
+        """Apply queued jobs and stop the writer thread"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+
+_STOP = object()
+
+# Shared writer used by the lead pipeline
+db_writer = DbWriter()
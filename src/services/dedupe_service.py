@@ -0,0 +1,595 @@
+import os
+import sys
+import re
+import json
+import unicodedata
+import urllib.parse
+from typing import List, Dict, Optional, Tuple, Iterable
+from datetime import datetime
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.models.lead import Lead, db
+
+# Free mail providers never identify a company, so their domains are not used as company keys
+WEBMAIL_DOMAINS = {
+    'gmail.com', 'googlemail.com', 'yahoo.com', 'yahoo.com.au', 'hotmail.com',
+    'outlook.com', 'live.com', 'live.com.au', 'msn.com', 'icloud.com', 'me.com',
+    'aol.com', 'bigpond.com', 'bigpond.net.au', 'optusnet.com.au', 'protonmail.com'
+}
+
+# Providers that ignore dots in the local part
+DOTLESS_LOCAL_PART_DOMAINS = {'gmail.com', 'googlemail.com'}
+
+# Apollo returns this placeholder local part for emails that have not been unlocked
+LOCKED_EMAIL_LOCAL_PARTS = {'email_not_unlocked'}
+
+# Trailing tokens dropped from company names before comparing them
+COMPANY_SUFFIXES = {
+    'pty', 'ltd', 'limited', 'inc', 'incorporated', 'llc', 'plc', 'corp',
+    'corporation', 'co', 'company', 'group', 'holdings', 'australia', 'au'
+}
+
+# Weight of a match on each blocking key type
+KEY_WEIGHTS = {
+    'em': 1.0,    # normalized email
+    'li': 1.0,    # canonical LinkedIn URL
+    'nc': 0.9,    # first + last name + company
+    'nd': 0.9,    # first + last name + company domain
+    'el': 0.85,   # email local part without separators + domain
+    'co': 0.9,    # company name (company records)
+    'dom': 0.85,  # company domain (company records)
+}
+
+# Key types a person record can match on, and key types a company record can match on.
+# 'pco'/'pdom' are the company keys of person records: they let a company record find
+# the people who work there without making two colleagues look like duplicates.
+PERSON_MATCH_KEYS = ('em', 'li', 'nc', 'nd', 'el', 'co', 'dom')
+COMPANY_MATCH_KEYS = ('li', 'co', 'dom', 'pco', 'pdom')
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+_LOCAL_PART_SEPARATORS = re.compile(r'[._\-]')
+
+DEDUPE_FIELDS = (
+    'id', 'first_name', 'last_name', 'email', 'company', 'linkedin_url', 'source_url'
+)
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Lowercase, strip accents and punctuation, and collapse whitespace"""
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKD', value)
+    value = value.encode('ascii', 'ignore').decode('ascii').lower()
+    return _NON_ALNUM.sub(' ', value).strip()
+
+
+def normalize_company(name: Optional[str]) -> str:
+    """Normalize a company name so 'ACME Consulting Pty. Ltd.' matches 'Acme Consulting'"""
+    tokens = normalize_text((name or '').replace('&', ' and ')).split()
+    while len(tokens) > 1 and tokens[-1] in COMPANY_SUFFIXES:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+def normalize_email(email: Optional[str]) -> Optional[Tuple[str, str]]:
+    """
+    Split and normalize an email address
+    
+    Returns:
+        (local_part, domain) tuple, with '+tags' removed, or None if the email is unusable
+    """
+    if not email or '@' not in email:
+        return None
+    
+    local_part, _, domain = email.strip().lower().rpartition('@')
+    local_part = local_part.split('+', 1)[0]
+    if domain in DOTLESS_LOCAL_PART_DOMAINS:
+        local_part = local_part.replace('.', '')
+    
+    if not local_part or not domain:
+        return None
+    return local_part, domain
+
+
+def canonical_linkedin_url(url: Optional[str]) -> Optional[str]:
+    """
+    Canonicalize a LinkedIn profile or company URL
+    
+    'https://au.linkedin.com/in/John-Smith/?trk=abc' becomes 'linkedin.com/in/john-smith'
+    """
+    if not url:
+        return None
+    
+    url = url.strip()
+    if '://' not in url:
+        url = f"https://{url}"
+    
+    parsed = urllib.parse.urlparse(url)
+    host = parsed.netloc.lower()
+    if not host.endswith('linkedin.com'):
+        return None
+    
+    parts = [p for p in urllib.parse.unquote(parsed.path).lower().split('/') if p]
+    if len(parts) < 2 or parts[0] not in ('in', 'pub', 'company', 'school'):
+        return None
+    
+    return f"linkedin.com/{parts[0]}/{parts[1]}"
+
+
+def domain_from_url(url: Optional[str]) -> Optional[str]:
+    """Extract a bare company domain from a website URL"""
+    if not url:
+        return None
+    
+    if '://' not in url:
+        url = f"http://{url}"
+    host = urllib.parse.urlparse(url.strip().lower()).netloc.split(':')[0]
+    if host.startswith('www.'):
+        host = host[4:]
+    if not host or 'linkedin.com' in host:
+        return None
+    return host
+
+
+def company_domain(record: Dict) -> Optional[str]:
+    """Company domain of a record, from its email or website"""
+    email = normalize_email(record.get('email'))
+    if email and email[1] not in WEBMAIL_DOMAINS:
+        return email[1]
+    return domain_from_url(record.get('website') or record.get('source_url'))
+
+
+def is_company_record(record: Dict) -> bool:
+    """A record without a person's name describes a company (e.g. LinkedIn company leads)"""
+    if record.get('type') == 'company':
+        return True
+    return not (normalize_text(record.get('first_name')) or normalize_text(record.get('last_name')))
+
+
+def blocking_keys(record: Dict) -> List[str]:
+    """
+    Build the blocking keys of a lead record
+    
+    Records that share a key are compared; records that share none never are,
+    which keeps matching proportional to block size instead of table size.
+    
+    Args:
+        record: Lead dictionary (Lead columns, or LinkedIn company lead fields)
+    
+    Returns:
+        List of 'type:value' keys
+    """
+    keys = []
+    
+    linkedin = canonical_linkedin_url(record.get('linkedin_url'))
+    if not linkedin and record.get('company_id'):
+        linkedin = f"linkedin.com/company/{str(record['company_id']).lower()}"
+    if linkedin:
+        keys.append(f"li:{linkedin}")
+    
+    company = normalize_company(record.get('company') or record.get('company_name'))
+    domain = company_domain(record)
+    
+    if is_company_record(record):
+        if company:
+            keys.append(f"co:{company}")
+        if domain:
+            keys.append(f"dom:{domain}")
+        return keys
+    
+    email = normalize_email(record.get('email'))
+    if email and email[0] not in LOCKED_EMAIL_LOCAL_PARTS:
+        local_part, email_domain = email
+        keys.append(f"em:{local_part}@{email_domain}")
+        keys.append(f"el:{_LOCAL_PART_SEPARATORS.sub('', local_part)}@{email_domain}")
+    
+    name = normalize_text(f"{record.get('first_name') or ''} {record.get('last_name') or ''}").replace(' ', '')
+    if name and company:
+        keys.append(f"nc:{name}|{company}")
+    if name and domain:
+        keys.append(f"nd:{name}|{domain}")
+    
+    if company:
+        keys.append(f"pco:{company}")
+    if domain:
+        keys.append(f"pdom:{domain}")
+    
+    return keys
+
+
+def _match_keys(record: Dict, keys: List[str]) -> List[str]:
+    """Keys to look up for a record, translated to the key types it may match"""
+    allowed = COMPANY_MATCH_KEYS if is_company_record(record) else PERSON_MATCH_KEYS
+    lookups = []
+    for key in keys:
+        key_type, _, value = key.partition(':')
+        if key_type in ('pco', 'pdom'):
+            # A person looks for company records under the plain company keys
+            key_type = key_type[1:]
+            key = f"{key_type}:{value}"
+        if key_type in allowed:
+            lookups.append(key)
+        if key_type in ('co', 'dom') and is_company_record(record):
+            # A company record also looks for the people at that company
+            lookups.append(f"p{key}")
+    return lookups
+
+
+def _key_weight(key: str) -> float:
+    key_type = key.partition(':')[0]
+    return KEY_WEIGHTS.get(key_type.lstrip('p') if key_type in ('pco', 'pdom') else key_type, 0.0)
+
+
+class LeadDeduplicator:
+    """
+    In-memory blocking index for fuzzy duplicate detection across lead sources
+    
+    Records are indexed under normalized keys (email and local-part variants,
+    canonical LinkedIn URL, name + company, name + domain, company name and domain).
+    Candidate lookup only touches records sharing a key with the query.
+    """
+    
+    def __init__(self, threshold: float = 0.85, max_block_size: int = 1000):
+        self.threshold = threshold
+        self.max_block_size = max_block_size
+        self._index = {}  # key -> list of record ids
+        self._records = {}  # record id -> record
+    
+    def __len__(self):
+        return len(self._records)
+    
+    def add(self, record: Dict):
+        """Index a record (must carry an 'id')"""
+        record_id = record['id']
+        self._records[record_id] = record
+        for key in blocking_keys(record):
+            self._index.setdefault(key, []).append(record_id)
+    
+    def add_many(self, records: Iterable[Dict]):
+        """Index several records"""
+        for record in records:
+            self.add(record)
+    
+    def match(self, record: Dict) -> List[Dict]:
+        """
+        Find indexed records matching a record
+        
+        Args:
+            record: Lead dictionary to match
+        
+        Returns:
+            List of {'id', 'score', 'reasons', 'kind'} dictionaries, best match first.
+            kind is 'duplicate' for the same person/company and 'company' when a
+            company record matches people working at that company.
+        """
+        scores = {}
+        reasons = {}
+        for key in _match_keys(record, blocking_keys(record)):
+            block = self._index.get(key)
+            if not block:
+                continue
+            # Oversized person blocks (huge companies) are only used to attach company records
+            if len(block) > self.max_block_size and not key.startswith('p'):
+                continue
+            weight = _key_weight(key)
+            for candidate_id in block:
+                if candidate_id == record.get('id'):
+                    continue
+                scores[candidate_id] = max(scores.get(candidate_id, 0.0), weight)
+                reasons.setdefault(candidate_id, []).append(key.partition(':')[0])
+        
+        matches = []
+        for candidate_id, score in scores.items():
+            # Each additional independent key adds a little confidence
+            score = min(1.0, score + 0.05 * (len(set(reasons[candidate_id])) - 1))
+            if score < self.threshold:
+                continue
+            candidate = self._records[candidate_id]
+            same_kind = is_company_record(candidate) == is_company_record(record)
+            matches.append({
+                'id': candidate_id,
+                'score': round(score, 3),
+                'reasons': sorted(set(reasons[candidate_id])),
+                'kind': 'duplicate' if same_kind else 'company'
+            })
+        
+        matches.sort(key=lambda m: (-m['score'], str(m['id'])))
+        return matches
+    
+    def auto_merge(self, records: List[Dict]) -> Dict:
+        """
+        Split incoming records into new records and merges into indexed records
+        
+        Used on LinkedInLeadGenService output: a company lead that matches an existing
+        company lead, or the people at that company, is merged instead of inserted.
+        New records are indexed so later records in the batch dedupe against them.
+        
+        Args:
+            records: Incoming lead dictionaries (without ids)
+        
+        Returns:
+            Dictionary with 'new' (records to insert) and 'merged'
+            (list of (record, [matched ids]) tuples)
+        """
+        new_records = []
+        merged = []
+        
+        for position, record in enumerate(records):
+            matches = self.match(record)
+            if matches:
+                merged.append((record, [m['id'] for m in matches]))
+                continue
+            
+            pending = dict(record)
+            pending['id'] = f"new:{position}"
+            self.add(pending)
+            new_records.append(record)
+        
+        return {'new': new_records, 'merged': merged}
+
+
+class _UnionFind:
+    """Disjoint sets over lead ids, rooted at the smallest (oldest) id"""
+    
+    def __init__(self):
+        self.parent = {}
+    
+    def find(self, item):
+        parent = self.parent.setdefault(item, item)
+        if parent == item:
+            return item
+        root = self.find(parent)
+        self.parent[item] = root
+        return root
+    
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            if root_b < root_a:
+                root_a, root_b = root_b, root_a
+            self.parent[root_b] = root_a
+
+
+class LeadDedupeService:
+    """Batch duplicate detection and merging over the leads table"""
+    
+    def __init__(self, threshold: float = 0.85, chunk_size: int = 10000):
+        self.threshold = threshold
+        self.chunk_size = chunk_size
+    
+    def _iter_records(self, client_id: Optional[int] = None) -> Iterable[Dict]:
+        """Stream lead rows as dictionaries, ordered by client then id"""
+        columns = [getattr(Lead, field) for field in DEDUPE_FIELDS] + [Lead.client_id]
+        query = db.session.query(*columns)
+        if client_id is not None:
+            query = query.filter(Lead.client_id == client_id)
+        query = query.order_by(Lead.client_id, Lead.id).execution_options(yield_per=self.chunk_size)
+        
+        for row in query:
+            yield dict(zip(DEDUPE_FIELDS + ('client_id',), row))
+    
+    def find_duplicates(self, client_id: Optional[int] = None) -> List[Dict]:
+        """
+        Find duplicate lead clusters in a single streaming pass
+        
+        Leads are never matched across clients. Memory is bounded by the largest
+        client's key index, not by table size.
+        
+        Args:
+            client_id: Restrict to one client (all clients when None)
+        
+        Returns:
+            List of merge suggestions:
+            {'client_id', 'primary_id', 'duplicate_ids', 'kind', 'reasons'}
+        """
+        suggestions = []
+        current_client = object()
+        index = {}
+        union_find = _UnionFind()
+        cluster_reasons = {}
+        company_records = {}
+        processed = 0
+        
+        for record in self._iter_records(client_id):
+            if record['client_id'] != current_client:
+                suggestions.extend(self._collect(current_client, union_find, cluster_reasons, company_records))
+                current_client = record['client_id']
+                index = {}
+                union_find = _UnionFind()
+                cluster_reasons = {}
+                company_records = {}
+            
+            keys = blocking_keys(record)
+            company = is_company_record(record)
+            if company:
+                company_records[record['id']] = []
+            
+            for key in keys:
+                key_type = key.partition(':')[0]
+                if key_type in ('pco', 'pdom'):
+                    # Attach people to company records seen so far, and remember the key for later ones
+                    for company_id in index.get(key[1:], ()):
+                        if company_id in company_records:
+                            company_records[company_id].append(record['id'])
+                    index.setdefault(key, []).append(record['id'])
+                    continue
+                
+                if company and key_type in ('co', 'dom'):
+                    company_records[record['id']].extend(index.get(f"p{key}", ()))
+                
+                if _key_weight(key) < self.threshold:
+                    index.setdefault(key, []).append(record['id'])
+                    continue
+                
+                existing = index.get(key)
+                if existing:
+                    union_find.union(existing[0], record['id'])
+                    cluster_reasons.setdefault(record['id'], set()).add(key_type)
+                else:
+                    index[key] = [record['id']]
+            
+            processed += 1
+            if processed % 100000 == 0:
+                print(f"Dedupe scanned {processed} leads")
+        
+        suggestions.extend(self._collect(current_client, union_find, cluster_reasons, company_records))
+        print(f"Dedupe completed. Scanned {processed} leads, {len(suggestions)} merge suggestions")
+        return suggestions
+    
+    def _collect(self, client_id, union_find: _UnionFind, cluster_reasons: Dict, company_records: Dict) -> List[Dict]:
+        """Turn one client's union-find state into merge suggestions"""
+        clusters = {}
+        for item in list(union_find.parent):
+            clusters.setdefault(union_find.find(item), []).append(item)
+        
+        suggestions = []
+        for primary_id, members in clusters.items():
+            duplicates = sorted(m for m in members if m != primary_id)
+            if not duplicates:
+                continue
+            reasons = set()
+            for member in duplicates:
+                reasons |= cluster_reasons.get(member, set())
+            suggestions.append({
+                'client_id': client_id,
+                'primary_id': primary_id,
+                'duplicate_ids': duplicates,
+                'kind': 'duplicate',
+                'reasons': sorted(reasons)
+            })
+        
+        # People found through duplicate company records belong to the surviving one
+        people_by_company = {}
+        for company_id, person_ids in company_records.items():
+            root = union_find.find(company_id) if company_id in union_find.parent else company_id
+            people_by_company.setdefault(root, set()).update(person_ids)
+        
+        for company_id, person_ids in people_by_company.items():
+            if person_ids:
+                suggestions.append({
+                    'client_id': client_id,
+                    'primary_id': company_id,
+                    'duplicate_ids': sorted(person_ids),
+                    'kind': 'company',
+                    'reasons': ['co']
+                })
+        
+        return suggestions
+    
+    def build_index(self, client_id: int) -> LeadDeduplicator:
+        """Build an in-memory deduplicator over a client's existing leads"""
+        deduplicator = LeadDeduplicator(threshold=self.threshold)
+        deduplicator.add_many(self._iter_records(client_id))
+        return deduplicator
+    
+    def apply_suggestion(self, suggestion: Dict, client_id: Optional[int] = None) -> int:
+        """
+        Apply one merge suggestion without committing
+        
+        For 'duplicate' suggestions the duplicates are folded into the primary lead
+        and deleted. For 'company' suggestions the company lead only fills the
+        company-level fields (COMPANY_FIELDS) of the people at that company;
+        their person fields are left alone and the company lead is kept, since
+        it describes the company rather than duplicating any of them.
+        
+        Returns:
+            Number of leads removed
+        """
+        ids = [suggestion['primary_id']] + list(suggestion['duplicate_ids'])
+        query = Lead.query.filter(Lead.id.in_(ids))
+        if client_id is not None:
+            query = query.filter(Lead.client_id == client_id)
+        leads = {lead.id: lead for lead in query.all()}
+        
+        primary = leads.get(suggestion['primary_id'])
+        others = [leads[i] for i in suggestion['duplicate_ids'] if i in leads]
+        if not primary or not others:
+            return 0
+        
+        if suggestion.get('kind') == 'company':
+            for person in others:
+                merge_lead_fields(person, primary)
+            return 0
+        
+        for duplicate in others:
+            merge_lead_fields(primary, duplicate)
+            db.session.delete(duplicate)
+        return len(others)
+    
+    def auto_merge_client(self, client_id: int) -> Dict:
+        """Find and apply every merge suggestion for a client"""
+        suggestions = self.find_duplicates(client_id)
+        removed = 0
+        for i, suggestion in enumerate(suggestions):
+            removed += self.apply_suggestion(suggestion, client_id)
+            if (i + 1) % 500 == 0:
+                db.session.commit()
+        db.session.commit()
+        
+        return {
+            'suggestions_applied': len(suggestions),
+            'leads_removed': removed
+        }
+
+
+# Fields copied from a duplicate when the primary lead has no value
+MERGEABLE_FIELDS = (
+    'email', 'phone', 'title', 'company', 'industry', 'company_size', 'city', 'state',
+    'country', 'source_url', 'linkedin_url', 'revenue', 'employees', 'notes'
+)
+
+# Fields a company lead may fill on the people at that company; person-level
+# fields (linkedin_url, source_url, notes, ...) never come from a company row
+COMPANY_FIELDS = ('industry', 'company_size', 'revenue', 'employees')
+
+
+def merge_lead_fields(primary: Lead, other) -> Lead:
+    """
+    Fill a lead's empty fields from another lead or lead dictionary
+    
+    Tags and technologies are unioned, the higher score and verification win.
+    When other is a company record and primary a person, only COMPANY_FIELDS
+    are filled and technologies unioned; tags, score and flags describe the
+    person and are kept. Does not commit.
+    """
+    get = other.get if isinstance(other, dict) else lambda field, default=None: getattr(other, field, default)
+    company_only = (
+        is_company_record({'type': get('type'), 'first_name': get('first_name'), 'last_name': get('last_name')})
+        and not is_company_record({'first_name': primary.first_name, 'last_name': primary.last_name})
+    )
+    
+    for field in (COMPANY_FIELDS if company_only else MERGEABLE_FIELDS):
+        value = get(field)
+        if value and not getattr(primary, field):
+            setattr(primary, field, value)
+    
+    if company_only:
+        _union_json_field(primary, 'technologies', get('technologies'))
+        primary.updated_at = datetime.utcnow()
+        return primary
+    
+    for field in ('tags', 'technologies'):
+        _union_json_field(primary, field, get(field))
+    
+    if (get('score') or 0) > (primary.score or 0):
+        primary.score = get('score')
+    if get('verified'):
+        primary.verified = True
+    if get('enriched'):
+        primary.enriched = True
+    
+    primary.updated_at = datetime.utcnow()
+    return primary
+
+
+def _union_json_field(lead: Lead, field: str, incoming):
+    """Append incoming items (list or JSON text) missing from a JSON list column"""
+    if isinstance(incoming, str):
+        incoming = json.loads(incoming) if incoming else []
+    if not incoming:
+        return
+    current = json.loads(getattr(lead, field)) if getattr(lead, field) else []
+    combined = current + [item for item in incoming if item not in current]
+    setattr(lead, field, json.dumps(combined))
@@ -1,20 +1,48 @@
+import os
 import requests
 import time
+import threading
 import json
 from typing import Dict, Optional, List
 from datetime import datetime
 
+from src.services.industry_classifier import industry_classifier
+from src.services.call_ledger import call_ledger
+from src.services.circuit_breaker import circuit_breakers
+
 class EnrichmentService:
     """Service for enriching lead data using various APIs"""
     
     def __init__(self, hunter_api_key: str = None):
         self.hunter_api_key = hunter_api_key
-        self.hunter_base_url = "https://api.hunter.io/v2"
+        self.hunter_base_url = os.getenv('HUNTER_BASE_URL', "https://api.hunter.io/v2")
         self.rate_limit_delay = 1  # seconds between requests
+        self.rate_limit_retry_delay = 60  # seconds to wait after a 429
         self.last_request_time = 0
+        self.api_calls = 0  # HTTP calls made, read by the campaign pipeline
+        self._calls_lock = threading.Lock()
+        self.attribution = {}  # client_id / campaign_id recorded with each call in the ledger
+        self.timeout = None  # seconds per HTTP request (None waits indefinitely)
+    
+    def _circuit(self):
+        """Provider and per-key circuit breakers for this service's calls"""
+        return circuit_breakers.for_call('hunter', self.hunter_api_key)
+    
+    def _record_call(self, method: str, endpoint: str, status_code: Optional[int], started: float, error: str = None):
+        """Append an HTTP call to the provider call ledger"""
+        call_ledger.record(
+            'hunter', endpoint, method=method, status_code=status_code,
+            latency_ms=(time.time() - started) * 1000, error=error, **self.attribution
+        )
+        self._circuit().record(status_code)
     
     def _make_hunter_request(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
         """Make rate-limited request to Hunter.io API"""
+        # Fail fast while the provider (or this key) is failing
+        if not self._circuit().allow():
+            print(f"Hunter.io circuit open, failing fast: {endpoint}")
+            return None
+        
         # Rate limiting
         current_time = time.time()
         time_since_last = current_time - self.last_request_time
@@ -26,23 +54,28 @@ class EnrichmentService:
         params['api_key'] = self.hunter_api_key
         
         url = f"{self.hunter_base_url}/{endpoint}"
+        started = time.time()
         
         try:
-            response = requests.get(url, params=params)
+            response = requests.get(url, params=params, timeout=self.timeout)
             self.last_request_time = time.time()
+            with self._calls_lock:
+                self.api_calls += 1
+            self._record_call('GET', endpoint, response.status_code, started)
             
             if response.status_code == 200:
                 return response.json()
             elif response.status_code == 429:
                 # Rate limit exceeded, wait and retry
-                print("Hunter.io rate limit exceeded, waiting 60 seconds...")
-                time.sleep(60)
+                print(f"Hunter.io rate limit exceeded, waiting {self.rate_limit_retry_delay} seconds...")
+                time.sleep(self.rate_limit_retry_delay)
                 return self._make_hunter_request(endpoint, params)
             else:
                 print(f"Hunter.io API error: {response.status_code} - {response.text}")
                 return None
                 
         except Exception as e:
+            self._record_call('GET', endpoint, None, started, error=str(e))
             print(f"Error making Hunter.io API request: {e}")
             return None
     
@@ -267,7 +300,7 @@ class EnrichmentService:
     
     def _guess_industry_from_domain(self, domain: str) -> Optional[str]:
         """
-        Guess industry from domain name (basic implementation)
+        Guess industry from domain name
         
         Args:
             domain: Company domain
@@ -276,24 +309,7 @@ class EnrichmentService:
             Industry guess or None
         """
         
-        domain_lower = domain.lower()
-        
-        industry_keywords = {
-            'consulting': ['consult', 'advisory', 'strategy'],
-            'technology': ['tech', 'software', 'digital', 'app', 'dev'],
-            'healthcare': ['health', 'medical', 'care', 'clinic'],
-            'finance': ['finance', 'bank', 'invest', 'capital'],
-            'education': ['edu', 'school', 'university', 'learn'],
-            'marketing': ['marketing', 'agency', 'creative', 'design'],
-            'legal': ['law', 'legal', 'attorney'],
-            'real_estate': ['realty', 'property', 'real', 'estate']
-        }
-        
-        for industry, keywords in industry_keywords.items():
-            if any(keyword in domain_lower for keyword in keywords):
-                return industry
-        
-        return None
+        return industry_classifier.classify_domain(domain)
     
     def _enrich_social_profiles(self, email: str) -> Optional[Dict]:
         """
@@ -357,6 +373,10 @@ class EnrichmentService:
         result = self._make_hunter_request('account')
         return result is not None and 'data' in result
 
+    
+    def test_connection(self) -> bool:
+        """Cheap health probe (the account endpoint costs no credits)"""
+        return self.validate_hunter_api_key()
 
 class LinkedInEnrichmentService:
     """Service for LinkedIn-based lead enrichment (placeholder)"""
@@ -0,0 +1,171 @@
+import os
+import sys
+import time
+import hashlib
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.models.auth import Client
+from src.services.circuit_breaker import circuit_breakers
+
+
+class ProviderHealthCheck:
+    """
+    Concurrent provider health checks for a client's API credentials
+    
+    Each configured provider gets one cheap probe (Apollo auth/health, the
+    free Hunter account endpoint, a cached LinkedIn token validation). Probes
+    run in parallel under one shared deadline, so a check takes as long as
+    the slowest provider (at most timeout) rather than the sum; a probe still
+    running at the deadline is reported as timed out. Each result carries the
+    provider's circuit breaker state; an open breaker fails its probe fast.
+    
+    Results are cached per client for cache_seconds. The cache key includes
+    a digest of the credentials, so updating a key is checked immediately.
+    """
+    
+    def __init__(self, timeout: float = None, cache_seconds: float = None):
+        self.timeout = timeout if timeout is not None else float(os.getenv('HEALTH_CHECK_TIMEOUT', 5))
+        self.cache_seconds = cache_seconds if cache_seconds is not None else float(os.getenv('HEALTH_CHECK_CACHE_SECONDS', 60))
+        self._cache = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _credentials(client: Client) -> Dict[str, Optional[str]]:
+        return {
+            'apollo': client.apollo_api_key,
+            'hunter': client.hunter_api_key,
+            'linkedin': client.linkedin_access_token
+        }
+    
+    def _credentials_key(self, client: Client) -> str:
+        credentials = '|'.join(str(value or '') for value in self._credentials(client).values())
+        return hashlib.sha256(credentials.encode('utf-8')).hexdigest()
+    
+    def _probes(self, client: Client) -> Dict[str, Optional[Callable[[], bool]]]:
+        """Probe per provider (None when the provider isn't configured)"""
+        from src.services.apollo_service import ApolloService
+        from src.services.enrichment_service import EnrichmentService
+        from src.services.linkedin_service import LinkedInService
+        
+        probes = {'apollo': None, 'hunter': None, 'linkedin': None}
+        
+        if client.apollo_api_key:
+            apollo_service = ApolloService(client.apollo_api_key)
+            apollo_service.attribution = {'client_id': client.id}
+            apollo_service.timeout = self.timeout
+            probes['apollo'] = apollo_service.test_connection
+        
+        if client.hunter_api_key:
+            enrichment_service = EnrichmentService(client.hunter_api_key)
+            enrichment_service.attribution = {'client_id': client.id}
+            enrichment_service.timeout = self.timeout
+            probes['hunter'] = enrichment_service.test_connection
+        
+        if client.linkedin_access_token:
+            linkedin_service = LinkedInService(
+                client_id=client.linkedin_client_id or '',
+                client_secret=client.linkedin_client_secret or '',
+                access_token=client.linkedin_access_token,
+                token_expires_at=client.linkedin_token_expires
+            )
+            linkedin_service.attribution = {'client_id': client.id}
+            linkedin_service.timeout = self.timeout
+            probes['linkedin'] = linkedin_service.test_connection
+        
+        return probes
+    
+    @staticmethod
+    def _timed(probe: Callable[[], bool]):
+        started = time.time()
+        working = bool(probe())
+        return working, (time.time() - started) * 1000
+    
+    def _with_circuits(self, client: Client, report: Dict, cached: bool) -> Dict:
+        """Copy of a report with each provider's current circuit breaker state"""
+        credentials = self._credentials(client)
+        api_tests = {
+            provider: dict(result, circuit=circuit_breakers.status(provider, credentials[provider])['state'])
+            for provider, result in report['api_tests'].items()
+        }
+        return dict(report, api_tests=api_tests, cached=cached)
+    
+    def check(self, client: Client, refresh: bool = False) -> Dict:
+        """
+        Check every provider for a client
+        
+        Args:
+            client: Client whose credentials are checked
+            refresh: Ignore cached results
+        
+        Returns:
+            Dictionary with per-provider results, checked_at and cached
+        """
+        credentials_key = self._credentials_key(client)
+        if not refresh:
+            with self._lock:
+                cached = self._cache.get(client.id)
+            if cached is not None and cached[0] == credentials_key and time.time() - cached[1] < self.cache_seconds:
+                return self._with_circuits(client, cached[2], cached=True)
+        
+        probes = self._probes(client)
+        results = {}
+        executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='health-check')
+        try:
+            futures = {
+                executor.submit(self._timed, probe): provider
+                for provider, probe in probes.items() if probe is not None
+            }
+            wait(futures, timeout=self.timeout)
+            
+            for future, provider in futures.items():
+                if not future.done():
+                    future.cancel()
+                    results[provider] = {
+                        'configured': True,
+                        'working': False,
+                        'message': f'No response within {self.timeout:g}s'
+                    }
+                    continue
+                try:
+                    working, latency_ms = future.result()
+                except Exception as e:
+                    working, latency_ms = False, None
+                    print(f"Health check for {provider} failed: {e}")
+                results[provider] = {
+                    'configured': True,
+                    'working': working,
+                    'message': 'Connected successfully' if working else (
+                        'Token expired or invalid' if provider == 'linkedin' else 'Connection failed'
+                    ),
+                    'latency_ms': round(latency_ms, 1) if latency_ms is not None else None
+                }
+        finally:
+            # Don't wait for probes past the deadline; their own timeout ends them
+            executor.shutdown(wait=False)
+        
+        for provider, probe in probes.items():
+            if probe is None:
+                results[provider] = {
+                    'configured': False,
+                    'working': False,
+                    'message': 'LinkedIn not connected' if provider == 'linkedin' else 'API key not configured'
+                }
+        
+        report = {'api_tests': results, 'checked_at': datetime.utcnow().isoformat()}
+        with self._lock:
+            self._cache[client.id] = (credentials_key, time.time(), report)
+        return self._with_circuits(client, report, cached=False)
+    
+    def invalidate(self, client_id: int):
+        with self._lock:
+            self._cache.pop(client_id, None)
+
+
+# Shared by all requests so results are cached across them
+health_check = ProviderHealthCheck()
@@ -0,0 +1,106 @@
+import re
+from functools import lru_cache
+from typing import List, Dict, Optional, Iterable, Tuple
+
+# Industry keywords in priority order: when keywords of several industries
+# match, the industry listed first wins. Keywords are whole words; plurals
+# ('consultants', 'technologies') match too.
+INDUSTRY_KEYWORDS = (
+    ('consulting', ['consulting', 'consultant', 'consultancy', 'advisory', 'advisor', 'strategy']),
+    ('technology', ['tech', 'technology', 'software', 'digital', 'app', 'dev', 'developer']),
+    ('healthcare', ['health', 'healthcare', 'medical', 'care', 'clinic']),
+    ('finance', ['finance', 'financial', 'bank', 'banking', 'invest', 'investment', 'capital']),
+    ('education', ['edu', 'education', 'school', 'university', 'learning']),
+    ('marketing', ['marketing', 'agency', 'creative', 'design']),
+    ('legal', ['law', 'legal', 'attorney', 'lawyer']),
+    ('real_estate', ['realty', 'property', 'real', 'estate'])
+)
+
+
+def _keyword_pattern(keyword: str) -> str:
+    """Regex for a keyword and its plural ('agency' -> agency/agencies, 'app' -> app/apps)"""
+    keyword = keyword.lower()
+    if keyword.endswith('y') and len(keyword) > 2 and keyword[-2] not in 'aeiou':
+        return f"{re.escape(keyword[:-1])}(?:y|ies)"
+    return f"{re.escape(keyword)}(?:s|es)?"
+
+
+class IndustryClassifier:
+    """
+    Keyword-based industry classifier for domains and free-text industry names
+    
+    Keywords match whole words only, so 'app' matches 'happy-apps.io' and
+    'Mobile App Development' but not 'happen' or 'disapprove'. Domain labels
+    split into words at dots and hyphens; a run-together label such as
+    'acmeconsulting' has no word boundary inside it and is not classified.
+    All keywords are compiled into one alternation with a group per
+    industry, scanned in a single pass; the highest-priority industry found
+    wins.
+    """
+    
+    def __init__(self, industry_keywords: Iterable[Tuple[str, List[str]]] = INDUSTRY_KEYWORDS,
+                 cache_size: int = 65536):
+        self.industries = []
+        groups = []
+        
+        for priority, (industry, keywords) in enumerate(industry_keywords):
+            self.industries.append(industry)
+            patterns = [_keyword_pattern(keyword) for keyword in sorted(keywords, key=len, reverse=True)]
+            groups.append(f"(?P<i{priority}>{'|'.join(patterns)})")
+        
+        self._pattern = re.compile(rf"\b(?:{'|'.join(groups)})\b")
+        
+        # Memoized per instance; domains repeat heavily across a client's leads
+        self.classify_domain = lru_cache(maxsize=cache_size)(self._classify_domain)
+        self.normalize_industry = lru_cache(maxsize=cache_size)(self._normalize_industry)
+    
+    def _classify_text(self, text: str) -> Optional[str]:
+        best = None
+        for match in self._pattern.finditer(text):
+            priority = int(match.lastgroup[1:])
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+        return self.industries[best] if best is not None else None
+    
+    def _classify_domain(self, domain: Optional[str]) -> Optional[str]:
+        """
+        Guess industry from a domain name
+        
+        Args:
+            domain: Company domain (e.g. 'acme-consulting.com.au')
+        
+        Returns:
+            Industry label or None
+        """
+        if not domain:
+            return None
+        return self._classify_text(domain.lower())
+    
+    def _normalize_industry(self, industry: Optional[str]) -> Optional[str]:
+        """
+        Map a free-text industry (e.g. Lead.industry 'Hospital & Health Care')
+        onto an industry label
+        
+        Args:
+            industry: Industry text from a provider or user
+        
+        Returns:
+            Industry label or None
+        """
+        if not industry:
+            return None
+        return self._classify_text(industry.lower())
+    
+    def classify_domains(self, domains: List[str]) -> List[Optional[str]]:
+        """Classify a list of domains, in order"""
+        return [self.classify_domain(domain) for domain in domains]
+    
+    def classify_domains_unique(self, domains: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Classify distinct domains, returning a domain -> industry mapping"""
+        return {domain: self.classify_domain(domain) for domain in set(domains) if domain}
+
+
+# Built once at import and shared by the enrichment service and the lead scorers
+industry_classifier = IndustryClassifier()
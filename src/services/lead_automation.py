@@ -5,6 +5,8 @@ import time
 import schedule
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
+from contextlib import closing
+from itertools import islice
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add project root to path
@@ -12,9 +14,18 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from src.services.apollo_service import ApolloService
 from src.services.enrichment_service import EnrichmentService
-from src.models.lead import Lead, LeadCampaign, LeadSource, db
+from src.services.lead_scoring import LeadScoringEngine
+from src.models.lead import Lead, LeadSource, db
+from src.models.campaign import LeadCampaign
+from src.models.auth import Client, AdminSettings
+from src.services.db_writer import db_writer
 from flask import current_app
 
+
+def _env_flag(name, default='true'):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+
 class LeadAutomationService:
     """Main service for orchestrating automated lead generation"""
     
@@ -25,6 +36,9 @@ class LeadAutomationService:
         # Initialize services
         if self.apollo_api_key:
             self.apollo_service = ApolloService(self.apollo_api_key)
+            # Campaigns re-run the same searches and expect new people each run,
+            # so a cached page would only return leads they've already saved
+            self.apollo_service.search_cache = None
         else:
             self.apollo_service = None
             print("Warning: Apollo API key not provided")
@@ -36,6 +50,7 @@ class LeadAutomationService:
             print("Warning: Hunter API key not provided")
         
         self.max_workers = 3  # Concurrent workers for API calls
+        self.apollo_bulk_match = _env_flag('APOLLO_BULK_MATCH', 'false')  # unlock emails via people/bulk_match (spends match credits)
         self.daily_lead_limit = 500  # Daily limit to avoid excessive API usage
         
     def run_campaign(self, campaign_id: int) -> Dict:
@@ -55,65 +70,99 @@ class LeadAutomationService:
             if not campaign:
                 return {'error': 'Campaign not found', 'success': False}
             
-            if campaign.status != 'active':
-                return {'error': 'Campaign is not active', 'success': False}
-            
-            print(f"Starting campaign: {campaign.name}")
-            
-            # Check daily limits
-            today = datetime.utcnow().date()
-            today_leads = Lead.query.filter(
-                Lead.created_at >= today,
-                Lead.auto_generated == True
-            ).count()
-            
-            if today_leads >= self.daily_lead_limit:
-                return {
-                    'error': f'Daily lead limit reached ({self.daily_lead_limit})',
-                    'success': False
-                }
-            
-            remaining_quota = self.daily_lead_limit - today_leads
-            leads_to_generate = min(
-                campaign.leads_target - campaign.leads_generated,
-                remaining_quota
-            )
-            
-            if leads_to_generate <= 0:
-                return {
-                    'message': 'Campaign target reached or no quota remaining',
-                    'success': True,
-                    'leads_generated': 0
-                }
-            
-            # Build search configuration from campaign
-            search_config = self._build_search_config_from_campaign(campaign)
-            
-            # Generate leads
-            results = self._generate_leads_from_config(search_config, leads_to_generate)
-            
-            # Update campaign
-            campaign.leads_generated += results['leads_saved']
-            campaign.last_run = datetime.utcnow()
-            
-            if campaign.leads_generated >= campaign.leads_target:
-                campaign.status = 'completed'
-            
-            db.session.commit()
-            
-            return {
-                'success': True,
-                'campaign_name': campaign.name,
-                'leads_generated': results['leads_saved'],
-                'leads_enriched': results['leads_enriched'],
-                'total_campaign_leads': campaign.leads_generated,
-                'campaign_status': campaign.status
-            }
+            return self._run_campaign(campaign)
             
         except Exception as e:
             print(f"Error running campaign {campaign_id}: {e}")
             return {'error': str(e), 'success': False}
     
+    def run_campaign_for_client(self, campaign: LeadCampaign, client_id: int) -> Dict:
+        """
+        Run a campaign on behalf of a client
+        
+        Leads are assigned to the client, the daily quota is the campaign's
+        daily_limit, and the client's usage counters are updated in the same
+        transaction as the leads.
+        
+        Args:
+            campaign: LeadCampaign owned by the client
+            client_id: ID of the client running the campaign
+        
+        Returns:
+            Dictionary with campaign results
+        """
+        
+        try:
+            return self._run_campaign(campaign, client_id=client_id)
+        except Exception as e:
+            print(f"Error running campaign {campaign.id} for client {client_id}: {e}")
+            return {'error': str(e), 'success': False}
+    
+    def _run_campaign(self, campaign: LeadCampaign, client_id: int = None) -> Dict:
+        """Run a campaign for a client (by default the campaign's owner)"""
+        
+        # Scheduled runs don't name a client: leads still belong to the
+        # campaign's owner, are de-duplicated against it and count as its usage
+        if client_id is None:
+            client_id = campaign.client_id
+        
+        if campaign.status != 'active':
+            return {'error': 'Campaign is not active', 'success': False}
+        
+        print(f"Starting campaign: {campaign.name}")
+        
+        # Check daily limits
+        today = datetime.utcnow().date()
+        today_query = Lead.query.filter(
+            Lead.created_at >= today,
+            Lead.auto_generated == True
+        )
+        daily_limit = self.daily_lead_limit
+        if client_id is not None:
+            today_query = today_query.filter(Lead.client_id == client_id)
+            daily_limit = campaign.daily_limit or self.daily_lead_limit
+        today_leads = today_query.count()
+        
+        if today_leads >= daily_limit:
+            return {
+                'error': f'Daily lead limit reached ({daily_limit})',
+                'success': False
+            }
+        
+        remaining_quota = daily_limit - today_leads
+        leads_to_generate = min(
+            campaign.leads_target - (campaign.leads_generated or 0),
+            remaining_quota
+        )
+        
+        if leads_to_generate <= 0:
+            return {
+                'message': 'Campaign target reached or no quota remaining',
+                'success': True,
+                'leads_generated': 0
+            }
+        
+        # Build search configuration from campaign
+        search_config = self._build_search_config_from_campaign(campaign)
+        
+        # Generate leads; campaign metrics are committed with the leads
+        results = self._generate_leads_from_config(
+            search_config, leads_to_generate, client_id=client_id, campaign=campaign
+        )
+        
+        return {
+            'success': True,
+            'campaign_name': campaign.name,
+            'leads_generated': results['leads_saved'],
+            'leads_enriched': results['leads_enriched'],
+            'match_error': results['match_error'],
+            'duplicates_skipped': results['duplicates_skipped'],
+            'api_calls': results['api_calls'],
+            'cost': results['cost'],
+            'total_campaign_leads': campaign.leads_generated,
+            'campaign_status': campaign.status
+        }
+    
     def run_all_active_campaigns(self) -> List[Dict]:
         """
         Run all active campaigns
@@ -181,13 +230,23 @@ class LeadAutomationService:
             'configs_processed': len(search_configs)
         }
     
-    def _generate_leads_from_config(self, config: Dict, max_leads: int) -> Dict:
+    def _generate_leads_from_config(self, config: Dict, max_leads: int,
+                                    client_id: int = None, campaign: LeadCampaign = None) -> Dict:
         """
         Generate leads from a single search configuration
         
+        Apollo results are streamed page by page (ApolloService.iter_people):
+        each page is matched, de-duplicated, enriched and saved while the next
+        page is fetched in the background. Worker threads only call the
+        provider APIs. All session work happens on the calling thread: one
+        query for existing emails per page, then that page's lead inserts,
+        campaign metrics and client usage in a single commit.
+        
         Args:
             config: Search configuration dictionary
             max_leads: Maximum leads to generate
+            client_id: Client that owns the generated leads (optional)
+            campaign: Campaign whose metrics are updated (optional)
             
         Returns:
             Dictionary with results
@@ -195,100 +254,207 @@ class LeadAutomationService:
         
         leads_saved = 0
         leads_enriched = 0
+        leads_matched = 0
+        match_error = None
+        duplicates_skipped = 0
+        calls_before = self._api_call_counts()
+        self._set_attribution(client_id, campaign.id if campaign is not None else None)
+        recorded_calls = calls_before
+        page_size = min(max_leads, 25)
+        # New leads are scored with the owning client's weights
+        scoring_engine = LeadScoringEngine.for_client(
+            db.session.get(Client, client_id) if client_id is not None else None
+        )
         
         try:
-            # Search for people using Apollo
-            apollo_results = self.apollo_service.search_people(
-                person_titles=config.get('person_titles'),
-                person_locations=config.get('person_locations'),
-                organization_locations=config.get('organization_locations'),
-                organization_industries=config.get('organization_industries'),
-                organization_num_employees_ranges=config.get('organization_num_employees_ranges'),
-                person_seniorities=config.get('person_seniorities'),
-                per_page=min(max_leads, 25)
-            )
-            
-            if not apollo_results or 'people' not in apollo_results:
-                return {'leads_saved': 0, 'leads_enriched': 0}
-            
-            people = apollo_results['people'][:max_leads]
-            
-            # Process leads in parallel
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                future_to_person = {
-                    executor.submit(self._process_single_lead, person, config): person 
-                    for person in people
-                }
-                
-                for future in as_completed(future_to_person):
-                    try:
-                        result = future.result()
-                        if result['saved']:
-                            leads_saved += 1
-                        if result['enriched']:
-                            leads_enriched += 1
-                    except Exception as e:
-                        print(f"Error processing lead: {e}")
-                        continue
-            
+            with closing(self.apollo_service.iter_people(config, max_leads, per_page=page_size)) as people_stream:
+                while True:
+                    people = list(islice(people_stream, page_size))
+                    if not people:
+                        break
+                    
+                    # Unlock emails in bulk first, so duplicates are caught by address
+                    # (stopped for this run once Apollo refuses the key)
+                    if self.apollo_bulk_match and match_error is None:
+                        leads_matched += self._match_apollo_people(people)
+                        match_error = self.apollo_service.match_error
+                    
+                    # Skip existing and repeated emails before spending enrichment calls
+                    existing_emails = self._existing_emails(
+                        [person.get('email') for person in people], client_id
+                    )
+                    new_people = []
+                    for person in people:
+                        email = person.get('email')
+                        if email and email in existing_emails:
+                            duplicates_skipped += 1
+                            continue
+                        if email:
+                            existing_emails.add(email)
+                        new_people.append(person)
+                    
+                    # Build and enrich leads in parallel
+                    leads = []
+                    with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                        futures = [
+                            executor.submit(self._prepare_single_lead, person, config, scoring_engine)
+                            for person in new_people
+                        ]
+                        
+                        for future in as_completed(futures):
+                            try:
+                                result = future.result()
+                                if result['lead'] is not None:
+                                    leads.append(result['lead'])
+                                if result['enriched']:
+                                    leads_enriched += 1
+                            except Exception as e:
+                                print(f"Error processing lead: {e}")
+                                continue
+                    
+                    if client_id is not None:
+                        for lead in leads:
+                            lead.client_id = client_id
+                    
+                    # Calls since the previous page was recorded (including the
+                    # prefetch of the next page), so the pages add up to the total
+                    counts = self._api_call_counts()
+                    page_calls = {provider: counts[provider] - recorded_calls.get(provider, 0) for provider in counts}
+                    recorded_calls = counts
+                    
+                    # Leads, campaign metrics and client usage in one transaction,
+                    # applied by the single writer thread when it is enabled
+                    leads_saved += db_writer.run(
+                        _save_generated_leads,
+                        [_lead_row(lead) for lead in leads],
+                        campaign_id=campaign.id if campaign is not None else None,
+                        client_id=client_id,
+                        api_calls=page_calls,
+                        cost=self._api_cost(page_calls)
+                    )
+        
         except Exception as e:
             print(f"Error in _generate_leads_from_config: {e}")
+            db.session.rollback()
+        
+        api_calls = self._api_calls_since(calls_before)
+        cost = self._api_cost(api_calls)
         
         return {
             'leads_saved': leads_saved,
-            'leads_enriched': leads_enriched
+            'leads_enriched': leads_enriched,
+            'leads_matched': leads_matched,
+            'match_error': match_error,
+            'duplicates_skipped': duplicates_skipped,
+            'api_calls': api_calls,
+            'cost': cost
         }
     
-    def _process_single_lead(self, person_data: Dict, config: Dict) -> Dict:
+    def _match_apollo_people(self, people: List[Dict]) -> int:
+        """
+        Fill locked or missing emails (and other fields) from Apollo matches
+        
+        People are matched in bulk groups (ApolloService.bulk_match_people),
+        so a page of 25 costs a few calls instead of one per person.
+        
+        Args:
+            people: Apollo search results, updated in place
+        
+        Returns:
+            Number of people matched
+        """
+        
+        pending = [
+            person for person in people
+            if not person.get('email') or person['email'].startswith('email_not_unlocked')
+        ]
+        if not pending:
+            return 0
+        
+        matched = 0
+        for person, match in zip(pending, self.apollo_service.bulk_match_people(pending)):
+            if not match:
+                continue
+            person.update({key: value for key, value in match.items() if value not in (None, '', [], {})})
+            matched += 1
+        return matched
+    
+    def _prepare_single_lead(self, person_data: Dict, config: Dict,
+                             scoring_engine: LeadScoringEngine = None) -> Dict:
         """
-        Process a single lead: create, enrich, and save
+        Build and enrich a single lead without touching the database session
         
         Args:
             person_data: Apollo person data
             config: Search configuration
+            scoring_engine: Engine with the client's scoring weights (default weights if None)
             
         Returns:
-            Dictionary with processing results
+            Dictionary with the unsaved lead (or None) and enrichment flag
         """
         
+        # Create lead from Apollo data
+        lead = Lead.from_apollo_data(person_data, scoring_engine)
+        if not lead:
+            return {'lead': None, 'enriched': False, 'reason': 'creation_failed'}
+        
+        # Add config information
+        tags = json.loads(lead.tags) if lead.tags else []
+        tags.append(config.get('name', 'unknown_config'))
+        lead.tags = json.dumps(tags)
+        
+        # Enrich lead if enrichment service is available
+        enriched = False
+        if self.enrichment_service and lead.email:
+            try:
+                enrichment_data = self.enrichment_service.enrich_lead(lead.email)
+                if enrichment_data:
+                    self._apply_enrichment_data(lead, enrichment_data)
+                    lead.enriched = True
+                    enriched = True
+            except Exception as e:
+                print(f"Enrichment failed for {lead.email}: {e}")
+        
+        return {'lead': lead, 'enriched': enriched}
+    
+    def _existing_emails(self, emails: List[str], client_id: int = None) -> set:
+        """Emails among the given ones that already exist (per client when scoped)"""
+        emails = list({email for email in emails if email})
+        if not emails:
+            return set()
+        
+        query = db.session.query(Lead.email).filter(Lead.email.in_(emails))
+        if client_id is not None:
+            query = query.filter(Lead.client_id == client_id)
+        return {row[0] for row in query}
+    
+    def _set_attribution(self, client_id: int = None, campaign_id: int = None):
+        """Attribute subsequent provider calls to a client and campaign in the call ledger"""
+        attribution = {'client_id': client_id, 'campaign_id': campaign_id}
+        for service in (self.apollo_service, self.enrichment_service):
+            if service:
+                service.attribution = attribution
+    
+    def _api_call_counts(self) -> Dict[str, int]:
+        """Current HTTP call counters of the provider services"""
+        return {
+            'apollo': self.apollo_service.api_calls if self.apollo_service else 0,
+            'hunter': self.enrichment_service.api_calls if self.enrichment_service else 0
+        }
+    
+    def _api_calls_since(self, before: Dict[str, int]) -> Dict[str, int]:
+        """Provider API calls made since a counter snapshot"""
+        now = self._api_call_counts()
+        return {provider: now[provider] - before.get(provider, 0) for provider in now}
+    
+    def _api_cost(self, api_calls: Dict[str, int]) -> float:
+        """Cost of API calls using the per-call prices in admin settings"""
         try:
-            # Check if lead already exists
-            email = person_data.get('email')
-            if email and Lead.query.filter_by(email=email).first():
-                return {'saved': False, 'enriched': False, 'reason': 'duplicate'}
-            
-            # Create lead from Apollo data
-            lead = Lead.from_apollo_data(person_data)
-            if not lead:
-                return {'saved': False, 'enriched': False, 'reason': 'creation_failed'}
-            
-            # Add config information
-            tags = json.loads(lead.tags) if lead.tags else []
-            tags.append(config.get('name', 'unknown_config'))
-            lead.tags = json.dumps(tags)
-            
-            # Enrich lead if enrichment service is available
-            enriched = False
-            if self.enrichment_service and lead.email:
-                try:
-                    enrichment_data = self.enrichment_service.enrich_lead(lead.email)
-                    if enrichment_data:
-                        self._apply_enrichment_data(lead, enrichment_data)
-                        lead.enriched = True
-                        enriched = True
-                except Exception as e:
-                    print(f"Enrichment failed for {lead.email}: {e}")
-            
-            # Save to database
-            db.session.add(lead)
-            db.session.commit()
-            
-            return {'saved': True, 'enriched': enriched, 'lead_id': lead.id}
-            
+            costs = AdminSettings.get_settings().get_api_costs()
         except Exception as e:
-            print(f"Error processing single lead: {e}")
-            db.session.rollback()
-            return {'saved': False, 'enriched': False, 'reason': str(e)}
+            print(f"Could not load API costs: {e}")
+            return 0.0
+        return round(sum(calls * costs.get(provider, 0.0) for provider, calls in api_calls.items()), 4)
     
     def _apply_enrichment_data(self, lead: Lead, enrichment_data: Dict):
         """
@@ -337,26 +503,30 @@ class LeadAutomationService:
             Search configuration dictionary
         """
         
+        def json_list(value):
+            return json.loads(value) if value else None
+        
         config = {
             'name': campaign.name,
-            'person_titles': json.loads(campaign.target_titles) if campaign.target_titles else None,
-            'person_locations': [campaign.target_location] if campaign.target_location else None,
-            'organization_industries': [campaign.target_industry] if campaign.target_industry else None
+            'person_titles': json_list(campaign.target_titles),
+            'person_locations': json_list(campaign.target_locations),
+            'organization_industries': json_list(campaign.target_industries),
+            'person_seniorities': json_list(campaign.target_seniorities)
         }
         
-        # Convert company size to employee ranges
-        if campaign.target_company_size:
+        # Convert company sizes to employee ranges
+        company_sizes = json_list(campaign.target_company_sizes)
+        if company_sizes:
             size_mapping = {
-                'startup': ['1,10'],
-                'small': ['11,50'],
-                'medium': ['51,200'],
-                'large': ['201,1000'],
-                'enterprise': ['1001,10000']
+                'startup': '1,10',
+                'small': '11,50',
+                'medium': '51,200',
+                'large': '201,1000',
+                'enterprise': '1001,10000'
             }
-            config['organization_num_employees_ranges'] = size_mapping.get(
-                campaign.target_company_size.lower(), 
-                ['1,50']
-            )
+            config['organization_num_employees_ranges'] = [
+                size_mapping.get(size.lower(), size) for size in company_sizes
+            ]
         
         return config
     
@@ -374,11 +544,25 @@ class LeadAutomationService:
             
             # Log results to database or file
             self._log_automation_results(results)
+            
+            # LinkedIn budgets have reset: continue paused (and retry failed) batch enrichment
+            from src.services.linkedin_enrichment import resume_linkedin_enrichment_jobs
+            jobs = resume_linkedin_enrichment_jobs()
+            if jobs:
+                print(f"Resumed {len(jobs)} LinkedIn enrichment jobs")
+        
+        def refresh_tokens_job():
+            # One refresher for the deployment, rather than a thread per app process
+            from src.services.linkedin_tokens import linkedin_token_refresher
+            result = linkedin_token_refresher.refresh_due()
+            if result['refreshed'] or result['failed']:
+                print(f"LinkedIn tokens refreshed: {result['refreshed']}, failed: {result['failed']}")
         
         # Schedule for 9 AM daily
         schedule.every().day.at("09:00").do(daily_job)
+        schedule.every().hour.do(refresh_tokens_job)
         
-        print("Daily automation scheduled for 9:00 AM")
+        print("Daily automation scheduled for 9:00 AM (LinkedIn token refresh hourly)")
     
     def _log_automation_results(self, results: List[Dict]):
         """
@@ -441,36 +625,68 @@ class LeadAutomationService:
 
 
 # Utility functions for setup and testing
-def create_sample_campaign(automation_service: LeadAutomationService) -> int:
+def _lead_row(lead: Lead) -> Dict:
+    """Column values of an unsaved lead, for inserting outside the caller's session"""
+    return {
+        column.key: getattr(lead, column.key)
+        for column in Lead.__table__.columns
+        if getattr(lead, column.key) is not None
+    }
+
+
+def _save_generated_leads(session, lead_rows: List[Dict], campaign_id: int = None,
+                          client_id: int = None, api_calls: Dict[str, int] = None, cost: float = 0.0) -> int:
+    """
+    Write job: insert generated leads and update campaign metrics and client usage
+    
+    Returns:
+        Number of leads inserted
+    """
+    
+    if lead_rows:
+        if campaign_id is not None:
+            for row in lead_rows:
+                row['campaign_id'] = campaign_id
+        session.execute(db.insert(Lead), lead_rows)
+    if campaign_id is not None:
+        campaign = session.get(LeadCampaign, campaign_id)
+        if campaign:
+            campaign.record_generation([row.get('score') or 0 for row in lead_rows], api_calls, cost)
+    if client_id is not None and lead_rows:
+        client = session.get(Client, client_id)
+        if client:
+            client.increment_lead_usage(len(lead_rows), commit=False)
+    return len(lead_rows)
+
+
+def create_sample_campaign(automation_service: LeadAutomationService, client_id: int) -> int:
     """
     Create a sample campaign for testing
     
     Args:
         automation_service: LeadAutomationService instance
+        client_id: ID of the client owning the campaign
         
     Returns:
         Campaign ID
     """
     
-    campaign = LeadCampaign(
+    campaign = LeadCampaign.create_campaign(
+        client_id=client_id,
         name="Sydney Corporate Wellness Leads",
         description="Target corporate wellness consultants in Sydney",
-        target_industry="Corporate Wellness",
-        target_location="Sydney, AU",
-        target_company_size="medium",
-        target_titles=json.dumps([
+        target_industries=["Corporate Wellness"],
+        target_locations=["Sydney, AU"],
+        target_company_sizes=["medium"],
+        target_titles=[
             "Consultant", "Senior Consultant", "Director", 
             "Managing Director", "Wellness Consultant"
-        ]),
+        ],
         leads_target=50,
-        api_source="apollo",
-        auto_enrich=True,
-        auto_score=True
+        use_apollo=True,
+        use_hunter=True
     )
     
-    db.session.add(campaign)
-    db.session.commit()
-    
     return campaign.id
 
 
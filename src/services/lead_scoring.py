@@ -0,0 +1,323 @@
+import os
+import sys
+import re
+import json
+from typing import List, Dict, Optional, Iterable
+from datetime import datetime
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.models.lead import Lead, db
+from src.services.industry_classifier import industry_classifier
+
+# Default scoring weights (Australian B2B focus). Clients override any subset
+# through Client.scoring_weights.
+DEFAULT_SCORING_WEIGHTS = {
+    'base': 50,
+    'company_size': {
+        'enterprise': 20,  # more than 1000 employees
+        'large': 15,       # more than 100
+        'medium': 10,      # more than 50
+        'small': 5         # more than 10
+    },
+    'seniority': {
+        'c_level': 25,
+        'director': 20,
+        'manager': 15,
+        'senior': 10
+    },
+    'industry': 15,
+    'high_value_industries': [
+        'consulting', 'professional services', 'technology', 'finance',
+        'healthcare', 'wellness'
+    ],
+    'verified': 10,
+    'linkedin': 5
+}
+
+# Keywords for each seniority tier, checked in order against "seniority title"
+SENIORITY_KEYWORDS = (
+    ('c_level', ['c-level', 'c level', 'c_suite', 'c-suite', 'ceo', 'cto', 'cfo', 'coo',
+                 'chief', 'president', 'founder', 'owner']),
+    ('director', ['director', 'vp', 'vice president']),
+    ('manager', ['manager', 'head']),
+    ('senior', ['senior', 'lead'])
+)
+
+# Employee count thresholds for each company size tier
+COMPANY_SIZE_THRESHOLDS = (
+    ('enterprise', 1000),
+    ('large', 100),
+    ('medium', 50),
+    ('small', 10)
+)
+
+# Size labels used by providers and EnrichmentService._estimate_company_size
+COMPANY_SIZE_LABELS = {
+    'enterprise': 'enterprise',
+    'large': 'enterprise',
+    'medium': 'large',
+    'small': 'small'
+}
+
+_NUMBER = re.compile(r'\d+')
+# Apollo writes ranges as 'low,high' ('51,200'); any other comma between
+# digits is a thousands separator ('1,001-5,000')
+_APOLLO_RANGE = re.compile(r'^\s*(\d+),(\d+)\s*$')
+_THOUSANDS = re.compile(r'(?<=\d),(?=\d{3}(?!\d))')
+
+SCORING_FIELDS = ('title', 'seniority', 'industry', 'employees', 'company_size', 'verified', 'linkedin_url')
+
+
+def _keyword_pattern(keywords: Iterable[str]) -> re.Pattern:
+    """Compile keywords into one word-bounded alternation, longest first"""
+    alternation = '|'.join(re.escape(k) for k in sorted(set(keywords), key=len, reverse=True))
+    return re.compile(rf'(?<![a-z0-9])(?:{alternation})(?![a-z0-9])')
+
+
+def _merge_weights(overrides: Optional[Dict]) -> Dict:
+    """Overlay client weights on the defaults, one level deep"""
+    weights = json.loads(json.dumps(DEFAULT_SCORING_WEIGHTS))
+    for key, value in (overrides or {}).items():
+        if key not in weights:
+            continue
+        if isinstance(weights[key], dict) and isinstance(value, dict):
+            weights[key].update({k: v for k, v in value.items() if k in weights[key]})
+        else:
+            weights[key] = value
+    return weights
+
+
+def company_size_tier(employees=None, company_size: Optional[str] = None) -> Optional[str]:
+    """
+    Resolve a company size tier from an employee count or a size string
+    
+    Size strings may be ranges ('11-50', '51,200', '1,001-5,000'), open
+    ranges ('1000+') or labels ('Large', 'medium'). Ranges are placed by
+    their upper bound, open ranges just above their bound.
+    """
+    count = None
+    if employees:
+        try:
+            count = int(employees)
+        except (TypeError, ValueError):
+            count = None
+    
+    if count is None and company_size:
+        size = str(company_size).lower()
+        apollo_range = _APOLLO_RANGE.match(size)
+        if apollo_range and int(apollo_range.group(2)) > int(apollo_range.group(1)):
+            numbers = list(apollo_range.groups())
+        else:
+            numbers = _NUMBER.findall(_THOUSANDS.sub('', size))
+        if numbers:
+            count = max(int(number) for number in numbers) + (1 if size.rstrip().endswith('+') else 0)
+        else:
+            for label, tier in COMPANY_SIZE_LABELS.items():
+                if label in size:
+                    return tier
+    
+    if count is None:
+        return None
+    
+    for tier, threshold in COMPANY_SIZE_THRESHOLDS:
+        if count > threshold:
+            return tier
+    return None
+
+
+class LeadScoringEngine:
+    """
+    Single lead scorer with a column-oriented batch API
+    
+    Keyword lists are compiled once per weight set into regex alternations, and
+    each distinct title/industry string is classified once per batch.
+    """
+    
+    _engines = {}
+    
+    def __init__(self, weights: Optional[Dict] = None):
+        self.weights = _merge_weights(weights)
+        self._seniority_patterns = [
+            (tier, _keyword_pattern(keywords)) for tier, keywords in SENIORITY_KEYWORDS
+        ]
+        industries = self.weights['high_value_industries'] or []
+        self._industry_pattern = _keyword_pattern(industries) if industries else None
+        # Industry labels of the high-value list, so 'Hospital & Health Care' counts as healthcare
+        self._industry_labels = {industry_classifier.normalize_industry(i) for i in industries} - {None}
+    
+    @classmethod
+    def for_weights(cls, weights: Optional[Dict] = None) -> 'LeadScoringEngine':
+        """Get a cached engine for a weight set"""
+        cache_key = json.dumps(weights or {}, sort_keys=True)
+        engine = cls._engines.get(cache_key)
+        if engine is None:
+            engine = cls(weights)
+            cls._engines[cache_key] = engine
+        return engine
+    
+    @classmethod
+    def for_client(cls, client) -> 'LeadScoringEngine':
+        """Get the engine for a client's configured weights"""
+        weights = None
+        if client is not None and getattr(client, 'scoring_weights', None):
+            try:
+                weights = json.loads(client.scoring_weights)
+            except ValueError:
+                weights = None
+        return cls.for_weights(weights)
+    
+    def _seniority_tier(self, text: str) -> Optional[str]:
+        for tier, pattern in self._seniority_patterns:
+            if pattern.search(text):
+                return tier
+        return None
+    
+    def score_columns(self, columns: Dict[str, List]) -> List[int]:
+        """
+        Score leads given as column arrays
+        
+        Args:
+            columns: Dictionary of equal-length lists keyed by SCORING_FIELDS
+                (missing columns count as empty)
+        
+        Returns:
+            List of scores in the same order
+        """
+        size = max((len(values) for values in columns.values()), default=0)
+        empty = [None] * size
+        
+        def column(name):
+            values = columns.get(name)
+            return values if values is not None else empty
+        
+        weights = self.weights
+        size_weights = weights['company_size']
+        seniority_weights = weights['seniority']
+        
+        # Company size points
+        size_points = [
+            size_weights.get(company_size_tier(employees, company_size), 0)
+            for employees, company_size in zip(column('employees'), column('company_size'))
+        ]
+        
+        # Seniority points, classifying each distinct text once
+        seniority_cache = {}
+        seniority_points = []
+        for seniority, title in zip(column('seniority'), column('title')):
+            text = f"{seniority or ''} {title or ''}".lower()
+            points = seniority_cache.get(text)
+            if points is None:
+                points = seniority_weights.get(self._seniority_tier(text), 0)
+                seniority_cache[text] = points
+            seniority_points.append(points)
+        
+        # Industry points
+        industry_cache = {}
+        industry_points = []
+        for industry in column('industry'):
+            text = (industry or '').lower()
+            points = industry_cache.get(text)
+            if points is None:
+                matched = (
+                    (self._industry_pattern is not None and self._industry_pattern.search(text))
+                    or industry_classifier.normalize_industry(text) in self._industry_labels
+                )
+                points = weights['industry'] if matched else 0
+                industry_cache[text] = points
+            industry_points.append(points)
+        
+        verified_points = [weights['verified'] if v else 0 for v in column('verified')]
+        linkedin_points = [weights['linkedin'] if v else 0 for v in column('linkedin_url')]
+        
+        base = weights['base']
+        return [
+            min(max(base + sum(parts), 0), 100)
+            for parts in zip(size_points, seniority_points, industry_points, verified_points, linkedin_points)
+        ]
+    
+    def score_batch(self, records: List[Dict]) -> List[int]:
+        """Score a list of lead dictionaries (Lead columns)"""
+        columns = {field: [record.get(field) for record in records] for field in SCORING_FIELDS}
+        columns['verified'] = [
+            record.get('verified') or record.get('email_status') == 'verified' for record in records
+        ]
+        return self.score_columns(columns)
+    
+    def score(self, record: Dict) -> int:
+        """Score a single lead dictionary"""
+        return self.score_batch([record])[0]
+    
+    def score_apollo_people(self, people: List[Dict]) -> List[int]:
+        """Score raw Apollo person records"""
+        organizations = [person.get('organization') or {} for person in people]
+        return self.score_columns({
+            'title': [person.get('title') for person in people],
+            'seniority': [person.get('seniority') for person in people],
+            'industry': [org.get('industry') for org in organizations],
+            'employees': [org.get('estimated_num_employees') for org in organizations],
+            'verified': [person.get('email_status') == 'verified' for person in people],
+            'linkedin_url': [person.get('linkedin_url') for person in people]
+        })
+
+
+def rescore_client_leads(client_id: int, engine: LeadScoringEngine = None, chunk_size: int = 5000) -> Dict:
+    """
+    Recompute Lead.score for a client's whole table in chunks
+    
+    Reads only the scoring columns with keyset pagination and writes changed
+    scores back with one bulk UPDATE per chunk.
+    
+    Args:
+        client_id: Client whose leads are rescored
+        engine: Scoring engine (defaults to the client's weights)
+        chunk_size: Leads per chunk and per transaction
+    
+    Returns:
+        Dictionary with counts of leads scanned and updated
+    """
+    
+    if engine is None:
+        from src.models.auth import Client
+        engine = LeadScoringEngine.for_client(Client.query.get(client_id))
+    
+    fields = ('id', 'score') + tuple(f for f in SCORING_FIELDS if f != 'seniority')
+    columns = [getattr(Lead, field) for field in fields]
+    
+    scanned = 0
+    updated = 0
+    last_id = 0
+    started = datetime.utcnow()
+    
+    while True:
+        rows = db.session.query(*columns).filter(
+            Lead.client_id == client_id,
+            Lead.id > last_id
+        ).order_by(Lead.id).limit(chunk_size).all()
+        
+        if not rows:
+            break
+        
+        data = dict(zip(fields, zip(*rows)))
+        scores = engine.score_columns(data)
+        
+        changes = [
+            {'id': lead_id, 'score': score}
+            for lead_id, old_score, score in zip(data['id'], data['score'], scores)
+            if old_score != score
+        ]
+        if changes:
+            db.session.execute(db.update(Lead), changes)
+        db.session.commit()
+        
+        scanned += len(rows)
+        updated += len(changes)
+        last_id = data['id'][-1]
+    
+    return {
+        'client_id': client_id,
+        'leads_scanned': scanned,
+        'leads_updated': updated,
+        'duration_seconds': (datetime.utcnow() - started).total_seconds()
+    }
@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Iterable
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from sqlalchemy.exc import IntegrityError
+
+from src.models.base import db
+from src.models.linkedin_company import LinkedInCompany, LinkedInCompanyName, SHARED_SCOPE
+from src.services.dedupe_service import normalize_company
+
+
+def _env_flag(name, default='true'):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+
+class LinkedInCompanyCache:
+    """
+    Persistent cache of LinkedIn company lookups
+    
+    Two maps, both with a TTL:
+    - company id -> details from companies/{id}
+    - normalized company name -> company id, or None when a search found no
+      match (negative entries expire sooner, LINKEDIN_NEGATIVE_TTL_DAYS)
+    
+    Company data is public, so entries are shared by all clients unless
+    LINKEDIN_CACHE_SHARED is false, in which case each client gets its own.
+    Writes commit immediately so a lookup paid for with the daily LinkedIn
+    budget is kept even if the request that made it fails later.
+    """
+    
+    def __init__(self, client_id: int = None, shared: bool = None,
+                 ttl_days: float = None, negative_ttl_days: float = None):
+        if shared is None:
+            shared = _env_flag('LINKEDIN_CACHE_SHARED')
+        self.scope = SHARED_SCOPE if shared or client_id is None else client_id
+        self.ttl = timedelta(days=ttl_days if ttl_days is not None else float(os.getenv('LINKEDIN_CACHE_TTL_DAYS', 30)))
+        self.negative_ttl = timedelta(
+            days=negative_ttl_days if negative_ttl_days is not None else float(os.getenv('LINKEDIN_NEGATIVE_TTL_DAYS', 7))
+        )
+        self.hits = 0
+        self.misses = 0
+    
+    def get_companies(self, company_ids: Iterable) -> Dict[str, Dict]:
+        """
+        Cached, unexpired details for the given company ids
+        
+        Returns:
+            Dictionary of company id (as str) -> details; missing ids are misses
+        """
+        company_ids = {str(company_id) for company_id in company_ids if company_id}
+        if not company_ids:
+            return {}
+        
+        rows = LinkedInCompany.query.filter(
+            LinkedInCompany.scope == self.scope,
+            LinkedInCompany.company_id.in_(company_ids),
+            LinkedInCompany.expires_at > datetime.utcnow()
+        ).with_entities(LinkedInCompany.company_id, LinkedInCompany.details).all()
+        
+        found = {company_id: json.loads(details) for company_id, details in rows if details}
+        self.hits += len(found)
+        self.misses += len(company_ids) - len(found)
+        return found
+    
+    def get_company(self, company_id) -> Optional[Dict]:
+        return self.get_companies([company_id]).get(str(company_id))
+    
+    def put_companies(self, companies: List[Tuple[str, Optional[str], Dict]]):
+        """
+        Store company details
+        
+        Args:
+            companies: (company id, name, details) tuples
+        """
+        if not companies:
+            return
+        now = datetime.utcnow()
+        by_id = {str(company_id): (name, details) for company_id, name, details in companies}
+        existing = {
+            row.company_id: row for row in LinkedInCompany.query.filter(
+                LinkedInCompany.scope == self.scope, LinkedInCompany.company_id.in_(by_id)
+            )
+        }
+        for company_id, (name, details) in by_id.items():
+            row = existing.get(company_id)
+            if row is None:
+                row = LinkedInCompany(scope=self.scope, company_id=company_id)
+                db.session.add(row)
+            row.name = name or row.name
+            row.details = json.dumps(details)
+            row.fetched_at = now
+            row.expires_at = now + self.ttl
+        self._commit()
+    
+    def lookup_name(self, name: str) -> Tuple[bool, Optional[str]]:
+        """
+        Resolve a company name from the cache
+        
+        Returns:
+            (hit, company_id): hit is False when the name must be searched;
+            a hit with company_id None means the name is known not to match
+        """
+        normalized = normalize_company(name)
+        if not normalized:
+            return False, None
+        row = LinkedInCompanyName.query.filter(
+            LinkedInCompanyName.scope == self.scope,
+            LinkedInCompanyName.normalized_name == normalized,
+            LinkedInCompanyName.expires_at > datetime.utcnow()
+        ).first()
+        if row is None:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, row.company_id
+    
+    def put_names(self, names: Dict[str, Optional[str]]):
+        """
+        Store name -> company id mappings (None records a not-found name)
+        
+        A positive mapping is never overwritten by a negative one.
+        """
+        now = datetime.utcnow()
+        by_name = {}
+        for name, company_id in names.items():
+            normalized = normalize_company(name)
+            if normalized:
+                company_id = str(company_id) if company_id else None
+                by_name[normalized] = company_id or by_name.get(normalized)
+        if not by_name:
+            return
+        
+        existing = {
+            row.normalized_name: row for row in LinkedInCompanyName.query.filter(
+                LinkedInCompanyName.scope == self.scope, LinkedInCompanyName.normalized_name.in_(by_name)
+            )
+        }
+        for normalized, company_id in by_name.items():
+            row = existing.get(normalized)
+            if row is None:
+                row = LinkedInCompanyName(scope=self.scope, normalized_name=normalized)
+                db.session.add(row)
+            elif company_id is None and row.company_id and row.expires_at > now:
+                continue
+            row.company_id = company_id
+            row.resolved_at = now
+            row.expires_at = now + (self.ttl if company_id else self.negative_ttl)
+        self._commit()
+    
+    def put_name(self, name: str, company_id: Optional[str]):
+        self.put_names({name: company_id})
+    
+    def _commit(self):
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker cached the same key first; theirs is as good as ours
+            db.session.rollback()
+    
+    def purge_expired(self) -> int:
+        """Delete expired entries; returns the number of rows removed"""
+        now = datetime.utcnow()
+        removed = LinkedInCompany.query.filter(LinkedInCompany.expires_at <= now).delete(synchronize_session=False)
+        removed += LinkedInCompanyName.query.filter(LinkedInCompanyName.expires_at <= now).delete(synchronize_session=False)
+        db.session.commit()
+        return removed
@@ -0,0 +1,313 @@
+import os
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from flask import current_app
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.models.base import db
+from src.models.lead import Lead
+from src.models.auth import Client
+from src.models.linkedin_company import LinkedInEnrichmentJob
+from src.services.dedupe_service import normalize_company
+from src.services.linkedin_cache import LinkedInCompanyCache
+from src.services.api_budget import LinkedInCallBudget
+from src.services.linkedin_service import LinkedInService, LinkedInLeadGenService
+
+# Worst case for one uncached company: name search plus company details
+CALLS_PER_COMPANY = 2
+
+# Jobs that resume from their checkpoint instead of starting over
+ACTIVE_STATUSES = ('pending', 'running', 'paused', 'failed')
+
+# A 'running' job whose checkpoint hasn't moved for this long lost its run
+# (crashed or frozen process) and may be claimed by another
+RUN_LEASE = timedelta(minutes=15)
+
+# Consecutive failed runs after which the daily resume gives up on a job
+MAX_FAILED_RUNS = 3
+
+
+class LinkedInBatchEnricher:
+    """
+    Batch LinkedIn enrichment of a client's existing leads
+    
+    Leads are grouped by normalized company name, so each company is resolved
+    once (through the shared company cache) however many leads it has, and
+    the result is written to all of them with one bulk UPDATE. Only empty
+    industry / company size / website fields are filled; enriched is set.
+    
+    Progress is checkpointed per company in LinkedInEnrichmentJob, in the
+    same transaction as the UPDATE. When the LinkedIn daily quota
+    (LinkedInCallBudget) runs out, or a run reaches max_companies, the job
+    pauses and the next run continues after the last finished company;
+    resolutions are cached as soon as they are fetched, so no call is repeated
+    even if a run dies between the fetch and the checkpoint. A run claims its
+    job first, so a job is only ever processed by one run at a time.
+    """
+    
+    def __init__(self, client: Client, linkedin_service: LinkedInService = None,
+                 company_cache: LinkedInCompanyCache = None):
+        self.client = client
+        self.linkedin_service = linkedin_service or LinkedInService(
+            client_id=client.linkedin_client_id,
+            client_secret=client.linkedin_client_secret,
+            access_token=client.linkedin_access_token
+        )
+        self.linkedin_service.attribution = {'client_id': client.id}
+        if self.linkedin_service.budget is None:
+            self.linkedin_service.budget = LinkedInCallBudget.for_client(client.id)
+        self.company_cache = company_cache or LinkedInCompanyCache(client.id)
+        self.leadgen_service = LinkedInLeadGenService(self.linkedin_service, company_cache=self.company_cache)
+    
+    @staticmethod
+    def active_job(client_id: int) -> Optional[LinkedInEnrichmentJob]:
+        """The client's unfinished job, if any"""
+        return LinkedInEnrichmentJob.query.filter(
+            LinkedInEnrichmentJob.client_id == client_id,
+            LinkedInEnrichmentJob.status.in_(ACTIVE_STATUSES)
+        ).order_by(LinkedInEnrichmentJob.id.desc()).first()
+    
+    def start_job(self) -> LinkedInEnrichmentJob:
+        """Resume the client's active job or snapshot a new one"""
+        job = self.active_job(self.client.id)
+        if job is not None:
+            return job
+        
+        max_lead_id = db.session.query(db.func.max(Lead.id)).filter(Lead.client_id == self.client.id).scalar() or 0
+        job = LinkedInEnrichmentJob(client_id=self.client.id, status='pending', max_lead_id=max_lead_id)
+        job.companies_total = len(self._company_groups(job))
+        db.session.add(job)
+        db.session.commit()
+        return job
+    
+    def _company_groups(self, job: LinkedInEnrichmentJob) -> List[Tuple[str, List[str]]]:
+        """
+        Remaining companies in checkpoint order
+        
+        Returns:
+            (normalized name, raw company values) pairs after job.last_company
+        """
+        rows = db.session.query(Lead.company).filter(
+            Lead.client_id == job.client_id,
+            Lead.id <= job.max_lead_id,
+            Lead.company.isnot(None),
+            Lead.company != ''
+        ).distinct().all()
+        
+        groups = {}
+        for (company,) in rows:
+            normalized = normalize_company(company)
+            if normalized:
+                groups.setdefault(normalized, []).append(company)
+        
+        return [
+            (normalized, groups[normalized]) for normalized in sorted(groups)
+            if job.last_company is None or normalized > job.last_company
+        ]
+    
+    def _is_cached(self, company_name: str) -> bool:
+        """True if resolving this company costs no API calls"""
+        hit, company_id = self.company_cache.lookup_name(company_name)
+        if not hit:
+            return False
+        return company_id is None or self.company_cache.get_company(company_id) is not None
+    
+    def _budget_left(self) -> bool:
+        """True if the quota still covers an uncached company (a search and a details call)"""
+        budget = self.linkedin_service.budget
+        return budget is None or budget.remaining('normal') >= CALLS_PER_COMPANY
+    
+    def _apply(self, job: LinkedInEnrichmentJob, raw_names: List[str], company_details: Dict) -> int:
+        """Bulk UPDATE every snapshot lead of one company; returns rows updated"""
+        fields = LinkedInLeadGenService.company_details_to_lead_fields(company_details)
+        
+        def fill(column, value):
+            return db.func.coalesce(db.func.nullif(column, ''), value) if value else column
+        
+        result = db.session.execute(
+            db.update(Lead)
+            .where(
+                Lead.client_id == job.client_id,
+                Lead.id <= job.max_lead_id,
+                Lead.company.in_(raw_names)
+            )
+            .values(
+                industry=fill(Lead.industry, fields.get('industry')),
+                company_size=fill(Lead.company_size, fields.get('company_size')),
+                source_url=fill(Lead.source_url, fields.get('source_url')),
+                enriched=True
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount or 0
+    
+    @staticmethod
+    def _claim(job: LinkedInEnrichmentJob) -> bool:
+        """
+        Mark a job running unless another run holds it
+        
+        A single conditional UPDATE, so two processes can't both claim a job.
+        A running job is only taken over once its lease has expired.
+        """
+        now = datetime.utcnow()
+        result = db.session.execute(
+            db.update(LinkedInEnrichmentJob)
+            .where(
+                LinkedInEnrichmentJob.id == job.id,
+                db.or_(
+                    LinkedInEnrichmentJob.status.in_(('pending', 'paused', 'failed')),
+                    db.and_(LinkedInEnrichmentJob.status == 'running',
+                            LinkedInEnrichmentJob.updated_at < now - RUN_LEASE)
+                )
+            )
+            .values(status='running', pause_reason=None, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        db.session.refresh(job)
+        return result.rowcount == 1
+    
+    def run(self, job: LinkedInEnrichmentJob = None, max_companies: int = None) -> LinkedInEnrichmentJob:
+        """
+        Process companies until done, out of budget or max_companies
+        
+        Args:
+            job: Job to run (default: the client's active job or a new one)
+            max_companies: Companies to process in this run (None for all)
+        
+        Returns:
+            The job, with progress committed (unchanged if another run holds it)
+        """
+        job = job or self.start_job()
+        # Claiming commits: the budget admits calls on its own connection,
+        # which an open write transaction here would block on SQLite
+        if not self._claim(job):
+            return job
+        
+        processed = 0
+        try:
+            for normalized, raw_names in self._company_groups(job):
+                if max_companies is not None and processed >= max_companies:
+                    job.status = 'paused'
+                    job.pause_reason = f'Stopped after {max_companies} companies'
+                    break
+                
+                if not self._budget_left() and not self._is_cached(raw_names[0]):
+                    job.status = 'paused'
+                    job.pause_reason = 'LinkedIn daily API limit reached'
+                    break
+                
+                self.linkedin_service.budget_exhausted = False
+                calls_before = self.linkedin_service.api_calls
+                company_id, company_details = self.leadgen_service.resolve_company(raw_names[0])
+                calls = self.linkedin_service.api_calls - calls_before
+                
+                if company_details:
+                    job.leads_updated += self._apply(job, raw_names, company_details)
+                    job.companies_matched += 1
+                elif not self._is_cached(raw_names[0]):
+                    # Refused or failed (nothing was cached): retry this company next run
+                    job.api_calls += calls
+                    if self.linkedin_service.budget_exhausted:
+                        job.status = 'paused'
+                        job.pause_reason = 'LinkedIn daily API limit reached'
+                    else:
+                        job.status = 'failed'
+                        job.last_error = f"LinkedIn lookup failed for {raw_names[0]}"
+                    break
+                
+                job.api_calls += calls
+                job.companies_done += 1
+                job.last_company = normalized
+                db.session.commit()
+                processed += 1
+            else:
+                job.status = 'completed'
+                job.completed_at = datetime.utcnow()
+        except Exception as e:
+            db.session.rollback()
+            job.status = 'failed'
+            job.last_error = str(e)[:500]
+        
+        job.failed_runs = (job.failed_runs or 0) + 1 if job.status == 'failed' else 0
+        db.session.commit()
+        return job
+
+
+class LinkedInEnrichmentWorker:
+    """
+    Runs queued enrichment jobs on a background thread of this process
+    
+    The job row is the queue: submit only starts a run early. If the process
+    dies or is frozen (Lambda) mid-run, the job's lease expires and the daily
+    resume_linkedin_enrichment_jobs picks it up from its checkpoint.
+    """
+    
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def submit(self, job_id: int, max_companies: int = None) -> Future:
+        """Run a job in the background (requires an app context)"""
+        app = current_app._get_current_object()
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='linkedin-enrichment')
+        return self._executor.submit(self._run, app, job_id, max_companies)
+    
+    @staticmethod
+    def _run(app, job_id: int, max_companies: int = None):
+        with app.app_context():
+            try:
+                job = db.session.get(LinkedInEnrichmentJob, job_id)
+                client = db.session.get(Client, job.client_id) if job is not None else None
+                if client is None or not client.linkedin_access_token:
+                    return
+                LinkedInBatchEnricher(client).run(job, max_companies=max_companies)
+            except Exception as e:
+                print(f"LinkedIn enrichment job {job_id} failed: {e}")
+            finally:
+                db.session.remove()
+
+
+def resume_linkedin_enrichment_jobs(max_companies: int = None, max_failed_runs: int = MAX_FAILED_RUNS) -> List[Dict]:
+    """
+    Resume every pending and paused enrichment job, retry failed ones, and
+    take over running ones whose run has died (run daily once budgets reset)
+    
+    Args:
+        max_companies: Companies to process per job (None for all)
+        max_failed_runs: Failed jobs are left alone after this many failed runs in a row
+    
+    Returns:
+        List of job dictionaries after the run
+    """
+    results = []
+    jobs = LinkedInEnrichmentJob.query.filter(
+        db.or_(
+            LinkedInEnrichmentJob.status.in_(('pending', 'paused')),
+            db.and_(
+                LinkedInEnrichmentJob.status == 'running',
+                LinkedInEnrichmentJob.updated_at < datetime.utcnow() - RUN_LEASE
+            ),
+            db.and_(
+                LinkedInEnrichmentJob.status == 'failed',
+                db.func.coalesce(LinkedInEnrichmentJob.failed_runs, 0) < max_failed_runs
+            )
+        )
+    ).all()
+    for job in jobs:
+        client = db.session.get(Client, job.client_id)
+        if client is None or not client.linkedin_access_token:
+            continue
+        results.append(LinkedInBatchEnricher(client).run(job, max_companies=max_companies).to_dict())
+    return results
+
+
+# Background runs for jobs queued by the API
+enrichment_worker = LinkedInEnrichmentWorker()
@@ -1,30 +1,86 @@
+import os
 import requests
 import time
+import threading
 import json
 import urllib.parse
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Iterator, Tuple
 from datetime import datetime, timedelta
 
+from src.services.call_ledger import call_ledger
+from src.services.circuit_breaker import circuit_breakers
+from src.services.linkedin_tokens import token_cache
+
 class LinkedInService:
     """Service for LinkedIn API integration per client"""
     
-    def __init__(self, client_id: str, client_secret: str, access_token: str = None):
+    def __init__(self, client_id: str, client_secret: str, access_token: str = None,
+                 token_expires_at: datetime = None):
         self.client_id = client_id
         self.client_secret = client_secret
         self.access_token = access_token
-        self.base_url = "https://api.linkedin.com/v2"
+        self.token_expires_at = token_expires_at  # UTC expiry of access_token, if known
+        self.base_url = os.getenv('LINKEDIN_BASE_URL', "https://api.linkedin.com/v2")
         self.rate_limit_delay = 1  # seconds between requests
+        self.rate_limit_retry_delay = 60  # seconds to wait after a 429
         self.last_request_time = 0
+        self.api_calls = 0  # HTTP calls made, read by the campaign pipeline
+        self._calls_lock = threading.Lock()
+        self._next_request_time = 0
+        self._throttle_lock = threading.Lock()
+        self.attribution = {}  # client_id / campaign_id recorded with each call in the ledger
+        self.budget = None  # optional LinkedInCallBudget consulted before every call
+        self.budget_exhausted = False
+        self.timeout = None  # seconds per HTTP request (None waits indefinitely)
+    
+    def _circuit(self):
+        """Provider and per-key circuit breakers for this service's calls"""
+        return circuit_breakers.for_call('linkedin', self.access_token)
+    
+    def _record_call(self, method: str, endpoint: str, status_code: Optional[int], started: float, error: str = None):
+        """Append an HTTP call to the provider call ledger"""
+        call_ledger.record(
+            'linkedin', endpoint, method=method, status_code=status_code,
+            latency_ms=(time.time() - started) * 1000, error=error, **self.attribution
+        )
+        self._circuit().record(status_code)
+    
+    def _throttle(self):
+        """
+        Wait for this request's start slot
+        
+        Slots are reserved under a lock, rate_limit_delay apart, so concurrent
+        callers start requests at the configured rate while earlier requests
+        are still in flight.
+        """
+        with self._throttle_lock:
+            now = time.time()
+            slot = max(now, self._next_request_time)
+            self._next_request_time = slot + self.rate_limit_delay
+        if slot > now:
+            time.sleep(slot - now)
     
-    def _make_request(self, method: str, endpoint: str, params: Dict = None, data: Dict = None) -> Optional[Dict]:
-        """Make rate-limited request to LinkedIn API"""
+    def _make_request(self, method: str, endpoint: str, params: Dict = None, data: Dict = None,
+                      priority: str = 'normal', admitted: bool = False) -> Optional[Dict]:
+        """Make rate-limited request to LinkedIn API (admitted: budget already reserved for this call)"""
+        # Fail fast while the provider (or this key) is failing
+        if not self._circuit().allow():
+            print(f"LinkedIn circuit open, failing fast: {endpoint}")
+            return None
+        
+        # Quota admission: refuse locally rather than spend a call on a 429.
+        # Once per logical call: 429 retries reuse the reservation
+        if not admitted and self.budget is not None and not self.budget.admit(priority):
+            self.budget_exhausted = True
+            print(f"LinkedIn API budget exhausted, skipping {priority} priority {endpoint}")
+            return None
+        
         # Rate limiting
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.rate_limit_delay:
-            time.sleep(self.rate_limit_delay - time_since_last)
+        self._throttle()
         
         url = f"{self.base_url}/{endpoint}"
+        started = time.time()
         headers = {
             'Authorization': f'Bearer {self.access_token}',
             'Content-Type': 'application/json',
@@ -33,29 +89,34 @@ class LinkedInService:
         
         try:
             if method.upper() == 'GET':
-                response = requests.get(url, headers=headers, params=params)
+                response = requests.get(url, headers=headers, params=params, timeout=self.timeout)
             elif method.upper() == 'POST':
-                response = requests.post(url, headers=headers, params=params, json=data)
+                response = requests.post(url, headers=headers, params=params, json=data, timeout=self.timeout)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
             self.last_request_time = time.time()
+            with self._calls_lock:
+                self.api_calls += 1
+            self._record_call(method, endpoint, response.status_code, started)
             
             if response.status_code == 200:
                 return response.json()
             elif response.status_code == 429:
                 # Rate limit exceeded, wait and retry
-                print("LinkedIn API rate limit exceeded, waiting 60 seconds...")
-                time.sleep(60)
-                return self._make_request(method, endpoint, params, data)
+                print(f"LinkedIn API rate limit exceeded, waiting {self.rate_limit_retry_delay} seconds...")
+                time.sleep(self.rate_limit_retry_delay)
+                return self._make_request(method, endpoint, params, data, priority, admitted=True)
             elif response.status_code == 401:
                 print("LinkedIn API authentication failed - token may be expired")
+                token_cache.invalidate(self.access_token)
                 return None
             else:
                 print(f"LinkedIn API error: {response.status_code} - {response.text}")
                 return None
                 
         except Exception as e:
+            self._record_call(method, endpoint, None, started, error=str(e))
             print(f"Error making LinkedIn API request: {e}")
             return None
     
@@ -127,6 +188,48 @@ class LinkedInService:
             print(f"Error exchanging code for token: {e}")
             return None
     
+    def refresh_access_token(self, refresh_token: str) -> Optional[Dict]:
+        """
+        Exchange a refresh token for a new access token
+        
+        Args:
+            refresh_token: Refresh token from a previous token response
+        
+        Returns:
+            Token response dictionary (access_token, expires_in and possibly
+            a new refresh_token), or None if the refresh was refused
+        """
+        
+        url = "https://www.linkedin.com/oauth/v2/accessToken"
+        
+        data = {
+            'grant_type': 'refresh_token',
+            'refresh_token': refresh_token,
+            'client_id': self.client_id,
+            'client_secret': self.client_secret
+        }
+        
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
+        
+        try:
+            response = requests.post(url, data=data, headers=headers)
+            
+            if response.status_code == 200:
+                token_data = response.json()
+                self.access_token = token_data.get('access_token')
+                if token_data.get('expires_in'):
+                    self.token_expires_at = datetime.utcnow() + timedelta(seconds=token_data['expires_in'])
+                return token_data
+            else:
+                print(f"Token refresh failed: {response.status_code} - {response.text}")
+                return None
+        
+        except Exception as e:
+            print(f"Error refreshing access token: {e}")
+            return None
+    
     def get_profile(self) -> Optional[Dict]:
         """
         Get current user's LinkedIn profile
@@ -138,7 +241,7 @@ class LinkedInService:
         if not self.access_token:
             return None
         
-        return self._make_request('GET', 'people/~')
+        return self._make_request('GET', 'people/~', priority='low')
     
     def search_people(self, 
                      keywords: str = None,
@@ -205,7 +308,7 @@ class LinkedInService:
             Company data dictionary
         """
         
-        return self._make_request('GET', f'companies/{company_id}')
+        return self._make_request('GET', f'companies/{company_id}', priority='high')
     
     def search_companies(self, 
                         keywords: str = None,
@@ -262,7 +365,7 @@ class LinkedInService:
             'count': min(count, 500)  # LinkedIn limits connections API
         }
         
-        return self._make_request('GET', 'people/~/connections', params=params)
+        return self._make_request('GET', 'people/~/connections', params=params, priority='low')
     
     def send_message(self, recipient_id: str, subject: str, message: str) -> Optional[Dict]:
         """
@@ -293,12 +396,15 @@ class LinkedInService:
             'body': message
         }
         
-        return self._make_request('POST', 'people/~/mailbox', data=data)
+        return self._make_request('POST', 'people/~/mailbox', data=data, priority='high')
     
     def validate_token(self) -> bool:
         """
         Validate the current access token
         
+        Results are shared through the process-wide token cache, so the
+        profile call is made at most once per token per cache period.
+        
         Returns:
             True if token is valid, False otherwise
         """
@@ -306,8 +412,25 @@ class LinkedInService:
         if not self.access_token:
             return False
         
+        if self.token_expires_at is not None and self.token_expires_at <= datetime.utcnow():
+            return False
+        
+        cached = token_cache.get(self.access_token)
+        if cached is not None:
+            return cached
+        
         profile = self.get_profile()
-        return profile is not None
+        if profile is None:
+            # A 401 has already marked the token invalid; other failures
+            # (budget, network) say nothing about the token, so aren't cached
+            return False
+        
+        token_cache.set(self.access_token, True, self.token_expires_at)
+        return True
+    
+    def test_connection(self) -> bool:
+        """Cheap health probe: a (cached) token validation"""
+        return self.validate_token()
 
 
 class LinkedInSalesNavigatorService:
@@ -320,7 +443,7 @@ class LinkedInSalesNavigatorService:
     
     def __init__(self, access_token: str):
         self.access_token = access_token
-        self.base_url = "https://api.linkedin.com/v2"
+        self.base_url = os.getenv('LINKEDIN_BASE_URL', "https://api.linkedin.com/v2")
     
     def advanced_people_search(self, 
                               keywords: str = None,
@@ -378,12 +501,15 @@ class LinkedInLeadGenService:
     Service for LinkedIn lead generation using available APIs
     """
     
-    def __init__(self, linkedin_service: LinkedInService):
+    def __init__(self, linkedin_service: LinkedInService, fetch_workers: int = 4, company_cache=None):
         self.linkedin_service = linkedin_service
+        self.fetch_workers = fetch_workers  # concurrent company detail requests
+        self.company_cache = company_cache  # optional LinkedInCompanyCache
     
     def generate_leads_from_companies(self, company_keywords: List[str], 
                                     location: str = "Australia",
-                                    max_companies: int = 50) -> List[Dict]:
+                                    max_companies: int = 50,
+                                    call_budget: Optional[int] = None) -> List[Dict]:
         """
         Generate leads by finding companies and their employees
         
@@ -391,62 +517,136 @@ class LinkedInLeadGenService:
             company_keywords: List of keywords to search for companies
             location: Location filter
             max_companies: Maximum number of companies to process
+            call_budget: Maximum LinkedIn API calls to make (None for no limit)
             
         Returns:
             List of lead dictionaries
         """
         
-        leads = []
+        return list(self.iter_company_leads(company_keywords, location, max_companies, call_budget))
+    
+    def iter_company_leads(self, company_keywords: List[str],
+                           location: str = "Australia",
+                           max_companies: int = 50,
+                           call_budget: Optional[int] = None,
+                           max_workers: int = None) -> Iterator[Dict]:
+        """
+        Yield company leads as their details arrive
+        
+        Searches each keyword, dedupes company IDs across keywords (the first
+        keyword that found a company is kept), then fetches company details
+        concurrently. The service throttle still spaces request starts by
+        rate_limit_delay, so wall time tracks the rate limit rather than
+        rate limit plus latency per company. With a company cache, cached
+        details are yielded first and cost no calls.
         
+        Args:
+            company_keywords: List of keywords to search for companies
+            location: Location filter
+            max_companies: Maximum number of companies to process
+            call_budget: Maximum LinkedIn API calls (searches included); details
+                are only fetched for as many companies as the budget allows.
+                With a LinkedInCallBudget on the service, its remaining quota
+                caps this too
+            max_workers: Concurrent detail requests (default fetch_workers)
+        
+        Yields:
+            Lead dictionaries, in completion order
+        """
+        
+        if not company_keywords:
+            return
+        
+        remaining = call_budget if call_budget is not None else float('inf')
+        if self.linkedin_service.budget is not None:
+            remaining = min(remaining, self.linkedin_service.budget.remaining('high'))
+        per_keyword = max(1, min(max_companies // len(company_keywords), 25))
+        
+        # Stage 1: search, deduping company IDs across keywords
+        companies = {}
         for keyword in company_keywords:
+            # Stop searching once the companies found already use up the budget
+            if remaining < 1 or len(companies) >= min(max_companies, remaining - 1):
+                break
             print(f"Searching companies with keyword: {keyword}")
             
-            companies = self.linkedin_service.search_companies(
+            results = self.linkedin_service.search_companies(
                 keywords=keyword,
                 location=location,
-                count=min(max_companies // len(company_keywords), 25)
+                count=per_keyword
             )
+            remaining -= 1
             
-            if not companies or 'elements' not in companies:
+            if not results or 'elements' not in results:
                 continue
             
-            for company in companies['elements']:
+            for company in results['elements']:
                 company_id = company.get('id')
-                company_name = company.get('name')
-                
-                if not company_id:
-                    continue
-                
-                # Get company details
-                company_details = self.linkedin_service.get_company_info(company_id)
-                
-                if company_details:
-                    # Create lead entry for the company
-                    lead = {
-                        'type': 'company',
-                        'company_name': company_name,
-                        'company_id': company_id,
-                        'industry': company_details.get('industry'),
-                        'location': company_details.get('location'),
-                        'employee_count': company_details.get('employeeCountRange'),
-                        'description': company_details.get('description'),
-                        'website': company_details.get('website'),
-                        'source': 'linkedin_company_search',
-                        'search_keyword': keyword,
-                        'found_at': datetime.utcnow().isoformat()
-                    }
-                    
-                    leads.append(lead)
-                
-                # Rate limiting
-                time.sleep(1)
-        
-        return leads
+                if company_id and company_id not in companies:
+                    companies[company_id] = (company.get('name'), keyword)
+        
+        if self.company_cache is not None and companies:
+            # Search results name their companies: remember name -> id for enrichment
+            self.company_cache.put_names({name: company_id for company_id, (name, _) in companies.items() if name})
+        
+        # Stage 2: cached details first, then fetch as many as the budget covers
+        candidates = list(companies.items())[:max_companies]
+        cached = self.company_cache.get_companies(companies) if self.company_cache is not None else {}
+        for company_id, (name, keyword) in candidates:
+            if str(company_id) in cached:
+                yield self._company_lead(company_id, name, keyword, cached[str(company_id)])
+        
+        missing = [(company_id, value) for company_id, value in candidates if str(company_id) not in cached]
+        selected = missing[:int(min(len(missing), remaining))]
+        if len(selected) < len(missing):
+            print(f"LinkedIn call budget covers {len(selected)} of {len(missing)} uncached companies")
+        if not selected:
+            return
+        
+        fetched = []
+        with ThreadPoolExecutor(max_workers=min(max_workers or self.fetch_workers, len(selected))) as executor:
+            futures = {
+                executor.submit(self.linkedin_service.get_company_info, company_id): (company_id, name, keyword)
+                for company_id, (name, keyword) in selected
+            }
+            try:
+                for future in as_completed(futures):
+                    company_id, company_name, keyword = futures[future]
+                    company_details = future.result()
+                    if company_details:
+                        fetched.append((company_id, company_name, company_details))
+                        yield self._company_lead(company_id, company_name, keyword, company_details)
+            finally:
+                # Consumer stopped early: drop requests that have not started
+                for future in futures:
+                    future.cancel()
+                if self.company_cache is not None:
+                    self.company_cache.put_companies(fetched)
+    
+    @staticmethod
+    def _company_lead(company_id, company_name: str, keyword: str, company_details: Dict) -> Dict:
+        """Lead entry for a company found by keyword search"""
+        return {
+            'type': 'company',
+            'company_name': company_name,
+            'company_id': company_id,
+            'industry': company_details.get('industry'),
+            'location': company_details.get('location'),
+            'employee_count': company_details.get('employeeCountRange'),
+            'description': company_details.get('description'),
+            'website': company_details.get('website'),
+            'source': 'linkedin_company_search',
+            'search_keyword': keyword,
+            'found_at': datetime.utcnow().isoformat()
+        }
     
     def enrich_lead_with_linkedin(self, lead_data: Dict) -> Dict:
         """
         Enrich existing lead data with LinkedIn information
         
+        With a company cache, the name -> company lookup (including "not found")
+        and the company details are reused across leads and clients.
+        
         Args:
             lead_data: Existing lead data dictionary
             
@@ -459,35 +659,72 @@ class LinkedInLeadGenService:
         if not company_name:
             return lead_data
         
-        # Search for the company on LinkedIn
-        companies = self.linkedin_service.search_companies(
-            keywords=company_name,
-            count=5
-        )
+        company_id, company_details = self.resolve_company(company_name)
         
-        if companies and 'elements' in companies:
-            # Find the best matching company
-            for company in companies['elements']:
-                if company.get('name', '').lower() == company_name.lower():
-                    # Get detailed company information
-                    company_details = self.linkedin_service.get_company_info(company.get('id'))
-                    
-                    if company_details:
-                        # Enrich the lead data
-                        lead_data.update({
-                            'linkedin_company_id': company.get('id'),
-                            'linkedin_company_url': company_details.get('websiteUrl'),
-                            'company_industry': company_details.get('industry'),
-                            'company_size': company_details.get('employeeCountRange'),
-                            'company_description': company_details.get('description'),
-                            'linkedin_enriched': True,
-                            'linkedin_enriched_at': datetime.utcnow().isoformat()
-                        })
-                    
-                    break
+        if company_details:
+            # Enrich the lead data
+            lead_data.update({
+                'linkedin_company_id': company_id,
+                'linkedin_company_url': company_details.get('websiteUrl'),
+                'company_industry': company_details.get('industry'),
+                'company_size': company_details.get('employeeCountRange'),
+                'company_description': company_details.get('description'),
+                'linkedin_enriched': True,
+                'linkedin_enriched_at': datetime.utcnow().isoformat()
+            })
         
         return lead_data
     
+    def resolve_company(self, company_name: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        Find a company by name and fetch its details
+        
+        Args:
+            company_name: Company name as stored on the lead
+        
+        Returns:
+            (company_id, details); (None, None) when no company matches
+        """
+        from src.services.dedupe_service import normalize_company
+        
+        cache = self.company_cache
+        hit, company_id = cache.lookup_name(company_name) if cache is not None else (False, None)
+        
+        if not hit:
+            # Search for the company on LinkedIn
+            companies = self.linkedin_service.search_companies(
+                keywords=company_name,
+                count=5
+            )
+            if companies is None:
+                # Request failed: don't cache a miss we didn't observe
+                return None, None
+            
+            # Find the best matching company
+            normalized = normalize_company(company_name)
+            names = {}
+            for company in companies.get('elements', []):
+                if company.get('name') and company.get('id'):
+                    names[company['name']] = company['id']
+                    if company_id is None and normalize_company(company['name']) == normalized:
+                        company_id = company['id']
+            
+            if cache is not None:
+                names[company_name] = company_id
+                cache.put_names(names)
+        
+        if not company_id:
+            return None, None
+        
+        company_details = cache.get_company(company_id) if cache is not None else None
+        if company_details is None:
+            # Get detailed company information
+            company_details = self.linkedin_service.get_company_info(company_id)
+            if company_details and cache is not None:
+                cache.put_companies([(company_id, company_name, company_details)])
+        
+        return company_id, company_details
+    
     def get_australian_consultant_companies(self) -> List[Dict]:
         """
         Get Australian consulting companies using LinkedIn API
@@ -511,6 +748,72 @@ class LinkedInLeadGenService:
             max_companies=100
         )
 
+    @staticmethod
+    def company_lead_to_lead_fields(company_lead: Dict) -> Dict:
+        """
+        Map a company lead from generate_leads_from_companies onto Lead columns
+        
+        Args:
+            company_lead: Company lead dictionary
+        
+        Returns:
+            Dictionary of Lead column values
+        """
+        
+        employee_count = company_lead.get('employee_count')
+        if isinstance(employee_count, dict):
+            employee_count = employee_count.get('name') or '-'.join(
+                str(v) for v in (employee_count.get('start'), employee_count.get('end')) if v
+            )
+        
+        location = company_lead.get('location')
+        if isinstance(location, dict):
+            location = location.get('country') or location.get('city')
+        
+        company_id = company_lead.get('company_id')
+        
+        return {
+            'first_name': '',
+            'last_name': '',
+            'email': '',
+            'company': company_lead.get('company_name') or '',
+            'industry': company_lead.get('industry'),
+            'company_size': str(employee_count) if employee_count else None,
+            'country': location if isinstance(location, str) else None,
+            'source_url': company_lead.get('website'),
+            'linkedin_url': f"https://www.linkedin.com/company/{company_id}" if company_id else None,
+            'notes': company_lead.get('description'),
+            'tags': json.dumps(['auto-generated', 'linkedin', company_lead.get('search_keyword') or 'linkedin_company_search'])
+        }
+    
+    @staticmethod
+    def company_details_to_lead_fields(company_details: Dict) -> Dict:
+        """
+        Map companies/{id} details onto the Lead columns enrichment fills
+        
+        Args:
+            company_details: Company data from get_company_info
+        
+        Returns:
+            Dictionary with industry, company_size and source_url (values may be None)
+        """
+        
+        industry = company_details.get('industry')
+        if not industry and company_details.get('industries'):
+            industry = company_details['industries'][0]
+        
+        company_size = company_details.get('employeeCountRange') or company_details.get('staffCount')
+        if isinstance(company_size, dict):
+            company_size = company_size.get('name') or '-'.join(
+                str(v) for v in (company_size.get('start'), company_size.get('end')) if v
+            )
+        
+        return {
+            'industry': industry if isinstance(industry, str) else None,
+            'company_size': str(company_size) if company_size else None,
+            'source_url': company_details.get('websiteUrl') or company_details.get('website')
+        }
+
 
 # Utility functions for LinkedIn integration
 def create_linkedin_oauth_url(client_id: str, redirect_uri: str, state: str = None) -> str:
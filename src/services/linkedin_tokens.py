@@ -0,0 +1,211 @@
+import os
+import sys
+import time
+import atexit
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.models.base import db
+
+
+def _token_key(access_token: str) -> str:
+    # Tokens are credentials: keep only a digest in memory
+    return hashlib.sha256(access_token.encode('utf-8')).hexdigest()
+
+
+class TokenValidationCache:
+    """
+    Process-wide cache of LinkedIn access token validity
+    
+    A valid result is kept for valid_ttl seconds, never past the token's own
+    expiry; an invalid one for invalid_ttl. Any 401 from LinkedIn invalidates
+    the token immediately (LinkedInService._make_request), so a revoked token
+    costs at most one failed call rather than a profile check per request.
+    """
+    
+    def __init__(self, valid_ttl: float = None, invalid_ttl: float = None):
+        self.valid_ttl = valid_ttl if valid_ttl is not None else float(os.getenv('LINKEDIN_TOKEN_CACHE_SECONDS', 3600))
+        self.invalid_ttl = invalid_ttl if invalid_ttl is not None else float(os.getenv('LINKEDIN_TOKEN_INVALID_SECONDS', 60))
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def get(self, access_token: str) -> Optional[bool]:
+        """Cached validity, or None when the token must be checked"""
+        key = _token_key(access_token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            valid, expires_at = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            return valid
+    
+    def set(self, access_token: str, valid: bool, token_expires_at: datetime = None):
+        """
+        Record a validation result
+        
+        Args:
+            access_token: Token that was checked
+            valid: Result of the check
+            token_expires_at: Token expiry (UTC), caps how long valid is cached
+        """
+        ttl = self.valid_ttl if valid else self.invalid_ttl
+        if valid and token_expires_at is not None:
+            ttl = min(ttl, (token_expires_at - datetime.utcnow()).total_seconds())
+        if ttl <= 0:
+            self.invalidate(access_token)
+            return
+        with self._lock:
+            self._entries[_token_key(access_token)] = (valid, time.time() + ttl)
+    
+    def invalidate(self, access_token: str):
+        """Forget a token and remember it as invalid until re-validated or refreshed"""
+        with self._lock:
+            self._entries[_token_key(access_token)] = (False, time.time() + self.invalid_ttl)
+    
+    def is_invalid(self, access_token: str) -> bool:
+        return self.get(access_token) is False
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class LinkedInTokenRefresher:
+    """
+    Background refresh of LinkedIn access tokens before they expire
+    
+    Every interval seconds the refresher looks for clients and LinkedIn
+    integrations with a refresh token whose access token expires within
+    refresh_ahead (or has just failed with a 401) and exchanges the refresh
+    token for a new access token, so requests never find an expired token.
+    The first scan runs one interval after start, never during app creation.
+    
+    The thread is opt-in (LINKEDIN_TOKEN_REFRESH, never in testing): every
+    app process would start its own, so gunicorn workers would refresh the
+    same tokens concurrently and a Lambda container's thread freezes between
+    invocations. Multi-process deployments call refresh_due from one
+    scheduled job instead (`flask refresh-linkedin-tokens`, or the hourly
+    run in LeadAutomationService.schedule_daily_automation).
+    """
+    
+    def __init__(self, interval: float = 300.0, refresh_ahead: timedelta = timedelta(hours=24)):
+        self.interval = interval
+        self.refresh_ahead = refresh_ahead
+        self.app = None
+        self.refreshed = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def init_app(self, app):
+        """Bind to a Flask app and start the refresh thread when enabled"""
+        self.app = app
+        self.interval = float(app.config.get('LINKEDIN_TOKEN_REFRESH_INTERVAL',
+                                             os.environ.get('LINKEDIN_TOKEN_REFRESH_INTERVAL', self.interval)))
+        self.refresh_ahead = timedelta(hours=float(app.config.get(
+            'LINKEDIN_TOKEN_REFRESH_AHEAD_HOURS', os.environ.get('LINKEDIN_TOKEN_REFRESH_AHEAD_HOURS', 24)
+        )))
+        
+        enabled = app.config.get('LINKEDIN_TOKEN_REFRESH', os.environ.get('LINKEDIN_TOKEN_REFRESH', 'false'))
+        if isinstance(enabled, str):
+            enabled = enabled.lower() in ('1', 'true', 'yes', 'on')
+        if enabled and not app.testing:
+            self.start()
+            atexit.register(self.stop)
+    
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='linkedin-token-refresh', daemon=True)
+                self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    self.refresh_due()
+            except Exception as e:
+                print(f"LinkedIn token refresh failed: {e}")
+    
+    def _due(self, access_token: Optional[str], expires_at: Optional[datetime], now: datetime) -> bool:
+        if not access_token:
+            return True
+        if expires_at is not None and expires_at - now <= self.refresh_ahead:
+            return True
+        return token_cache.is_invalid(access_token)
+    
+    def refresh_due(self) -> Dict:
+        """
+        Refresh every token that is due (requires an app context)
+        
+        Returns:
+            Dictionary with counts of tokens refreshed and failed
+        """
+        from src.models.auth import Client, LinkedInIntegration
+        
+        now = datetime.utcnow()
+        refreshed = failed = 0
+        
+        # Client-level tokens (used by the automation routes)
+        for client in Client.query.filter(Client.linkedin_refresh_token.isnot(None)):
+            if not self._due(client.linkedin_access_token, client.linkedin_token_expires, now):
+                continue
+            token_data = self._refresh(client.linkedin_client_id, client.linkedin_client_secret,
+                                       client.linkedin_refresh_token)
+            if token_data is None:
+                failed += 1
+                continue
+            client.linkedin_access_token = token_data['access_token']
+            client.linkedin_refresh_token = token_data.get('refresh_token') or client.linkedin_refresh_token
+            client.linkedin_token_expires = now + timedelta(seconds=token_data.get('expires_in', 3600))
+            token_cache.set(client.linkedin_access_token, True, client.linkedin_token_expires)
+            refreshed += 1
+        
+        # Integration tokens (OAuth callback)
+        for integration in LinkedInIntegration.query.filter(LinkedInIntegration.refresh_token.isnot(None)):
+            if not self._due(integration.access_token, integration.token_expires_at, now):
+                continue
+            token_data = self._refresh(integration.client_id_linkedin, integration.client_secret,
+                                       integration.refresh_token)
+            if token_data is None:
+                failed += 1
+                continue
+            integration.access_token = token_data['access_token']
+            integration.refresh_token = token_data.get('refresh_token') or integration.refresh_token
+            integration.token_expires_at = now + timedelta(seconds=token_data.get('expires_in', 3600))
+            token_cache.set(integration.access_token, True, integration.token_expires_at)
+            refreshed += 1
+        
+        db.session.commit()
+        self.refreshed += refreshed
+        self.failed += failed
+        return {'refreshed': refreshed, 'failed': failed}
+    
+    @staticmethod
+    def _refresh(client_id: str, client_secret: str, refresh_token: str) -> Optional[Dict]:
+        from src.services.linkedin_service import LinkedInService
+        
+        token_data = LinkedInService(client_id or '', client_secret or '').refresh_access_token(refresh_token)
+        if not token_data or not token_data.get('access_token'):
+            return None
+        return token_data
+
+
+# Shared by every LinkedInService in the process
+token_cache = TokenValidationCache()
+
+# Background refresher started by create_app
+linkedin_token_refresher = LinkedInTokenRefresher()
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+@pytest.fixture
+def app(tmp_path):
+    """App on a throwaway SQLite database with the schema created"""
+    from src.main import create_app
+    from src.models.base import db
+    
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}"
+    })
+    with app.app_context():
+        from src.cli import init_database
+        init_database()
+        yield app
+        db.session.remove()
@@ -0,0 +1,88 @@
+import pytest
+
+from src.services import apollo_service as apollo_module
+from src.services.apollo_service import ApolloService
+from src.services.circuit_breaker import circuit_breakers
+
+
+class _Response:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload or {}
+        self.text = str(self._payload)
+    
+    def json(self):
+        return self._payload
+
+
+@pytest.fixture
+def service(monkeypatch):
+    calls = []
+    statuses = {}
+    
+    def post(url, headers=None, params=None, json=None, timeout=None):
+        endpoint = url.rsplit('/api/v1/', 1)[-1]
+        calls.append(endpoint)
+        status = statuses.get(endpoint, 200)
+        if status != 200:
+            return _Response(status)
+        if endpoint == 'people/bulk_match':
+            return _Response(200, {'matches': [{'id': d.get('id'), 'email': 'x@example.com'} for d in json['details']]})
+        return _Response(200, {'person': {'id': json.get('id'), 'email': 'x@example.com'}})
+    
+    monkeypatch.setattr(apollo_module.requests, 'post', post)
+    circuit_breakers.reset()
+    service = ApolloService('test-key')
+    service.rate_limit_delay = 0
+    service.calls = calls
+    service.statuses = statuses
+    yield service
+    circuit_breakers.reset()
+
+
+def _people(count):
+    return [{'id': str(i), 'first_name': 'P', 'last_name': str(i)} for i in range(count)]
+
+
+def test_refused_key_stops_matching(service):
+    service.statuses['people/bulk_match'] = 401
+    
+    matches = service.bulk_match_people(_people(25))
+    
+    assert matches == [None] * 25
+    assert service.calls == ['people/bulk_match']
+    assert service.bulk_match_available
+    assert '401' in service.match_error
+
+
+def test_forbidden_bulk_match_falls_back_to_single_matches(service):
+    service.statuses['people/bulk_match'] = 403
+    
+    matches = service.bulk_match_people(_people(3))
+    
+    assert all(match is not None for match in matches)
+    assert service.calls == ['people/bulk_match'] + ['people/match'] * 3
+    assert not service.bulk_match_available
+    assert service.match_error is None
+
+
+def test_out_of_credits_stops_after_one_single_match(service):
+    service.statuses['people/bulk_match'] = 403
+    service.statuses['people/match'] = 403
+    
+    matches = service.bulk_match_people(_people(25))
+    
+    assert matches == [None] * 25
+    assert service.calls == ['people/bulk_match', 'people/match']
+    assert '403' in service.match_error
+
+
+def test_missing_bulk_endpoint_falls_back_to_single_matches(service):
+    service.statuses['people/bulk_match'] = 404
+    
+    matches = service.bulk_match_people(_people(3))
+    
+    assert all(match is not None for match in matches)
+    assert service.calls == ['people/bulk_match'] + ['people/match'] * 3
+    assert not service.bulk_match_available
+    assert service.match_error is None
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from src.models.base import db
+from src.models.auth import Client, AdminSettings
+from src.models.lead import Lead
+from src.models.campaign import LeadCampaign
+from src.models.api_call import ApiCallLog
+from src.services.call_ledger import cost_rollup
+
+
+def test_campaign_cost_per_lead_counts_leads_in_the_window(app):
+    client = Client(username='acme', email='acme@example.com', password_hash='x')
+    db.session.add(client)
+    db.session.commit()
+    campaign = LeadCampaign(client_id=client.id, name='Sydney', leads_generated=100)
+    settings = AdminSettings.get_settings()
+    settings.apollo_cost_per_call = 0.5
+    db.session.add(campaign)
+    db.session.commit()
+    
+    now = datetime.utcnow()
+    since = now - timedelta(days=7)
+    db.session.add_all([
+        ApiCallLog(provider='apollo', endpoint='mixed_people/search', credits=1.0,
+                   client_id=client.id, campaign_id=campaign.id, created_at=now - timedelta(days=1))
+        for _ in range(4)
+    ] + [
+        # Calls and leads from before the window don't count
+        ApiCallLog(provider='apollo', endpoint='mixed_people/search', credits=1.0,
+                   client_id=client.id, campaign_id=campaign.id, created_at=now - timedelta(days=30))
+    ] + [
+        Lead(client_id=client.id, campaign_id=campaign.id, first_name='Jo', last_name=str(i),
+             email=f'jo{i}@example.com', created_at=now - timedelta(days=1 if i < 2 else 30))
+        for i in range(5)
+    ])
+    db.session.commit()
+    
+    row, = cost_rollup(group_by='campaign', since=since)
+    
+    assert row['id'] == campaign.id
+    assert row['calls'] == 4
+    assert row['leads'] == 2
+    assert row['cost_per_lead'] == 1.0
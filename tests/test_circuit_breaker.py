@@ -0,0 +1,62 @@
+from src.services.circuit_breaker import CircuitBreaker, ProviderCircuit, CLOSED, OPEN, HALF_OPEN
+
+
+def _breaker(name):
+    return CircuitBreaker(name, min_calls=2, window_seconds=60, open_seconds=30)
+
+
+def _trip(breaker):
+    for _ in range(breaker.min_calls):
+        breaker.record(True)
+    assert breaker.state == OPEN
+
+
+def _expire(breaker):
+    breaker.opened_at -= breaker.open_seconds
+
+
+def test_open_key_does_not_take_provider_trial():
+    provider, key = _breaker('apollo'), _breaker('apollo:bad')
+    _trip(provider)
+    _trip(key)
+    _expire(provider)
+    
+    # The bad key still fails fast and the provider's trial stays free
+    assert not ProviderCircuit(provider, key).allow()
+    assert provider.trial_started is None
+    
+    other_key = _breaker('apollo:good')
+    circuit = ProviderCircuit(provider, other_key)
+    assert circuit.allow()
+    assert provider.state == HALF_OPEN
+    circuit.record(200)
+    assert provider.state == CLOSED
+
+
+def test_open_provider_releases_key_trial():
+    provider, key = _breaker('apollo'), _breaker('apollo:key')
+    _trip(provider)
+    _trip(key)
+    _expire(key)
+    
+    assert not ProviderCircuit(provider, key).allow()
+    assert key.trial_started is None
+    
+    # Once the provider recovers the key gets its trial
+    _expire(provider)
+    circuit = ProviderCircuit(provider, key)
+    assert circuit.allow()
+    circuit.record(200)
+    assert provider.state == CLOSED
+    assert key.state == CLOSED
+
+
+def test_half_open_allows_one_trial_at_a_time():
+    breaker = _breaker('hunter')
+    _trip(breaker)
+    _expire(breaker)
+    
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record(True)
+    assert breaker.state == OPEN
@@ -0,0 +1,84 @@
+from src.models.base import db
+from src.models.auth import Client
+from src.models.lead import Lead
+from src.services.dedupe_service import LeadDedupeService, merge_lead_fields
+
+
+def _client():
+    client = Client(username='acme', email='acme@example.com', password_hash='x')
+    db.session.add(client)
+    db.session.commit()
+    return client
+
+
+def test_company_merge_leaves_person_fields_alone(app):
+    client = _client()
+    person = Lead(
+        client_id=client.id, first_name='John', last_name='Smith', email='john@acme.example', company='Acme Consulting',
+        linkedin_url='https://www.linkedin.com/in/johnsmith', notes='Met at expo'
+    )
+    company = Lead(
+        client_id=client.id, first_name='', last_name='', email='', company='Acme Consulting',
+        linkedin_url='https://www.linkedin.com/company/123', source_url='https://acme.example',
+        notes='Company page', industry='Management Consulting', company_size='51-200'
+    )
+    db.session.add_all([person, company])
+    db.session.commit()
+    
+    removed = LeadDedupeService().apply_suggestion({
+        'primary_id': company.id, 'duplicate_ids': [person.id], 'kind': 'company'
+    }, client.id)
+    db.session.commit()
+    
+    person = db.session.get(Lead, person.id)
+    assert removed == 0
+    assert db.session.get(Lead, company.id) is not None
+    assert person.linkedin_url == 'https://www.linkedin.com/in/johnsmith'
+    assert person.notes == 'Met at expo'
+    assert not person.source_url
+    assert person.industry == 'Management Consulting'
+    assert person.company_size == '51-200'
+
+
+def test_company_merge_does_not_fill_empty_person_linkedin_url(app):
+    person = Lead(first_name='Jane', last_name='Doe', company='Acme Consulting')
+    merge_lead_fields(person, {
+        'first_name': '', 'last_name': '', 'company': 'Acme Consulting',
+        'linkedin_url': 'https://www.linkedin.com/company/123', 'industry': 'Consulting'
+    })
+    
+    assert not person.linkedin_url
+    assert person.industry == 'Consulting'
+
+
+def test_duplicate_merge_fills_person_fields(app):
+    primary = Lead(first_name='John', last_name='Smith', company='Acme')
+    merge_lead_fields(primary, {
+        'first_name': 'John', 'last_name': 'Smith',
+        'linkedin_url': 'https://www.linkedin.com/in/johnsmith', 'notes': 'Imported'
+    })
+    
+    assert primary.linkedin_url == 'https://www.linkedin.com/in/johnsmith'
+    assert primary.notes == 'Imported'
+
+
+def test_auto_merge_keeps_company_lead_and_person_linkedin_url(app):
+    client = _client()
+    person = Lead(
+        client_id=client.id, first_name='John', last_name='Smith', email='john@acme.example',
+        company='Acme Consulting', linkedin_url='https://www.linkedin.com/in/johnsmith'
+    )
+    company = Lead(
+        client_id=client.id, first_name='', last_name='', email='', company='Acme Consulting',
+        linkedin_url='https://www.linkedin.com/company/123', industry='Management Consulting'
+    )
+    db.session.add_all([person, company])
+    db.session.commit()
+    
+    results = LeadDedupeService().auto_merge_client(client.id)
+    
+    assert results['leads_removed'] == 0
+    assert Lead.query.count() == 2
+    person = db.session.get(Lead, person.id)
+    assert person.linkedin_url == 'https://www.linkedin.com/in/johnsmith'
+    assert person.industry == 'Management Consulting'
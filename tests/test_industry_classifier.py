@@ -0,0 +1,53 @@
+import pytest
+
+from src.services.industry_classifier import IndustryClassifier
+
+
+@pytest.fixture
+def classifier():
+    return IndustryClassifier()
+
+
+@pytest.mark.parametrize('domain, industry', [
+    ('acme-consulting.com.au', 'consulting'),
+    ('apex-capital-partners.com', 'finance'),
+    ('sydney-investments.com.au', 'finance'),
+    ('city-law-firm.com', 'legal'),
+    ('sunrise-medical-centre.com.au', 'healthcare'),
+    ('happy-apps.io', 'technology'),
+    ('web-dev.com', 'technology'),
+    ('home-care.com.au', 'healthcare'),
+    ('unimelb.edu.au', 'education'),
+    ('city-realty.com', 'real_estate')
+])
+def test_classify_domain(classifier, domain, industry):
+    assert classifier.classify_domain(domain) == industry
+
+
+@pytest.mark.parametrize('domain', [
+    'devonport.com.au',
+    'careers.com',
+    'happy.com',
+    'happen.com',
+    'disapprove.org',
+    'greenlawn.com.au',
+    'example.com',
+    # No word boundary inside a run-together label
+    'acmeconsulting.com.au'
+])
+def test_keywords_inside_other_words_do_not_classify(classifier, domain):
+    assert classifier.classify_domain(domain) is None
+
+
+def test_priority_order_wins(classifier):
+    # consulting is listed before technology
+    assert classifier.classify_domain('tech-consulting.com') == 'consulting'
+
+
+def test_normalize_industry(classifier):
+    assert classifier.normalize_industry('Hospital & Health Care') == 'healthcare'
+    assert classifier.normalize_industry('Information Technology') == 'technology'
+    assert classifier.normalize_industry('Management Consultancies') == 'consulting'
+    assert classifier.normalize_industry('Property Reappraisal') == 'real_estate'
+    assert classifier.normalize_industry('Reappraisal Services') is None
+    assert classifier.normalize_industry(None) is None
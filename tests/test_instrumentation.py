@@ -0,0 +1,49 @@
+import pytest
+
+from src.models.base import db
+from src.models.auth import Client, ClientSession
+
+
+def _metrics_app(tmp_path, **config):
+    from src.main import create_app
+    from src.cli import init_database
+    
+    app = create_app(dict({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'metrics.db'}",
+        'INSTRUMENTATION_ENABLED': True
+    }, **config))
+    with app.app_context():
+        init_database()
+    return app
+
+
+def _session_token(app, is_admin):
+    with app.app_context():
+        client = Client.create_client(
+            username='admin' if is_admin else 'client', email=f'{is_admin}@example.com',
+            password='password123', is_admin=is_admin
+        )
+        token = ClientSession.create_session(client.id).session_token
+        db.session.remove()
+    return token
+
+
+@pytest.mark.parametrize('debug, status', [(False, 401), (True, 200)])
+def test_metrics_without_token_is_open_only_in_debug(tmp_path, debug, status):
+    app = _metrics_app(tmp_path, DEBUG=debug)
+    assert app.test_client().get('/metrics').status_code == status
+
+
+def test_metrics_accepts_token_or_admin_session(tmp_path):
+    app = _metrics_app(tmp_path, METRICS_TOKEN='scrape-token')
+    http = app.test_client()
+    
+    assert http.get('/metrics').status_code == 401
+    assert http.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert http.get('/metrics', headers={'Authorization': 'Bearer scrape-token'}).status_code == 200
+    
+    client_token = _session_token(app, is_admin=False)
+    assert http.get('/metrics', headers={'Authorization': f'Bearer {client_token}'}).status_code == 401
+    admin_token = _session_token(app, is_admin=True)
+    assert http.get('/metrics', headers={'Authorization': f'Bearer {admin_token}'}).status_code == 200
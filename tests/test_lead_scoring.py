@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from src.models.base import db
+from src.models.auth import Client
+from src.models.lead import Lead
+from src.services.lead_automation import LeadAutomationService
+from src.services.lead_scoring import company_size_tier
+
+
+@pytest.mark.parametrize('company_size, tier', [
+    ('1,001-5,000', 'enterprise'),
+    ('10,001+', 'enterprise'),
+    ('1000+', 'enterprise'),
+    ('201-500', 'large'),
+    ('51,200', 'large'),
+    ('51-100', 'medium'),
+    ('11-50', 'small'),
+    ('1,000', 'large'),
+    ('Large', 'enterprise'),
+    ('1-10', None),
+])
+def test_company_size_tier_from_size_string(company_size, tier):
+    assert company_size_tier(company_size=company_size) == tier
+
+
+def test_employee_count_wins_over_size_string():
+    assert company_size_tier(employees=20, company_size='1,001-5,000') == 'small'
+
+
+def test_campaign_pipeline_scores_with_client_weights(app, monkeypatch):
+    client = Client(username='acme', email='acme@example.com', password_hash='x',
+                    scoring_weights=json.dumps({'base': 20}))
+    db.session.add(client)
+    db.session.commit()
+    
+    service = LeadAutomationService('apollo-key', None)
+    person = {'first_name': 'Jo', 'last_name': 'Smith', 'email': 'jo@example.com', 'organization': {}}
+    monkeypatch.setattr(service.apollo_service, 'iter_people', lambda config, max_leads, per_page=25: (p for p in [person]))
+    
+    result = service._generate_leads_from_config({'name': 'test'}, 1, client_id=client.id)
+    
+    assert result['leads_saved'] == 1
+    assert Lead.query.filter_by(client_id=client.id).one().score == 20
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+from src.models.base import db
+from src.models.auth import Client, ClientSession
+from src.models.lead import Lead
+from src.models.linkedin_company import LinkedInEnrichmentJob
+from src.services.linkedin_enrichment import (
+    LinkedInBatchEnricher, resume_linkedin_enrichment_jobs, enrichment_worker, MAX_FAILED_RUNS, RUN_LEASE
+)
+
+
+def _client_with_leads(companies):
+    client = Client(username='acme', email='acme@example.com', password_hash='x', linkedin_access_token='token')
+    db.session.add(client)
+    db.session.commit()
+    db.session.add_all([
+        Lead(client_id=client.id, first_name='Jo', last_name=str(i), email=f'jo{i}@example.com', company=company)
+        for i, company in enumerate(companies)
+    ])
+    db.session.commit()
+    return client
+
+
+def _resolve_with(monkeypatch, resolve):
+    monkeypatch.setattr(
+        'src.services.linkedin_service.LinkedInLeadGenService.resolve_company',
+        lambda self, name: resolve(name)
+    )
+
+
+def test_max_companies_pauses_and_resume_finishes(app, monkeypatch):
+    client = _client_with_leads(['Acme', 'Beta Corp', 'Gamma'])
+    _resolve_with(monkeypatch, lambda name: (1, {'industry': 'Consulting'}))
+    
+    job = LinkedInBatchEnricher(client).run(max_companies=2)
+    assert job.status == 'paused'
+    assert job.companies_done == 2
+    
+    results = resume_linkedin_enrichment_jobs()
+    assert [result['status'] for result in results] == ['completed']
+    assert results[0]['companies_done'] == 3
+
+
+def test_failed_jobs_are_retried_up_to_the_cap(app, monkeypatch):
+    client = _client_with_leads(['Acme'])
+    _resolve_with(monkeypatch, lambda name: (None, None))
+    
+    job = LinkedInBatchEnricher(client).run()
+    assert job.status == 'failed'
+    assert job.failed_runs == 1
+    
+    for _ in range(MAX_FAILED_RUNS):
+        resume_linkedin_enrichment_jobs()
+    assert job.failed_runs == MAX_FAILED_RUNS
+    assert resume_linkedin_enrichment_jobs() == []
+    
+    # A transient failure that clears resumes the job from its checkpoint
+    _resolve_with(monkeypatch, lambda name: (1, {'industry': 'Consulting'}))
+    job.failed_runs = 1
+    db.session.commit()
+    assert [result['status'] for result in resume_linkedin_enrichment_jobs()] == ['completed']
+
+
+def test_running_job_is_taken_over_only_after_its_lease(app, monkeypatch):
+    client = _client_with_leads(['Acme'])
+    _resolve_with(monkeypatch, lambda name: (1, {'industry': 'Consulting'}))
+    job = LinkedInBatchEnricher(client).start_job()
+    job.status = 'running'
+    db.session.commit()
+    
+    # Another run holds the job
+    assert resume_linkedin_enrichment_jobs() == []
+    assert LinkedInBatchEnricher(client).run(job).status == 'running'
+    
+    # Its process died: the checkpoint stopped moving
+    db.session.execute(
+        db.update(LinkedInEnrichmentJob).values(updated_at=datetime.utcnow() - RUN_LEASE - timedelta(minutes=1))
+    )
+    db.session.commit()
+    assert [result['status'] for result in resume_linkedin_enrichment_jobs()] == ['completed']
+
+
+def test_enrich_endpoint_queues_the_job(app, monkeypatch):
+    client = _client_with_leads(['Acme', 'Beta Corp'])
+    _resolve_with(monkeypatch, lambda name: (1, {'industry': 'Consulting'}))
+    token = ClientSession.create_session(client.id).session_token
+    
+    futures = []
+    submit = enrichment_worker.submit
+    monkeypatch.setattr(enrichment_worker, 'submit', lambda *args, **kwargs: futures.append(submit(*args, **kwargs)))
+    
+    response = app.test_client().post('/api/automation/linkedin/enrich', json={},
+                                      headers={'Authorization': f'Bearer {token}'})
+    
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    futures[0].result(timeout=10)
+    db.session.expire_all()
+    job = db.session.get(LinkedInEnrichmentJob, job_id)
+    assert job.status == 'completed'
+    assert job.companies_done == 2
@@ -0,0 +1,37 @@
+from src.services import linkedin_service as linkedin_module
+from src.services.linkedin_service import LinkedInService
+from src.services.circuit_breaker import circuit_breakers
+
+
+class _Response:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload or {}
+        self.text = str(self._payload)
+    
+    def json(self):
+        return self._payload
+
+
+class _CountingBudget:
+    def __init__(self):
+        self.admitted = 0
+    
+    def admit(self, priority='normal', calls=1):
+        self.admitted += calls
+        return True
+
+
+def test_rate_limited_retry_is_admitted_once(app, monkeypatch):
+    responses = [_Response(429), _Response(429), _Response(200, {'id': 'me'})]
+    monkeypatch.setattr(linkedin_module.requests, 'get', lambda url, **kwargs: responses.pop(0))
+    circuit_breakers.reset()
+    service = LinkedInService('client-id', 'client-secret', 'token')
+    service.rate_limit_delay = 0
+    service.rate_limit_retry_delay = 0
+    service.budget = _CountingBudget()
+    
+    assert service._make_request('GET', 'people/~') == {'id': 'me'}
+    assert service.api_calls == 3
+    assert service.budget.admitted == 1
+    circuit_breakers.reset()
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+
+from src.main import create_app
+from src.models.base import db
+from src.models.auth import Client
+from src.services import linkedin_tokens
+from src.services.linkedin_tokens import LinkedInTokenRefresher
+
+
+def test_refresh_thread_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.delenv('LINKEDIN_TOKEN_REFRESH', raising=False)
+    refresher = LinkedInTokenRefresher()
+    monkeypatch.setattr(linkedin_tokens, 'linkedin_token_refresher', refresher)
+    
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'tokens.db'}"})
+    assert refresher._thread is None
+
+
+def test_refresh_command_refreshes_due_tokens(app, monkeypatch):
+    client = Client(
+        username='acme', email='acme@example.com', password_hash='x',
+        linkedin_access_token='old-token', linkedin_refresh_token='refresh-token',
+        linkedin_token_expires=datetime.utcnow() + timedelta(hours=1)
+    )
+    db.session.add(client)
+    db.session.commit()
+    monkeypatch.setattr(
+        LinkedInTokenRefresher, '_refresh',
+        staticmethod(lambda client_id, client_secret, refresh_token: {'access_token': 'new-token', 'expires_in': 3600})
+    )
+    
+    result = app.test_cli_runner().invoke(args=['refresh-linkedin-tokens'])
+    
+    assert 'Refreshed 1 LinkedIn tokens' in result.output
+    assert db.session.get(Client, client.id).linkedin_access_token == 'new-token'
@@ -0,0 +1,59 @@
+import pytest
+
+from src.models.base import db
+from src.models.auth import Client, ClientSession
+from src.models.lead import Lead
+from src.models.campaign import LeadCampaign
+from src.middleware.query_budget import assert_max_queries, count_queries, ROUTE_QUERY_BUDGETS
+
+# Duplicate detection has no per-request budget (it scales with the work
+# requested), but a fixed number of queries however many leads there are
+DUPLICATES_QUERY_LIMIT = 4
+
+
+def _seed(lead_count):
+    client = Client.create_client(username=f'acme{lead_count}', email=f'acme{lead_count}@example.com', password='password123')
+    campaigns = [LeadCampaign(client_id=client.id, name=f'Campaign {i}') for i in range(5)]
+    db.session.add_all(campaigns)
+    db.session.commit()
+    db.session.add_all([
+        Lead(
+            client_id=client.id,
+            first_name='Jo', last_name=f'Smith{i // 2}', email=f'jo{i}@example.com',
+            company=f'Company {i // 2}'
+        )
+        for i in range(lead_count)
+    ])
+    db.session.commit()
+    token = ClientSession.create_session(client.id).session_token
+    return {'Authorization': f'Bearer {token}'}
+
+
+def _get(app, path, headers):
+    response = app.test_client().get(path, headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response
+
+
+@pytest.mark.parametrize('path, endpoint', [
+    ('/api/automation/status', 'automation.get_automation_status'),
+    ('/api/automation/leads?page=1&per_page=20', 'automation.get_leads'),
+    ('/api/automation/campaigns', 'automation.get_campaigns'),
+])
+def test_route_stays_within_its_query_budget(app, path, endpoint):
+    headers = _seed(40)
+    
+    with assert_max_queries(ROUTE_QUERY_BUDGETS[endpoint]):
+        response = _get(app, path, headers)
+    assert int(response.headers['X-Query-Count']) <= ROUTE_QUERY_BUDGETS[endpoint]
+
+
+def test_duplicates_query_count_does_not_grow_with_leads(app):
+    counts = []
+    for lead_count in (10, 60):
+        headers = _seed(lead_count)
+        with assert_max_queries(DUPLICATES_QUERY_LIMIT):
+            with count_queries() as counter:
+                _get(app, '/api/automation/leads/duplicates', headers)
+        counts.append(counter.count)
+    assert counts[0] == counts[1]
@@ -0,0 +1,39 @@
+from flask import Response
+
+from src.middleware import read_replica
+from src.middleware.read_replica import STICKY_COOKIE, note_client_write, recently_wrote
+
+
+def _sticky_cookie(app, client_id):
+    with app.test_request_context('/api/automation/leads', method='POST'):
+        response = Response()
+        note_client_write(response, client_id)
+    cookie = response.headers['Set-Cookie']
+    return cookie.split(';', 1)[0].split('=', 1)[1]
+
+
+def _recently_wrote(app, client_id, cookie):
+    with app.test_request_context('/api/automation/leads', headers={'Cookie': f'{STICKY_COOKIE}={cookie}'}):
+        return recently_wrote(client_id)
+
+
+def test_write_is_sticky_for_the_writing_client_only(app):
+    cookie = _sticky_cookie(app, 1)
+    
+    assert _recently_wrote(app, 1, cookie)
+    assert not _recently_wrote(app, 2, cookie)
+
+
+def test_sticky_cookie_is_signed_and_expires(app, monkeypatch):
+    cookie = _sticky_cookie(app, 1)
+    
+    # Another process with the same secret key honours the cookie
+    other = app.__class__(app.import_name)
+    other.secret_key = app.secret_key
+    assert _recently_wrote(other, 1, cookie)
+    
+    other.secret_key = 'different'
+    assert not _recently_wrote(other, 1, cookie)
+    
+    monkeypatch.setitem(read_replica._config, 'sticky_seconds', -1)
+    assert not _recently_wrote(app, 1, cookie)